@@ -10,6 +10,18 @@ from .physics import (
 from .view import plotEdge2D, plotFace2D
 from . import sources
 from . import run
+from . import solvers
+from . import krylov
+from . import lowrank
+from . import condensation
+from . import azimuthal
+from . import symmetry
+from . import primary
+from . import adaptive
+from . import transforms
+from . import timesteps
+from . import waveforms
+from . import sweep
 from .utils import (
     load_properties, edge3DthetaSlice, face3DthetaSlice, ccv3DthetaSlice
 )
@@ -0,0 +1,261 @@
+import numpy as np
+from scipy.interpolate import CubicSpline
+
+from discretize import utils
+
+from . import physics
+
+
+def casing_currents(simulation, fields, src):
+    """
+    Default observable of the adaptive frequency sampling and of the
+    parameter sweeps: the radial and vertical currents in the casing (see
+    :func:`casingSimulations.physics.casing_currents`)
+
+    :param casingSimulations.run.SimulationFDEM simulation: simulation
+    :param SimPEG.EM.FDEM.Fields fields: fields of the simulation
+    :param SimPEG.EM.FDEM.Src.BaseFDEMSrc src: source
+    :rtype: numpy.ndarray
+    """
+    return physics.casing_currents(simulation, utils.mkvc(fields[src, 'j']))
+
+
+class SplineInterpolant(object):
+    """
+    Cubic spline interpolant of a (vector) response in
+    :math:`\\log_{10}(f)`
+
+    :param numpy.ndarray freqs: sampled frequencies
+    :param numpy.ndarray values: response at each frequency (a row per
+        frequency)
+    """
+
+    def __init__(self, freqs, values):
+        order = np.argsort(freqs)
+        self.freqs = np.asarray(freqs)[order]
+        self.values = np.asarray(values)[order]
+        self._spline = CubicSpline(
+            np.log10(self.freqs), self.values, axis=0
+        )
+
+    def __call__(self, freqs):
+        return self._spline(np.log10(freqs))
+
+
+class RationalInterpolant(object):
+    """
+    Rational interpolant of a (vector) response in :math:`s = i\\omega` in
+    barycentric form, found with the (set-valued) AAA algorithm: support
+    frequencies are added greedily where the rational approximation is
+    worst, and the weights minimize the linearized residual at the other
+    samples.
+
+    :param numpy.ndarray freqs: sampled frequencies
+    :param numpy.ndarray values: response at each frequency (a row per
+        frequency)
+    :param float tol: relative tolerance of the approximation
+    :param int max_degree: maximum number of support frequencies
+    """
+
+    def __init__(self, freqs, values, tol=1e-13, max_degree=None):
+        self.freqs = np.asarray(freqs, dtype=float)
+        values = np.asarray(values).reshape(len(self.freqs), -1)
+
+        Z = 2j*np.pi*self.freqs
+        F = values.astype(complex)
+        scale = np.abs(F).max()
+        if max_degree is None:
+            max_degree = len(Z) - 1
+
+        J = list(range(len(Z)))
+        support = []
+        R = np.ones_like(F) * F.mean(0)
+        w = np.ones(1, dtype=complex)
+        while len(support) < max(max_degree, 1):
+            j = J[np.argmax(np.abs(F[J] - R[J]).max(1))]
+            support.append(j)
+            J.remove(j)
+
+            C = 1. / (Z[J][:, None] - Z[support][None, :])
+            A = np.vstack([
+                F[J, k][:, None] * C - C * F[support, k][None, :]
+                for k in range(F.shape[1])
+            ])
+            w = np.linalg.svd(A, full_matrices=False)[2][-1, :].conj()
+
+            R = F.copy()
+            R[J] = C.dot(w[:, None] * F[support]) / C.dot(w)[:, None]
+            if np.abs(F - R).max() <= tol * scale:
+                break
+
+        self.support = Z[support]
+        self.support_values = F[support]
+        self.weights = w
+
+    def __call__(self, freqs):
+        z = 2j*np.pi*np.atleast_1d(freqs).astype(float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            C = 1. / (z[:, None] - self.support[None, :])
+            r = (
+                C.dot(self.weights[:, None] * self.support_values) /
+                C.dot(self.weights)[:, None]
+            )
+        # at the support points, the interpolant is the sampled value
+        ind, jnd = np.nonzero(z[:, None] == self.support[None, :])
+        r[ind] = self.support_values[jnd]
+        return r
+
+
+INTERPOLANTS = {
+    'spline': SplineInterpolant,
+    'rational': RationalInterpolant,
+}
+
+
+class AdaptiveFrequencySampler(object):
+    """
+    Adaptive frequency sampling of an FDEM simulation. The band is first
+    sampled at a few log-spaced frequencies. Each interval between samples is
+    then bisected (in :math:`\\log(f)`): the observable is computed at the
+    mid-point and compared with the interpolant of the samples so far. An
+    interval is refined further only if they disagree by more than the
+    tolerance, relative to the largest value of the observable. All the
+    mid-points of a refinement level are solved together, as one run of the
+    simulation at those frequencies (so the sweep options of the simulation,
+    such as :code:`reuse_analysis`, apply).
+
+    :param casingSimulations.run.SimulationFDEM simulation: simulation to
+        sample (its source, mesh, model and solver options are used)
+    :param float fmin: lowest frequency of the band
+    :param float fmax: highest frequency of the band
+    :param callable observable: function of (simulation, fields, src)
+        returning the vector that is interpolated (default is the casing
+        currents, :func:`casing_currents`)
+    :param str interpolant: 'rational' or 'spline'
+    :param float tol: relative tolerance on the interpolated observable
+    :param int n_initial: number of log-spaced frequencies sampled first
+    :param int max_solves: maximum number of frequencies to solve
+    :param bool verbose: print the progress of the sampling? (default is
+        the verbose setting of the simulation)
+    """
+
+    def __init__(
+        self, simulation, fmin, fmax, observable=None, interpolant='rational',
+        tol=1e-2, n_initial=5, max_solves=50, verbose=None
+    ):
+        if interpolant not in INTERPOLANTS:
+            raise KeyError(
+                "interpolant must be one of {}, not {}".format(
+                    sorted(INTERPOLANTS.keys()), interpolant
+                )
+            )
+        self.simulation = simulation
+        self.fmin = fmin
+        self.fmax = fmax
+        self.observable = (
+            observable if observable is not None else casing_currents
+        )
+        self.interpolant = interpolant
+        self.tol = tol
+        self.n_initial = max(n_initial, 3)
+        self.max_solves = max_solves
+        self.verbose = (
+            verbose if verbose is not None else simulation.verbose
+        )
+        self.samples = {}
+
+    @property
+    def freqs(self):
+        """
+        sampled frequencies
+
+        :rtype: numpy.ndarray
+        """
+        return np.array(sorted(self.samples.keys()))
+
+    @property
+    def values(self):
+        """
+        observable at the sampled frequencies (a row per frequency)
+
+        :rtype: numpy.ndarray
+        """
+        return np.vstack([self.samples[freq] for freq in self.freqs])
+
+    def sample(self, freqs):
+        """
+        Run the simulation at the frequencies provided and add the
+        observables to the samples
+
+        :param list freqs: frequencies to solve
+        """
+        freqs = [freq for freq in freqs if freq not in self.samples]
+        if len(freqs) == 0:
+            return
+        sim = self.simulation.simulation_at(freqs)
+        fields = sim.compute_fields()
+        for freq in freqs:
+            self.samples[freq] = np.hstack([
+                utils.mkvc(self.observable(sim, fields, src))
+                for src in sim.survey.getSrcByFreq(freq)
+            ])
+
+    def get_interpolant(self, freqs=None):
+        """
+        Interpolant of the samples
+
+        :param list freqs: frequencies to use (default is all the samples)
+        :rtype: callable
+        """
+        if freqs is None:
+            freqs = self.freqs
+        return INTERPOLANTS[self.interpolant](
+            np.array(freqs), np.vstack([self.samples[f] for f in freqs])
+        )
+
+    def run(self):
+        """
+        Sample the band adaptively
+
+        :rtype: tuple
+        :return: (sampled frequencies, interpolant of the observable)
+        """
+        self.sample(
+            np.logspace(
+                np.log10(self.fmin), np.log10(self.fmax), self.n_initial
+            )
+        )
+        freqs = self.freqs
+        pending = list(zip(freqs[:-1], freqs[1:]))
+
+        while pending and len(self.samples) < self.max_solves:
+            pending = pending[:self.max_solves - len(self.samples)]
+            midpoints = [np.sqrt(fa * fb) for fa, fb in pending]
+
+            # predict the mid-points before solving them
+            predictions = self.get_interpolant()(np.array(midpoints))
+            self.sample(midpoints)
+            scale = np.abs(self.values).max()
+
+            refine = []
+            for (fa, fb), fm, predicted in zip(
+                pending, midpoints, predictions
+            ):
+                misfit = np.abs(self.samples[fm] - predicted).max() / scale
+                if misfit > self.tol:
+                    refine += [(fa, fm), (fm, fb)]
+            if self.verbose:
+                print(
+                    '   adaptive sampling: {} frequencies, {} of {} '
+                    'intervals refined'.format(
+                        len(self.samples), len(refine) // 2, len(pending)
+                    )
+                )
+            pending = refine
+
+        if pending:
+            print(
+                '   adaptive sampling stopped at {} solves with {} intervals '
+                'above the tolerance'.format(len(self.samples), len(pending))
+            )
+        return self.freqs, self.get_interpolant()
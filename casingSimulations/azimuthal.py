@@ -0,0 +1,272 @@
+import multiprocessing
+import numpy as np
+import scipy.sparse as sp
+
+from .solvers import (
+    SolverStats, SuperLUSolver, ThreadLimits, worker_threads
+)
+
+
+def unknown_locations(mesh, location):
+    """
+    Locations of the unknowns of a 3D cylindrical mesh and the component
+    they belong to
+
+    :param discretize.CylMesh mesh: mesh
+    :param str location: 'E' (edges), 'F' (faces), 'CC' (cell centers) or
+        'N' (nodes)
+    :rtype: tuple
+    :return: (locations (r, theta, z), component of each unknown)
+    """
+    if location in ['E', 'F']:
+        grids = [
+            getattr(mesh, 'grid{}{}'.format(location, x)) for x in 'xyz'
+        ]
+    elif location in ['CC', 'N']:
+        grids = [getattr(mesh, 'grid{}'.format(location))]
+    else:
+        raise KeyError(
+            "location must be one of ['E', 'F', 'CC', 'N'], not {}".format(
+                location
+            )
+        )
+    grids = [grid for grid in grids if grid is not None and len(grid) > 0]
+    return (
+        np.vstack(grids),
+        np.hstack([i * np.ones(len(grid), dtype=int) for i, grid in
+                   enumerate(grids)])
+    )
+
+
+def azimuthal_indices(locations, n_theta, components=None, decimals=8):
+    """
+    Azimuthal index of each unknown and index of its (component, r, z)
+    position, for unknowns that repeat at each of n_theta uniformly spaced
+    azimuths
+
+    :param numpy.ndarray locations: locations (r, theta, z) of the unknowns
+    :param int n_theta: number of azimuths
+    :param numpy.ndarray components: component of each unknown (default is
+        a single component)
+    :param int decimals: decimals the coordinates are rounded to when they
+        are compared
+    :rtype: tuple
+    :return: (azimuthal index, position index)
+    """
+    locations = np.asarray(locations, dtype=float)
+    if components is None:
+        components = np.zeros(len(locations), dtype=int)
+
+    dtheta = 2*np.pi / n_theta
+    theta_index = np.zeros(len(locations), dtype=int)
+    for component in np.unique(components):
+        ind = components == component
+        theta = locations[ind, 1]
+        theta_index[ind] = np.round(
+            (theta - theta.min()) / dtheta
+        ).astype(int) % n_theta
+
+    _, position_index = np.unique(
+        np.c_[
+            components, np.round(locations[:, [0, 2]], decimals=decimals)
+        ],
+        axis=0, return_inverse=True
+    )
+    position_index = np.ravel(position_index)
+
+    # each position must have one unknown per azimuth
+    n_positions = position_index.max() + 1
+    counts = np.bincount(
+        position_index * n_theta + theta_index,
+        minlength=n_positions * n_theta
+    )
+    if len(locations) != n_positions * n_theta or np.any(counts != 1):
+        raise Exception(
+            "The unknowns are not repeated at each of the {} azimuths, the "
+            "azimuthal modes can not be separated".format(n_theta)
+        )
+    return theta_index, position_index
+
+
+def _solve_mode(args):
+    """
+    Worker solving the system of one azimuthal mode
+
+    :param tuple args: (matrix, right hand side, Solver, solver options,
+        number of threads)
+    :rtype: tuple
+    :return: (solution, solver stats summary)
+    """
+    A, b, Solver, solverOpts, num_threads = args
+    stats = SolverStats()
+    with ThreadLimits(num_threads):
+        Ainv = Solver(A, stats=stats, **solverOpts)
+        x = Ainv * b
+        Ainv.clean()
+    return x, stats.summary
+
+
+class AzimuthalModeSolver(object):
+    r"""
+    Solve a system on a 3D cylindrical mesh with uniform azimuthal cells
+    and an axisymmetric model as independent systems for each azimuthal
+    Fourier mode. With the unknowns grouped by azimuth, the matrix is block
+    circulant, :math:`A_{kl} = C_{(l - k) \bmod N}`, so the discrete Fourier
+    transform in azimuth block-diagonalizes it:
+
+    .. math::
+
+        \hat{A}_m \hat{x}_m = \hat{b}_m, \quad
+        \hat{A}_m = \sum_d C_d e^{2 \pi i d m / N}
+
+    Each mode is the size of a 2D (r, z) problem, modes the source does not
+    excite are skipped, and the modes are solved in parallel on
+    :code:`num_workers` processes. The fields are rebuilt with the inverse
+    transform.
+
+    :param scipy.sparse.spmatrix A: system matrix
+    :param numpy.ndarray theta_index: azimuthal index of each unknown
+    :param numpy.ndarray position_index: (component, r, z) index of each
+        unknown (see :func:`azimuthal_indices`)
+    :param BaseSolver Solver: solver backend class (default is SuperLU)
+    :param SolverStats stats: counters to update with the work done
+    :param int num_workers: number of worker processes
+    :param int num_threads: number of threads of each worker process (if
+        None, the cores are shared between the workers)
+    :param float tol: modes with a right hand side smaller than tol
+        (relative to the largest mode) are not solved
+    """
+
+    def __init__(
+        self, A, theta_index, position_index, Solver=None, stats=None,
+        num_workers=1, num_threads=None, tol=1e-12, **solverOpts
+    ):
+        self.theta_index = np.asarray(theta_index, dtype=int)
+        self.position_index = np.asarray(position_index, dtype=int)
+        self.Solver = Solver if Solver is not None else SuperLUSolver
+        self.stats = stats if stats is not None else SolverStats()
+        self.num_workers = num_workers
+        self.num_threads = num_threads
+        self.tol = tol
+        self.solverOpts = solverOpts
+        self.dtype = A.dtype
+
+        self.n_theta = self.theta_index.max() + 1
+        self.n_positions = self.position_index.max() + 1
+        self.blocks = self._circulant_blocks(sp.csr_matrix(A))
+
+    def _circulant_blocks(self, A):
+        """
+        blocks :math:`C_d` of the block-circulant matrix, checking that the
+        matrix is block circulant
+        """
+        N, n2 = self.n_theta, self.n_positions
+        rows, cols, vals = sp.find(A)
+        jr, jc = self.theta_index[rows], self.theta_index[cols]
+        pr, pc = self.position_index[rows], self.position_index[cols]
+        d = (jc - jr) % N
+
+        first = jr == 0
+        blocks = {}
+        expected = np.zeros_like(vals)
+        for dd in np.unique(d):
+            ind = first & (d == dd)
+            blocks[dd] = sp.csr_matrix(
+                (vals[ind], (pr[ind], pc[ind])), shape=(n2, n2)
+            )
+            ind = d == dd
+            expected[ind] = np.asarray(blocks[dd][pr[ind], pc[ind]]).ravel()
+
+        nnz = sum([block.nnz for block in blocks.values()])
+        if len(vals) != N * nnz or not np.allclose(
+            vals, expected, rtol=1e-10, atol=1e-12 * np.abs(vals).max()
+        ):
+            raise Exception(
+                "The system is not block circulant in azimuth (is the model "
+                "axisymmetric and are the azimuthal cells uniform?), the "
+                "azimuthal modes can not be separated"
+            )
+        return blocks
+
+    def mode_matrix(self, m):
+        """
+        matrix of the azimuthal mode m
+
+        :param int m: mode (0 to n_theta - 1)
+        :rtype: scipy.sparse.csc_matrix
+        """
+        phase = 2j*np.pi*m / self.n_theta
+        A = sum([
+            np.exp(phase * d) * block for d, block in self.blocks.items()
+        ])
+        if m == 0 and not np.issubdtype(self.dtype, np.complexfloating):
+            A = A.real
+        return sp.csc_matrix(A)
+
+    def solve(self, b):
+        """
+        Solve the system for the right hand side(s) provided
+
+        :param numpy.ndarray b: right hand side (vector or array with a column
+            per source)
+        :rtype: numpy.ndarray
+        """
+        b = np.asarray(b)
+        shape = b.shape
+        b = b.reshape(shape[0], -1)
+
+        B = np.zeros(
+            (self.n_theta, self.n_positions, b.shape[1]),
+            dtype=np.result_type(b.dtype, complex)
+        )
+        B[self.theta_index, self.position_index] = b
+        B_hat = np.fft.fft(B, axis=0)
+
+        amplitude = np.abs(B_hat).reshape(self.n_theta, -1).max(1)
+        modes = np.nonzero(amplitude > self.tol * amplitude.max())[0]
+        self.modes = modes
+
+        # the modes other than 0 are complex and not symmetric
+        solverOpts = [
+            dict(
+                self.solverOpts,
+                matrix_type=self.solverOpts.get('matrix_type', 'general')
+                if m == 0 else 'general'
+            ) for m in modes
+        ]
+
+        num_workers = min(self.num_workers, len(modes))
+        X_hat = np.zeros_like(B_hat)
+        if num_workers > 1:
+            num_threads = worker_threads(self.num_threads, num_workers)
+            jobs = [
+                (self.mode_matrix(m), B_hat[m], self.Solver, opts, num_threads)
+                for m, opts in zip(modes, solverOpts)
+            ]
+            pool = multiprocessing.Pool(processes=num_workers)
+            try:
+                results = pool.map(_solve_mode, jobs)
+            finally:
+                pool.close()
+                pool.join()
+            for m, (x, summary) in zip(modes, results):
+                X_hat[m] = np.asarray(x).reshape(self.n_positions, -1)
+                self.stats.add(summary)
+        else:
+            for m, opts in zip(modes, solverOpts):
+                Ainv = self.Solver(
+                    self.mode_matrix(m), stats=self.stats, **opts
+                )
+                X_hat[m] = np.asarray(Ainv * B_hat[m]).reshape(
+                    self.n_positions, -1
+                )
+                Ainv.clean()
+
+        X = np.fft.ifft(X_hat, axis=0)
+        x = X[self.theta_index, self.position_index]
+        if not (
+            np.iscomplexobj(b) or
+            np.issubdtype(self.dtype, np.complexfloating)
+        ):
+            x = x.real
+        return x.reshape(shape)
@@ -0,0 +1,219 @@
+import hashlib
+import numpy as np
+import scipy.sparse as sp
+
+from .solvers import SolverStats, SuperLUSolver
+
+
+def _fingerprint(A, ind_padding):
+    """
+    hash of the rows and of the columns of the padding unknowns of the matrix
+    (:math:`A_{PP}`, :math:`A_{PC}` and :math:`A_{CP}`, the part of the
+    system the condensation depends on)
+    """
+    A = sp.csr_matrix(A)
+    digest = hashlib.sha1()
+    for A_P in [A[ind_padding], A.T.tocsr()[ind_padding]]:
+        A_P.sort_indices()
+        for array in [A_P.indptr, A_P.indices, A_P.data]:
+            digest.update(np.ascontiguousarray(array).tobytes())
+    return digest.hexdigest()
+
+
+class PaddingCondensation(object):
+    r"""
+    Static condensation of the padding region of a system. The unknowns
+    are split into the core (C) and the padding (P). The rows of the
+    padding unknowns only depend on the background (and air) properties,
+    so the padding can be eliminated once:
+
+    .. math::
+
+        S = A_{CC} - A_{CP} A_{PP}^{-1} A_{PC} = A_{CC} - E_B G E_B^T
+
+    Only the core unknowns coupled to the padding (B, the boundary of the
+    core, selected by :math:`E_B`) are affected, so the boundary operator
+    (the discrete Dirichlet-to-Neumann map of the padding) is the dense
+    :math:`n_B \times n_B` matrix :math:`G = A_{BP} A_{PP}^{-1} A_{PB}`.
+    Later systems that only differ in the core (for example another casing
+    or source) are solved on the core only, with :math:`S`. The padding
+    unknowns are recovered from the extension
+    :math:`X = A_{PP}^{-1} A_{PB}` (:math:`x_P = -X x_B`), which is kept
+    only if :code:`store_extension`; otherwise they are zero. The sources
+    must be in the core.
+
+    The memory grows with the number of boundary unknowns :math:`n_B`,
+    which grows with the surface of the core (its number of azimuthal cells
+    times its radial and vertical extent on a 3D cylindrical mesh): G holds
+    :math:`n_B^2` values and fills the core matrix on the boundary, so its
+    factorization gets denser, and the extension holds another
+    :math:`n_P n_B` values. While condensing, the extension is computed
+    :code:`block_size` columns at a time.
+
+    :param scipy.sparse.spmatrix A: system matrix
+    :param numpy.ndarray ind_core: indices of the core unknowns (the ones
+        whose rows depend on the properties of the core)
+    :param BaseSolver Solver: solver backend class (default is SuperLU)
+    :param SolverStats stats: counters to update with the work done
+    :param bool store_extension: keep the extension to the padding?
+    :param int block_size: number of boundary unknowns solved for at once
+    :param bool verbose: print progress messages?
+    """
+
+    def __init__(
+        self, A=None, ind_core=None, Solver=None, stats=None,
+        store_extension=False, block_size=256, verbose=False, **solverOpts
+    ):
+        self.Solver = Solver if Solver is not None else SuperLUSolver
+        self.stats = stats if stats is not None else SolverStats()
+        self.verbose = verbose
+        self.solverOpts = solverOpts
+        if A is not None:
+            self._condense(A, ind_core, store_extension, block_size)
+
+    def _condense(self, A, ind_core, store_extension, block_size):
+        A = sp.csr_matrix(A)
+        n = A.shape[0]
+        self.n = n
+        self.ind_core = np.sort(np.asarray(ind_core, dtype=int))
+        self.ind_padding = np.setdiff1d(np.arange(n), self.ind_core)
+
+        A_CP = A[self.ind_core][:, self.ind_padding]
+        A_PC = A[self.ind_padding][:, self.ind_core]
+        # core unknowns coupled to the padding
+        self.ind_boundary = np.union1d(A_CP.nonzero()[0], A_PC.nonzero()[1])
+        A_PB = A_PC[:, self.ind_boundary]
+
+        App_inv = self.Solver(
+            A[self.ind_padding][:, self.ind_padding].tocsc(),
+            stats=self.stats, **self.solverOpts
+        )
+        A_BP = A_CP[self.ind_boundary]
+        dtype = np.result_type(A.dtype, float)
+        nB = len(self.ind_boundary)
+        self.G = np.zeros((nB, nB), dtype=dtype)
+        self.X = (
+            np.zeros((len(self.ind_padding), nB), dtype=dtype)
+            if store_extension else None
+        )
+        for start in range(0, nB, block_size):
+            stop = min(start + block_size, nB)
+            X = np.asarray(
+                App_inv * A_PB[:, start:stop].toarray()
+            ).reshape(len(self.ind_padding), -1)
+            self.G[:, start:stop] = A_BP * X
+            if store_extension:
+                self.X[:, start:stop] = X
+        App_inv.clean()
+        self.fingerprint = _fingerprint(A, self.ind_padding)
+
+    def save(self, filename):
+        """
+        Save the boundary operator (and the extension) to a .npz file
+
+        :param str filename: file name
+        """
+        np.savez(
+            filename, n=self.n, ind_core=self.ind_core,
+            ind_boundary=self.ind_boundary, G=self.G,
+            X=self.X if self.X is not None else np.zeros((0, 0)),
+            fingerprint=self.fingerprint
+        )
+        if self.verbose:
+            print('Saved {}'.format(filename))
+
+    @classmethod
+    def load(
+        cls, filename, Solver=None, stats=None, verbose=False, **solverOpts
+    ):
+        """
+        Load a boundary operator saved with :meth:`save`
+
+        :param str filename: file name
+        :param BaseSolver Solver: solver backend class for the core systems
+        :param SolverStats stats: counters to update with the work done
+        :param bool verbose: print progress messages?
+        :rtype: PaddingCondensation
+        """
+        condensation = cls(
+            Solver=Solver, stats=stats, verbose=verbose, **solverOpts
+        )
+        with np.load(filename) as data:
+            condensation.n = int(data['n'])
+            condensation.ind_core = data['ind_core']
+            condensation.ind_boundary = data['ind_boundary']
+            condensation.G = data['G']
+            condensation.X = data['X'] if data['X'].size else None
+            condensation.fingerprint = str(data['fingerprint'])
+        condensation.ind_padding = np.setdiff1d(
+            np.arange(condensation.n), condensation.ind_core
+        )
+        return condensation
+
+    def matches(self, A):
+        """
+        Is the padding of the matrix the one that was condensed?
+
+        :param scipy.sparse.spmatrix A: system matrix
+        :rtype: bool
+        """
+        return (
+            A.shape[0] == self.n and
+            _fingerprint(A, self.ind_padding) == self.fingerprint
+        )
+
+    def core_matrix(self, A):
+        """
+        Condensed matrix of the core
+
+        :param scipy.sparse.spmatrix A: system matrix
+        :rtype: scipy.sparse.csc_matrix
+        """
+        A_CC = sp.csr_matrix(A)[self.ind_core][:, self.ind_core]
+        B = self.ind_boundary
+        rows, cols = np.meshgrid(B, B, indexing='ij')
+        correction = sp.csr_matrix(
+            (self.G.ravel(), (rows.ravel(), cols.ravel())),
+            shape=A_CC.shape
+        )
+        return (A_CC - correction).tocsc()
+
+    def solve(self, A, b):
+        """
+        Solve the system on the core
+
+        :param scipy.sparse.spmatrix A: system matrix (its padding rows must
+            be the ones that were condensed)
+        :param numpy.ndarray b: right hand side (vector or array with a column
+            per source), zero in the padding
+        :rtype: numpy.ndarray
+        """
+        if not self.matches(A):
+            raise Exception(
+                "The padding of the system differs from the condensed one, "
+                "the boundary operator can not be used"
+            )
+        b = np.asarray(b)
+        shape = b.shape
+        b = b.reshape(shape[0], -1)
+        if np.any(b[self.ind_padding]):
+            raise Exception(
+                "The source is in the padding, enlarge the core of the mesh "
+                "to use the condensed padding"
+            )
+
+        Ainv = self.Solver(
+            self.core_matrix(A), stats=self.stats, **self.solverOpts
+        )
+        x_C = np.asarray(Ainv * b[self.ind_core]).reshape(
+            len(self.ind_core), -1
+        )
+        Ainv.clean()
+
+        x = np.zeros(
+            (self.n, b.shape[1]), dtype=np.result_type(x_C.dtype, b.dtype)
+        )
+        x[self.ind_core] = x_C
+        if self.X is not None:
+            x[self.ind_padding] = -self.X.dot(x_C[self.ind_boundary])
+        return x.reshape(shape)
@@ -0,0 +1,429 @@
+import numpy as np
+import scipy.sparse as sp
+
+from .solvers import SolverStats, SuperLUSolver, SweepSolver
+
+
+def affine_split(X_a, X_b, s_a, s_b):
+    r"""
+    Split a quantity that depends affinely on a shift, :math:`X(s) = X_0 + s
+    X_1` (such as the FDEM system matrix :math:`K + i\omega M` or its right
+    hand side), into its two parts from its values at two shifts.
+
+    :param X_a: value at the shift s_a (sparse matrix or numpy array)
+    :param X_b: value at the shift s_b
+    :param complex s_a: first shift
+    :param complex s_b: second shift
+    :rtype: tuple
+    :return: (X_0, X_1)
+    """
+    X_1 = (X_b - X_a) / (s_b - s_a)
+    X_0 = X_a - s_a * X_1
+    return X_0, X_1
+
+
+# number of Krylov vectors allocated at first, the basis is doubled in size
+# when it is full (up to maxiter)
+KRYLOV_BLOCK = 32
+
+
+def _grown(array, shape):
+    """
+    copy of an array in a larger array of zeros
+    """
+    grown = np.zeros(shape, dtype=array.dtype)
+    grown[tuple(slice(0, n) for n in array.shape)] = array
+    return grown
+
+
+class MultiShiftSolver(object):
+    r"""
+    Solve the shifted systems
+
+    .. math::
+
+        (K + s M) x(s) = b_0 + s b_1
+
+    for many shifts s (for the FDEM system, :math:`s = i\omega`) in a single
+    Krylov space. The systems are shift-inverted about a shift :math:`\tau`,
+    which needs one factorization of :math:`K + \tau M`:
+
+    .. math::
+
+        (I + (s - \tau) B) x(s) = c_0 + s c_1, \quad
+        B = (K + \tau M)^{-1} M, \quad c_i = (K + \tau M)^{-1} b_i
+
+    Krylov spaces of B are invariant to the shift, so one Arnoldi sequence
+    for each of :math:`c_0, c_1` serves every shift; the solution for each
+    shift is a small least-squares problem with the projected Hessenberg
+    matrix (shifted GMRES).
+
+    :param scipy.sparse.spmatrix K: shift-independent part of the matrix
+    :param scipy.sparse.spmatrix M: part of the matrix scaled by the shift
+    :param complex tau: shift the systems are inverted about (default is the
+        geometric mean of the shifts being solved for)
+    :param BaseSolver Solver: solver backend class for the factorization of
+        :math:`K + \tau M` (default is SuperLU)
+    :param SolverStats stats: counters to update with the work done
+    :param float tol: relative residual of the shift-inverted systems to
+        converge to
+    :param int maxiter: maximum dimension of the Krylov space
+    :param bool verbose: print the convergence of each Krylov sequence?
+    """
+
+    def __init__(
+        self, K, M, tau=None, Solver=None, stats=None, tol=1e-8, maxiter=500,
+        verbose=False, **solverOpts
+    ):
+        self.K = sp.csc_matrix(K)
+        self.M = sp.csc_matrix(M)
+        self.tau = tau
+        self.Solver = Solver if Solver is not None else SuperLUSolver
+        self.stats = stats if stats is not None else SolverStats()
+        self.tol = tol
+        self.maxiter = maxiter
+        self.verbose = verbose
+        self.solverOpts = solverOpts
+        self._Ainv = None
+        self._tau_factored = None
+
+    def _factor(self, tau):
+        if self._Ainv is None or self._tau_factored != tau:
+            self.clean()
+            self._Ainv = self.Solver(
+                (self.K + tau * self.M).tocsc(), stats=self.stats,
+                **self.solverOpts
+            )
+            self._tau_factored = tau
+        return self._Ainv
+
+    def _shifted_solutions(self, Ainv, c, sigmas):
+        r"""
+        Arnoldi sequence for the operator B started from c, returns the
+        solutions of :math:`(I + \sigma B) x = c` for each sigma
+        """
+        n = c.shape[0]
+        beta = np.linalg.norm(c)
+        if beta == 0.:
+            return np.zeros((n, len(sigmas)), dtype=complex)
+
+        # the basis grows with the iterations rather than being allocated
+        # for maxiter vectors
+        capacity = min(self.maxiter, KRYLOV_BLOCK)
+        V = np.zeros((n, capacity + 1), dtype=complex)
+        H = np.zeros((capacity + 1, capacity), dtype=complex)
+        V[:, 0] = c / beta
+
+        # Givens rotations of the QR factorization of each shifted
+        # Hessenberg matrix, they give the residual of every shift for free
+        ns = len(sigmas)
+        cs = np.zeros((ns, capacity), dtype=complex)
+        sn = np.zeros((ns, capacity), dtype=complex)
+        g = np.zeros(ns, dtype=complex) + beta
+
+        m = 0
+        converged = False
+        while m < self.maxiter:
+            if m == capacity:
+                capacity = min(2 * capacity, self.maxiter)
+                V = _grown(V, (n, capacity + 1))
+                H = _grown(H, (capacity + 1, capacity))
+                cs = _grown(cs, (ns, capacity))
+                sn = _grown(sn, (ns, capacity))
+            w = Ainv.solve(self.M * V[:, m])
+            # classical Gram-Schmidt, repeated once for stability
+            for _ in range(2):
+                h = V[:, :m + 1].T.conj().dot(w)
+                H[:m + 1, m] += h
+                w = w - V[:, :m + 1].dot(h)
+            H[m + 1, m] = np.linalg.norm(w)
+
+            # new column of each shifted Hessenberg matrix, I + sigma H
+            col = sigmas[:, None] * H[None, :m + 2, m]
+            col[:, m] += 1.
+            for i in range(m):
+                a = col[:, i].copy()
+                col[:, i] = cs[:, i].conj() * a + sn[:, i].conj() * col[:, i+1]
+                col[:, i+1] = -sn[:, i] * a + cs[:, i] * col[:, i+1]
+            r = np.sqrt(np.abs(col[:, m])**2 + np.abs(col[:, m+1])**2)
+            r[r == 0.] = 1.
+            cs[:, m], sn[:, m] = col[:, m] / r, col[:, m+1] / r
+            g = -sn[:, m] * g
+            residuals = np.abs(g) / beta
+            m += 1
+
+            breakdown = abs(H[m, m - 1]) <= 1e-14 * np.abs(H[:m, :m]).max()
+            if not breakdown:
+                V[:, m] = w / H[m, m - 1]
+            if breakdown or residuals.max() < self.tol:
+                converged = True
+                break
+
+        Y, residuals = self._project(H[:m + 1, :m], beta, sigmas)
+        converged = converged and residuals.max() < 10 * self.tol
+
+        self.stats.iterations.append(m)
+        self.stats.residuals.append(residuals.max())
+        if self.verbose:
+            print(
+                '      multi-shift Krylov: {} iterations for {} shifts, max '
+                'relative residual {:1.2e}'.format(
+                    m, len(sigmas), residuals.max()
+                )
+            )
+        if not converged:
+            raise Exception(
+                'multi-shift Krylov solve did not converge to {} in {} '
+                'iterations (relative residual {:1.2e})'.format(
+                    self.tol, self.maxiter, residuals.max()
+                )
+            )
+        return V[:, :m].dot(Y)
+
+    @staticmethod
+    def _project(Hbar, beta, sigmas):
+        r"""
+        solve the projected least-squares problems
+        :math:`\min \|\beta e_1 - (\bar{I} + \sigma \bar{H}) y\|`
+        """
+        m = Hbar.shape[1]
+        Ibar = np.eye(m + 1, m)
+        rhs = np.zeros(m + 1, dtype=complex)
+        rhs[0] = beta
+        Y = np.zeros((m, len(sigmas)), dtype=complex)
+        residuals = np.zeros(len(sigmas))
+        for j, sigma in enumerate(sigmas):
+            Hs = Ibar + sigma * Hbar
+            Y[:, j] = np.linalg.lstsq(Hs, rhs, rcond=None)[0]
+            residuals[j] = np.linalg.norm(rhs - Hs.dot(Y[:, j])) / beta
+        return Y, residuals
+
+    def solve(self, shifts, b0, b1=None):
+        """
+        Solve the shifted systems for all the shifts
+
+        :param numpy.ndarray shifts: shifts s
+        :param numpy.ndarray b0: shift-independent part of the right hand side
+            (vector or array with a column per source)
+        :param numpy.ndarray b1: part of the right hand side scaled by the
+            shift (optional)
+        :rtype: list
+        :return: solutions for each shift, shaped like b0
+        """
+        shifts = np.atleast_1d(shifts).astype(complex)
+        tau = self.tau
+        if tau is None:
+            tau = np.exp(np.log(shifts).mean())
+        sigmas = shifts - tau
+        Ainv = self._factor(tau)
+
+        b0 = np.asarray(b0)
+        shape = b0.shape
+        b0 = b0.reshape(shape[0], -1)
+        b1 = (
+            np.zeros_like(b0) if b1 is None else
+            np.asarray(b1).reshape(shape[0], -1)
+        )
+
+        X = np.zeros((b0.shape[0], b0.shape[1], len(shifts)), dtype=complex)
+        for i in range(b0.shape[1]):
+            X[:, i, :] = self._shifted_solutions(
+                Ainv, Ainv.solve(b0[:, i].astype(complex)), sigmas
+            )
+            if np.any(b1[:, i]):
+                X[:, i, :] += shifts * self._shifted_solutions(
+                    Ainv, Ainv.solve(b1[:, i].astype(complex)), sigmas
+                )
+
+        return [X[:, :, j].reshape(shape) for j in range(len(shifts))]
+
+    def clean(self):
+        """
+        Release the factors
+        """
+        if self._Ainv is not None:
+            self._Ainv.clean()
+        self._Ainv = None
+        self._tau_factored = None
+
+
+class ReducedOrderModel(object):
+    r"""
+    Rational Krylov reduced-order model of the shifted systems
+
+    .. math::
+
+        (K + s M) x(s) = b_0 + s b_1
+
+    The basis V is built from full solutions at a few poles
+    :math:`s_j` (one factorization each, re-using the analysis of the
+    matrix), and the reduced system
+    :math:`V^H (K + s M) V y = V^H (b_0 + s b_1)`, :math:`x \approx V y` is
+    cheap to solve at any shift. The relative residual
+    :math:`\|b(s) - (K + s M) V y(s)\| / \|b(s)\|` of the reduced solution
+    is computed without forming it (from a QR factorization of
+    :math:`[b_0, b_1, KV, MV]`) and serves as an a-posteriori error
+    estimate: the error is bounded by the residual times the condition
+    number of the system. Poles are added greedily where this estimate is
+    largest (see :meth:`fit`).
+
+    :param scipy.sparse.spmatrix K: shift-independent part of the matrix
+    :param scipy.sparse.spmatrix M: part of the matrix scaled by the shift
+    :param numpy.ndarray b0: shift-independent part of the right hand side
+        (array with a column per source)
+    :param numpy.ndarray b1: part of the right hand side scaled by the shift
+    :param BaseSolver Solver: solver backend class for the full solves
+        (default is SuperLU)
+    :param SolverStats stats: counters to update with the work done
+    """
+
+    def __init__(
+        self, K, M, b0, b1=None, Solver=None, stats=None, **solverOpts
+    ):
+        self.K = sp.csc_matrix(K)
+        self.M = sp.csc_matrix(M)
+        self.b0 = np.asarray(b0, dtype=complex).reshape(K.shape[0], -1)
+        self.b1 = (
+            np.zeros_like(self.b0) if b1 is None else
+            np.asarray(b1, dtype=complex).reshape(K.shape[0], -1)
+        )
+        self.stats = stats if stats is not None else SolverStats()
+        self._Ainv = SweepSolver(Solver=Solver, stats=self.stats, **solverOpts)
+
+        self.poles = []
+        self.V = np.zeros((K.shape[0], 0), dtype=complex)
+
+    @property
+    def size(self):
+        """
+        dimension of the reduced model
+        """
+        return self.V.shape[1]
+
+    def add_pole(self, s):
+        """
+        Do a full solve at the shift s and add the solution(s) to the basis
+
+        :param complex s: shift
+        """
+        self._Ainv.factor((self.K + s * self.M).tocsc())
+        X = self._Ainv * (self.b0 + s * self.b1)
+        X = X.reshape(self.V.shape[0], -1)
+
+        # orthogonalize against the basis (twice for stability), dropping
+        # the vectors already in its span
+        for x in X.T:
+            norm = np.linalg.norm(x)
+            for _ in range(2):
+                x = x - self.V.dot(self.V.T.conj().dot(x))
+            if np.linalg.norm(x) > 1e-10 * norm:
+                self.V = np.hstack([
+                    self.V, (x / np.linalg.norm(x))[:, None]
+                ])
+        self.poles.append(s)
+        self._project()
+
+    def _project(self):
+        KV = self.K * self.V
+        MV = self.M * self.V
+        self._Kr = self.V.T.conj().dot(KV)
+        self._Mr = self.V.T.conj().dot(MV)
+        self._b0r = self.V.T.conj().dot(self.b0)
+        self._b1r = self.V.T.conj().dot(self.b1)
+
+        # R factors of [b0, b1, KV, MV] for each right hand side: the
+        # residual norm of a reduced solution is the norm of R times its
+        # coefficients
+        self._R = [
+            np.linalg.qr(
+                np.hstack([
+                    self.b0[:, [i]], self.b1[:, [i]], KV, MV
+                ]), mode='r'
+            ) for i in range(self.b0.shape[1])
+        ]
+
+    def reduced_solve(self, s):
+        """
+        Solve the reduced system at the shift s
+
+        :param complex s: shift
+        :rtype: numpy.ndarray
+        :return: coefficients of the solution in the basis (a column per
+            right hand side)
+        """
+        return np.linalg.solve(
+            self._Kr + s * self._Mr, self._b0r + s * self._b1r
+        )
+
+    def solve(self, shifts):
+        """
+        Evaluate the reduced model at the shifts provided
+
+        :param numpy.ndarray shifts: shifts s
+        :rtype: list
+        :return: approximate solutions (a column per right hand side) for
+            each shift
+        """
+        return [
+            self.V.dot(self.reduced_solve(s)) for s in np.atleast_1d(shifts)
+        ]
+
+    def error_estimate(self, shifts):
+        """
+        Relative residual of the reduced solution at each shift (maximum over
+        the right hand sides)
+
+        :param numpy.ndarray shifts: shifts s
+        :rtype: numpy.ndarray
+        """
+        shifts = np.atleast_1d(shifts)
+        estimate = np.zeros(len(shifts))
+        for j, s in enumerate(shifts):
+            Y = self.reduced_solve(s)
+            for i, R in enumerate(self._R):
+                c = np.hstack([[1., s], -Y[:, i], -s * Y[:, i]])
+                b_norm = np.linalg.norm(self.b0[:, i] + s * self.b1[:, i])
+                if b_norm > 0:
+                    estimate[j] = max(
+                        estimate[j], np.linalg.norm(R.dot(c)) / b_norm
+                    )
+        return estimate
+
+    def fit(self, shifts, tol=1e-6, max_poles=20, verbose=False):
+        """
+        Greedily choose poles among the shifts provided until the error
+        estimate is below tol at all of them. The first poles are the
+        smallest and largest shifts.
+
+        :param numpy.ndarray shifts: shifts the model is trained on
+        :param float tol: relative residual to reach
+        :param int max_poles: maximum number of full solves
+        :param bool verbose: print the error estimate after each pole?
+        :rtype: numpy.ndarray
+        :return: error estimate at each shift
+        """
+        shifts = np.atleast_1d(shifts)
+        order = np.argsort(np.abs(shifts))
+        for s in [shifts[order[0]], shifts[order[-1]]][:max_poles]:
+            if s not in self.poles:
+                self.add_pole(s)
+
+        while True:
+            estimate = self.error_estimate(shifts)
+            if verbose:
+                print(
+                    '      reduced model: {} poles, size {}, max error '
+                    'estimate {:1.2e}'.format(
+                        len(self.poles), self.size, estimate.max()
+                    )
+                )
+            if estimate.max() < tol or len(self.poles) >= max_poles:
+                break
+            s = shifts[np.argmax(estimate)]
+            if s in self.poles:
+                break
+            self.add_pole(s)
+
+        self._Ainv.clean()
+        self.error_estimates = estimate
+        return estimate
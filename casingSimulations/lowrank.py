@@ -0,0 +1,121 @@
+import numpy as np
+import scipy.sparse as sp
+import scipy.linalg
+
+from .solvers import SolverStats, SuperLUSolver
+
+
+def changed_unknowns(A, B, tol=0.):
+    """
+    Unknowns whose rows or columns differ between two matrices
+
+    :param scipy.sparse.spmatrix A: first matrix
+    :param scipy.sparse.spmatrix B: second matrix
+    :param float tol: entries of the difference smaller than tol (relative to
+        the largest entry of A) are ignored
+    :rtype: numpy.ndarray
+    :return: sorted indices of the unknowns
+    """
+    rows, cols, vals = sp.find(sp.csr_matrix(A) - sp.csr_matrix(B))
+    keep = np.abs(vals) > tol * np.abs(sp.csr_matrix(A).data).max()
+    return np.union1d(rows[keep], cols[keep])
+
+
+class WoodburySolver(object):
+    r"""
+    Solve systems that differ from a factored reference system only in the
+    rows and columns of a small set of unknowns (for example the edges or
+    faces of the casing cells when only the casing properties change):
+
+    .. math::
+
+        A = A_0 + E D E^T
+
+    where E selects the k unknowns and D is the (k x k) change of the matrix.
+    With the Woodbury identity,
+
+    .. math::
+
+        A^{-1} b = x_0 - Z (I + D W)^{-1} D E^T x_0, \quad
+        x_0 = A_0^{-1} b, \quad Z = A_0^{-1} E, \quad W = E^T Z
+
+    so, once :math:`A_0` is factored and Z is computed (k solves), each new
+    system costs one solve with the reference factors and a dense k x k
+    factorization. Z is stored, which needs memory for n x k values.
+
+    :param scipy.sparse.spmatrix A: reference matrix
+    :param numpy.ndarray ind: indices of the unknowns that may change
+    :param BaseSolver Solver: solver backend class (default is SuperLU)
+    :param SolverStats stats: counters to update with the work done
+    :param int block_size: number of columns of Z solved for at once
+    """
+
+    def __init__(
+        self, A, ind, Solver=None, stats=None, block_size=256, **solverOpts
+    ):
+        self.A = sp.csr_matrix(A)
+        self.ind = np.asarray(ind, dtype=int)
+        self.Solver = Solver if Solver is not None else SuperLUSolver
+        self.stats = stats if stats is not None else SolverStats()
+        self.solverOpts = solverOpts
+
+        self._Ainv = self.Solver(
+            sp.csc_matrix(A), stats=self.stats, **solverOpts
+        )
+
+        n, k = A.shape[0], len(self.ind)
+        self.Z = np.zeros((n, k), dtype=np.result_type(A.dtype, float))
+        for start in range(0, k, block_size):
+            cols = self.ind[start:start+block_size]
+            E = np.zeros((n, len(cols)), dtype=self.Z.dtype)
+            E[cols, np.arange(len(cols))] = 1.
+            self.Z[:, start:start+len(cols)] = np.asarray(
+                self._Ainv * E
+            ).reshape(n, -1)
+        self.W = self.Z[self.ind]
+
+    def _update(self, A):
+        """
+        dense change of the matrix restricted to the unknowns that may change
+        """
+        delta = sp.csr_matrix(A) - self.A
+        rows, cols, vals = sp.find(delta)
+        if not (
+            np.all(np.isin(rows, self.ind)) and np.all(np.isin(cols, self.ind))
+        ):
+            raise Exception(
+                "The matrix changed outside of the unknowns of the update, a "
+                "low-rank update can not be used"
+            )
+        return delta[self.ind][:, self.ind].toarray()
+
+    def solve(self, A, b):
+        """
+        Solve the system with the matrix A (which differs from the reference
+        matrix only in the rows and columns of the unknowns of the update)
+
+        :param scipy.sparse.spmatrix A: matrix
+        :param numpy.ndarray b: right hand side (vector or array with a column
+            per source)
+        :rtype: numpy.ndarray
+        """
+        D = self._update(A)
+        x = np.asarray(self._Ainv * b)
+        if not D.any():
+            return x
+
+        shape = x.shape
+        x = x.reshape(shape[0], -1)
+        k = len(self.ind)
+        y = scipy.linalg.solve(
+            np.eye(k) + D.dot(self.W), D.dot(x[self.ind])
+        )
+        return (x - self.Z.dot(y)).reshape(shape)
+
+    def clean(self):
+        """
+        Release the factors of the reference matrix
+        """
+        if self._Ainv is not None:
+            self._Ainv.clean()
+        self._Ainv = None
@@ -2,6 +2,7 @@ import numpy as np
 import properties
 import json
 import os
+import warnings
 import matplotlib.pyplot as plt
 import inspect
 
@@ -14,6 +15,8 @@ from discretize.utils import mkvc
 
 from . import model
 from .base import BaseCasing
+from .azimuthal import unknown_locations
+from .symmetry import mirror_map
 # __all__ = [TensorMeshGenerator, CylMeshGenerator]
 
 
@@ -30,6 +33,80 @@ from .base import BaseCasing
 #         return value
 
 
+def padding_cells(cs, distance, pf_max=1.5):
+    """
+    Smallest number of padding cells, growing from the core cell size by
+    at most pf_max, that reach a distance, and the smallest padding factor
+    that reaches it with that number of cells
+
+    :param float cs: core cell size
+    :param float distance: distance the padding must reach
+    :param float pf_max: largest padding factor
+    :rtype: tuple
+    :return: (number of padding cells, padding factor)
+    """
+    def extent(n, pf):
+        return cs * np.sum(pf**np.arange(1, n+1))
+
+    npad = 1
+    while extent(npad, pf_max) < distance:
+        npad += 1
+
+    # bisect the padding factor
+    low, high = 1., pf_max
+    for _ in range(60):
+        pf = (low + high) / 2.
+        if extent(npad, pf) < distance:
+            low = pf
+        else:
+            high = pf
+    return npad, high
+
+
+def graded_tensor(z_min, z_max, points, cs, cs_max, growth=1.1, n_fine=5):
+    """
+    Cell sizes between z_min and z_max that are cs within n_fine cells of
+    the refinement points, and grow smoothly (by about a factor growth
+    between neighbours at most) up to cs_max away from them. The target size grows
+    linearly with the distance d beyond the fine cells,
+    h(z) = min(cs_max, cs + (growth - 1) d), and the nodes are placed so
+    that each cell spans the same fraction of :math:`\int dz / h(z)`. The
+    refinement points (and z_min, z_max) are nodes.
+
+    :param float z_min: bottom of the region
+    :param float z_max: top of the region
+    :param list points: refinement points
+    :param float cs: finest cell size
+    :param float cs_max: largest cell size
+    :param float growth: largest ratio of the sizes of neighbouring cells
+    :param int n_fine: number of cells of size cs on each side of the
+        refinement points
+    :rtype: numpy.ndarray
+    """
+    points = np.asarray(points, dtype=float)
+    points = points[(points > z_min) & (points < z_max)]
+    if len(points) == 0:
+        points = np.r_[z_min, z_max]
+    nodes = np.unique(np.r_[z_min, points, z_max])
+
+    def target(z):
+        distance = np.abs(z[:, None] - points[None, :]).min(1)
+        return np.minimum(
+            cs_max, cs + (growth - 1.) * np.maximum(distance - n_fine*cs, 0.)
+        )
+
+    h = []
+    for a, b in zip(nodes[:-1], nodes[1:]):
+        z = np.linspace(a, b, int(np.ceil(4*(b - a)/cs)) + 2)
+        inverse = 1. / target(z)
+        s = np.r_[
+            0., np.cumsum((inverse[1:] + inverse[:-1]) / 2. * np.diff(z))
+        ]
+        n = max(int(np.ceil(s[-1] - 1e-6)), 1)
+        h.append(np.diff(np.interp(np.linspace(0., s[-1], n + 1), s, z)))
+    return np.hstack(h)
+
+
 class BaseMeshGenerator(BaseCasing):
     """
     Base Mesh Generator Class
@@ -64,6 +141,63 @@ class BaseMeshGenerator(BaseCasing):
             )
         return self._mesh
 
+    def ind_core(self):
+        """
+        cells of the core region of the mesh (all but the padding cells)
+
+        :rtype: numpy.ndarray
+        """
+        if getattr(self, '_core_ranges', None) is None:
+            raise Exception(
+                "the core region of a {} is not defined, it needs the number "
+                "of padding cells in each direction".format(
+                    type(self).__name__
+                )
+            )
+        masks = []
+        for n, (start, stop) in zip(self.mesh.vnC, self._core_ranges):
+            mask = np.zeros(n, dtype=bool)
+            mask[int(start):int(stop)] = True
+            masks.append(mask)
+        # cells are ordered x first, then y, then z
+        return np.kron(masks[2], np.kron(masks[1], masks[0])).astype(bool)
+
+    @property
+    def mirror_plane(self):
+        """
+        y (azimuth on a cylindrical mesh) of the plane through the source
+        electrodes. Sources have :code:`src_a[1] == src_b[1]`, so they are
+        mirror symmetric about this plane.
+
+        :rtype: float
+        """
+        return self.modelParameters.src_a[1]
+
+    def mirror_map(self, location, odd_components=()):
+        """
+        Mirror image of each unknown of the mesh through the
+        :code:`mirror_plane` and the sign it takes there (see
+        :func:`casingSimulations.symmetry.mirror_map`). The mesh must be
+        symmetric about the plane.
+
+        :param str location: location of the unknowns ('E', 'F', 'CC', 'N')
+        :param list odd_components: components that change sign (see
+            :code:`casingSimulations.symmetry.ODD_COMPONENTS`)
+        :rtype: tuple
+        :return: (index of the mirror image, sign)
+        """
+        locations, components = unknown_locations(self.mesh, location)
+        cylindrical = isinstance(self.mesh, discretize.CylMesh)
+        if cylindrical and self.mesh.nCy < 2:
+            raise Exception(
+                "the half domain is used on 3D meshes, an axisymmetric "
+                "mesh has no azimuth to halve"
+            )
+        return mirror_map(
+            locations, self.mirror_plane, components, odd_components,
+            cylindrical=cylindrical
+        )
+
     def copy(self):
         """
         Make a copy of the object
@@ -170,6 +304,18 @@ class TensorMeshGenerator(BaseMeshGenerator):
 
         self._x0 = value
 
+    @property
+    def mirror_plane(self):
+        """
+        y of the plane through the middle of the mesh, which the mesh is
+        mirror symmetric about. To use the half domain, the sources must be
+        on it (for sources away from y = 0, center the mesh on them by
+        setting x0).
+
+        :rtype: float
+        """
+        return self.x0[1] + self.hy.sum()/2.
+
     @property
     def domain_z(self):
         """
@@ -288,6 +434,17 @@ class TensorMeshGenerator(BaseMeshGenerator):
             ])
         return self._hz
 
+    @property
+    def _core_ranges(self):
+        """
+        (start, stop) cell indices of the core region in x, y, z
+        """
+        return [
+            (self.npadx, len(self.hx) - self.npadx),
+            (self.npady, len(self.hy) - self.npady),
+            (self.npadz, len(self.hz) - self.npadz)
+        ]
+
 
 class BaseCylMixin(properties.HasProperties):
     """
@@ -318,6 +475,26 @@ class BaseCylMixin(properties.HasProperties):
         "padding factor in the z-direction", default=1.5
     )
 
+    # graded core in the z-direction
+    csz_max = properties.Float(
+        "largest cell size of a graded core in the z-direction: cells are "
+        "csz near the casing ends, the electrodes and the surface and grow "
+        "to csz_max in between (if not set, the core is uniform)",
+        required=False
+    )
+    pfz_core = properties.Float(
+        "largest ratio of the sizes of neighbouring cells of a graded core "
+        "in the z-direction",
+        default=1.1,
+        min=1.
+    )
+    ncz_fine = properties.Integer(
+        "number of cells of size csz on each side of the refinement points "
+        "of a graded core in the z-direction",
+        default=5,
+        min=0
+    )
+
     # number of padding cells
     npadx = properties.Integer(
         "number of padding cells required to get to infinity!", default=23
@@ -337,9 +514,11 @@ class BaseCylMixin(properties.HasProperties):
         Origin of the mesh
         """
         if getattr(self, '_x0', None) is None:
-            self._x0 = np.r_[
-                0., 0., -np.sum(self.hz[:self.npadz+self.ncz-self.nca])
-            ]
+            if self.csz_max is not None:
+                z0 = self._core_z[0] - np.sum(self.hz[:self.npadz])
+            else:
+                z0 = -np.sum(self.hz[:self.npadz+self.ncz-self.nca])
+            self._x0 = np.r_[0., 0., z0]
         return self._x0
 
     @property
@@ -411,13 +590,59 @@ class BaseCylMixin(properties.HasProperties):
         """
         if getattr(self, '_hz', None) is None:
 
-            self._hz = Utils.meshTensor([
-                (self.csz, self.npadz, -self.pfz),
-                (self.csz, self.ncz),
-                (self.csz, self.npadz, self.pfz)
-            ])
+            if self.csz_max is not None:
+                hz_core = graded_tensor(
+                    self._core_z[0], self._core_z[1], self.z_refine,
+                    self.csz, self.csz_max, self.pfz_core, self.ncz_fine
+                )
+                self._hz = np.hstack([
+                    Utils.meshTensor([(hz_core[0], self.npadz, -self.pfz)]),
+                    hz_core,
+                    Utils.meshTensor([(hz_core[-1], self.npadz, self.pfz)])
+                ])
+            else:
+                self._hz = Utils.meshTensor([
+                    (self.csz, self.npadz, -self.pfz),
+                    (self.csz, self.ncz),
+                    (self.csz, self.npadz, self.pfz)
+                ])
         return self._hz
 
+    @property
+    def _core_z(self):
+        """
+        bottom and top of the core region in z (the surface, z=0, is nca
+        cells of size csz below the top)
+        """
+        return np.r_[-(self.ncz - self.nca), self.nca] * self.csz
+
+    @property
+    def z_refine(self):
+        """
+        depths a graded core is refined around: the ends of the casing, the
+        electrodes and the surface
+
+        :rtype: numpy.ndarray
+        """
+        mp = self.modelParameters
+        points = [
+            getattr(mp, 'surface_z', 0.), mp.src_a[2], mp.src_b[2]
+        ]
+        if getattr(mp, 'casing_z', None) is not None:
+            points += list(mp.casing_z)
+        return np.unique(points)
+
+    @property
+    def _core_ranges(self):
+        """
+        (start, stop) cell indices of the core region in x, y, z
+        """
+        return [
+            (0, len(self.hx) - self.npadx),
+            (0, len(self.hy)),
+            (self.npadz, len(self.hz) - self.npadz)
+        ]
+
     def create_2D_mesh(self):
         """
         create cylindrically symmetric mesh generator
@@ -506,7 +731,10 @@ class CylMeshGenerator(BaseMeshGenerator, BaseCylMixin):
 
 class CasingMeshGenerator(BaseMeshGenerator, BaseCylMixin):
     """
-    Mesh that makes sense for casing examples
+    Mesh that makes sense for casing examples. The finest radial cells
+    (csx1) resolve the casing thickness or, if the casing is upscaled
+    (:code:`casing_upscaling` of the model parameters), can be as large as
+    the casing radius.
     """
 
     # X-direction of the mesh
@@ -528,6 +756,113 @@ class CasingMeshGenerator(BaseMeshGenerator, BaseCylMixin):
         super(CasingMeshGenerator, self).__init__(**kwargs)
         self._discretizePair = discretize.CylMesh
 
+    def design(
+        self, accuracy=1e-2, pf_max=1.5, freqs=None, times=None,
+        min_cells=10, verbose=False
+    ):
+        r"""
+        Mesh with the fewest cells for a target accuracy, from the skin
+        depths (frequencies) or diffusion distances (times) :math:`\delta`
+        in the background:
+
+        - core cell size (:code:`csz` and :code:`csx2`): the second-order
+          discretization error of fields varying over :math:`\delta_{min}`
+          is :math:`(h / \delta_{min})^2`, so
+          :math:`h = \sqrt{accuracy} \, \delta_{min}`, but at least
+          :code:`min_cells` cells along the casing and the source
+          (:code:`domain_z`) and across the core
+        - core extent (:code:`domain_x`): the casing and the electrodes,
+          plus a cell
+        - padding (:code:`npadx`, :code:`npadz`, :code:`pfx2`,
+          :code:`pfz`): fields decay at least as :math:`e^{-r/\delta}` and
+          as the static field of the source, :math:`(L / r)^2` away from a
+          source of extent L, so the padding reaches
+          :math:`\min(\delta_{max} \ln(1 / accuracy), L / \sqrt{accuracy})`
+          with the fewest cells growing by at most :code:`pf_max`, and the
+          smallest padding factor that reaches it
+
+        With :code:`verbose`, the number of cells is printed next to the
+        one of this mesh.
+
+        :param float accuracy: target relative accuracy
+        :param float pf_max: largest padding factor
+        :param numpy.ndarray freqs: frequencies (default is the frequencies
+            of the model parameters)
+        :param numpy.ndarray times: times (default, if there are no
+            frequencies, is the times of the model parameters)
+        :param int min_cells: smallest number of core cells along the
+            casing and the source and across the core
+        :param bool verbose: print the designed mesh?
+        :rtype: CasingMeshGenerator
+        :return: designed mesh generator
+        """
+        mp = self.modelParameters
+        if freqs is None and times is None:
+            freqs = getattr(mp, 'freqs', None)
+            if freqs is None and getattr(mp, 'timeSteps', None) is not None:
+                times = np.cumsum(mp.timeSteps)
+        if freqs is not None:
+            delta = mp.skin_depth(f=np.asarray(freqs, dtype=float))
+        elif times is not None:
+            delta = mp.diffusion_distance(t=np.asarray(times, dtype=float))
+        else:
+            raise Exception(
+                "frequencies or times are needed to design the mesh"
+            )
+        delta_min, delta_max = np.min(delta), np.max(delta)
+
+        electrodes = np.abs(np.r_[mp.src_a[0], mp.src_b[0]])
+        source_extent = max([
+            self.domain_z, electrodes.max(),
+            getattr(mp, 'casing_b', 0.)
+        ])
+        cs = min(
+            np.sqrt(accuracy) * delta_min,
+            self.domain_z / min_cells,
+            source_extent / min_cells
+        )
+        domain_x = max(electrodes.max(), getattr(mp, 'casing_b', 0.)) + cs
+
+        distance = min(
+            delta_max * np.log(1. / accuracy),
+            source_extent / np.sqrt(accuracy)
+        )
+        npad, pf = padding_cells(cs, distance, pf_max)
+
+        designed = self.copy()
+        designed.modelParameters = mp
+        designed.domain_z = self.domain_z
+        designed.csz = cs
+        designed.csx2 = cs
+        designed.domain_x = domain_x
+        designed.npadx = npad
+        designed.npadz = npad
+        designed.pfx2 = pf
+        designed.pfz = pf
+
+        if verbose:
+            print(
+                'Designed mesh: csz = csx2 = {:1.2e} m, domain_x = {:1.2e} m,'
+                ' {} padding cells with factor {:1.3f} (to {:1.2e} m)'.format(
+                    cs, domain_x, npad, pf, distance
+                )
+            )
+            print(
+                '   nC: {} (designed) vs {} (this mesh)'.format(
+                    designed.nC, self.nC
+                )
+            )
+        return designed
+
+    @property
+    def nC(self):
+        """
+        number of cells of the mesh (without building it)
+
+        :rtype: int
+        """
+        return len(self.hx) * len(self.hy) * len(self.hz)
+
     @property
     def ncx1(self):
         """number of cells with size csx1"""
@@ -536,7 +871,29 @@ class CasingMeshGenerator(BaseMeshGenerator, BaseCylMixin):
     @property
     def npadx1(self):
         """number of padding cells to get from csx1 to csx2"""
-        return np.floor(np.log(self.csx2/self.csx1) / np.log(self.pfx1))
+        return max(
+            np.floor(np.log(self.csx2/self.csx1) / np.log(self.pfx1)), 0
+        )
+
+    @properties.validator
+    def _check_casing_resolution(self):
+        """
+        the radial cells must resolve the casing thickness, unless the casing
+        is upscaled (see :code:`casing_upscaling` of the model parameters)
+        """
+        casing_t = getattr(self.modelParameters, 'casing_t', None)
+        if (
+            casing_t is not None and
+            not self.modelParameters.casing_upscaling and
+            self.csx1 > casing_t / 2.
+        ):
+            warnings.warn(
+                "csx1 = {} does not resolve the casing thickness ({}), set "
+                "casing_upscaling on the model parameters to represent the "
+                "casing by its conductance on coarse cells".format(
+                    self.csx1, casing_t
+                )
+            )
 
     @property
     def hx(self):
@@ -55,6 +55,32 @@ def CasingCurrents(j, mesh, survey, casing_a, casing_b, casing_z):
     return ixCasing, izCasing
 
 
+def casing_currents(simulation, j):
+    """
+    Casing-current observable shared by the adaptive frequency sampling,
+    the parameter sweeps and the time-domain transforms: the radial and
+    vertical currents in the casing (see :func:`CasingCurrents`) for each
+    column of the current density
+
+    :param casingSimulations.run.BaseSimulation simulation: simulation
+    :param numpy.ndarray j: current density on the faces (one column per
+        source)
+    :rtype: numpy.ndarray
+    """
+    mesh = simulation.meshGenerator.mesh
+    modelParameters = simulation.modelParameters
+    j = np.asarray(j).reshape(mesh.nF, -1)
+    return np.hstack([
+        np.hstack([
+            Utils.mkvc(I) for I in CasingCurrents(
+                j[:, [i]], mesh, simulation.survey,
+                modelParameters.casing_a, modelParameters.casing_b,
+                modelParameters.casing_z
+            )
+        ]) for i in range(j.shape[1])
+    ])
+
+
 def plotCurrentDensity(
     mesh,
     fields_j, saveFig=False,
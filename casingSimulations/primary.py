@@ -0,0 +1,196 @@
+import numpy as np
+from scipy.constants import mu_0
+from scipy.interpolate import RegularGridInterpolator
+
+
+def _is_cylindrical(mesh):
+    return type(mesh).__name__ == 'CylMesh'
+
+
+def _grids(mesh, location):
+    """
+    locations of each component of the unknowns of a mesh ('E' or 'F'),
+    None for the components the mesh does not have
+    """
+    grids = []
+    for x in 'xyz':
+        grid = getattr(mesh, 'grid{}{}'.format(location, x), None)
+        grids.append(grid if grid is not None and len(grid) > 0 else None)
+    return grids
+
+
+def _cartesian(locations, cylindrical):
+    """
+    cartesian locations and the unit vectors of the three components of
+    the mesh at each location
+    """
+    n = len(locations)
+    if not cylindrical:
+        return locations, [np.repeat(e[None, :], n, axis=0) for e in np.eye(3)]
+    r, theta, z = locations.T
+    cos, sin = np.cos(theta), np.sin(theta)
+    return (
+        np.c_[r * cos, r * sin, z],
+        [
+            np.c_[cos, sin, np.zeros(n)],
+            np.c_[-sin, cos, np.zeros(n)],
+            np.repeat(np.r_[0., 0., 1.][None, :], n, axis=0)
+        ]
+    )
+
+
+def source_dipoles(mesh, s_e):
+    """
+    Electric dipoles equivalent to a source current density on the faces of
+    a mesh: each face carrying current is a dipole at its center, along its
+    normal, with the moment of the current in the volume of the face (the
+    current through the face times the distance between the adjacent cell
+    centers)
+
+    :param discretize.BaseMesh mesh: tensor or 3D cylindrical mesh
+    :param numpy.ndarray s_e: source current density on the faces
+    :rtype: tuple
+    :return: (dipole locations (n, 3), dipole moments (n, 3)), cartesian
+    """
+    s_e = np.asarray(s_e).ravel()
+    face_volume = mesh.aveF2CCV.T * np.hstack([mesh.vol] * mesh.dim)
+    cylindrical = _is_cylindrical(mesh)
+
+    locations, moments = [], []
+    start = 0
+    for grid in _grids(mesh, 'F'):
+        if grid is None:
+            continue
+        stop = start + len(grid)
+        ind = np.nonzero(s_e[start:stop])[0]
+        xyz, directions = _cartesian(grid[ind], cylindrical)
+        component = len(locations)
+        locations.append(xyz)
+        moments.append(
+            (s_e[start:stop] * face_volume[start:stop])[ind, None] *
+            directions[component]
+        )
+        start = stop
+    return np.vstack(locations), np.vstack(moments)
+
+
+def wholespace_fields(
+    locations, dipole_locations, moments, sigma, freq, mu=mu_0
+):
+    r"""
+    Electric and magnetic fields of electric dipoles in a conductive
+    wholespace (quasi-static, :math:`e^{i \omega t}`),
+
+    .. math::
+
+        \mathbf{E} = \frac{e^{-ikr}}{4 \pi \sigma r^3} \left[
+            \hat{\mathbf{r}} (\hat{\mathbf{r}} \cdot \mathbf{p})
+            (3 + 3ikr - k^2 r^2) + \mathbf{p} (k^2 r^2 - ikr - 1)
+        \right], \quad
+        \mathbf{H} = \frac{(1 + ikr) e^{-ikr}}{4 \pi r^2}
+            \mathbf{p} \times \hat{\mathbf{r}}
+
+    with :math:`k^2 = -i \omega \mu \sigma`. The fields at the location of a
+    dipole are singular, the contribution of a dipole to its own location
+    is left out.
+
+    :param numpy.ndarray locations: cartesian locations (n, 3)
+    :param numpy.ndarray dipole_locations: cartesian dipole locations
+    :param numpy.ndarray moments: dipole moments (A m)
+    :param float sigma: conductivity of the wholespace (S/m)
+    :param float freq: frequency (Hz)
+    :param float mu: permeability of the wholespace
+    :rtype: tuple
+    :return: (E, H), each (n, 3)
+    """
+    locations = np.atleast_2d(locations)
+    k = np.sqrt(-1j * 2*np.pi*freq * mu * sigma)
+
+    E = np.zeros(locations.shape, dtype=complex)
+    H = np.zeros(locations.shape, dtype=complex)
+    for location, p in zip(
+        np.atleast_2d(dipole_locations), np.atleast_2d(moments)
+    ):
+        dr = locations - location
+        r = np.sqrt((dr**2).sum(1))
+        far = r > 0.
+        r, rhat = r[far], dr[far] / r[far, None]
+        ikr = 1j * k * r
+        decay = np.exp(-ikr) / (4*np.pi * r**2)
+
+        E[far] += (decay / (sigma * r))[:, None] * (
+            rhat * (rhat.dot(p) * (3. + 3.*ikr + (ikr)**2))[:, None] -
+            p[None, :] * (1. + ikr + (ikr)**2)[:, None]
+        )
+        H[far] += (decay * (1. + ikr))[:, None] * np.cross(p, rhat)
+    return E, H
+
+
+def wholespace_solution(
+    mesh, location, field, s_e, sigma, freq, mu=mu_0
+):
+    """
+    Analytic wholespace solution on the unknowns of a mesh, for the source
+    current density s_e on its faces (see :func:`source_dipoles`)
+
+    :param discretize.BaseMesh mesh: tensor or 3D cylindrical mesh
+    :param str location: location of the unknowns ('E' or 'F')
+    :param str field: field the unknowns are ('e', 'h', 'b' or 'j')
+    :param numpy.ndarray s_e: source current density on the faces
+    :param float sigma: conductivity of the wholespace (S/m)
+    :param float freq: frequency (Hz)
+    :param float mu: permeability of the wholespace
+    :rtype: numpy.ndarray
+    """
+    dipole_locations, moments = source_dipoles(mesh, s_e)
+    cylindrical = _is_cylindrical(mesh)
+
+    u = []
+    for component, grid in enumerate(_grids(mesh, location)):
+        if grid is None:
+            continue
+        xyz, directions = _cartesian(grid, cylindrical)
+        E, H = wholespace_fields(
+            xyz, dipole_locations, moments, sigma, freq, mu
+        )
+        vector = {'e': E, 'j': sigma * E, 'h': H, 'b': mu * H}[field]
+        u.append((vector * directions[component]).sum(1))
+    return np.hstack(u)
+
+
+def axisymmetric_to_3D(mesh2D, mesh3D, u, location):
+    """
+    Values of an axisymmetric solution on a cylindrically symmetric mesh
+    at the unknowns of a 3D cylindrical mesh: each (r, theta, z) component
+    is interpolated (linearly in r and z) to the 3D locations, components
+    the symmetric mesh does not have are zero.
+
+    :param discretize.CylMesh mesh2D: cylindrically symmetric mesh
+    :param discretize.CylMesh mesh3D: 3D cylindrical mesh
+    :param numpy.ndarray u: solution on mesh2D (vector or array with a
+        column per source)
+    :param str location: location of the unknowns ('E' or 'F')
+    :rtype: numpy.ndarray
+    """
+    u = np.asarray(u)
+    u = u.reshape(u.shape[0], -1)
+
+    u3D, start = [], 0
+    for grid2D, grid3D in zip(_grids(mesh2D, location),
+                              _grids(mesh3D, location)):
+        if grid3D is None:
+            if grid2D is not None:
+                start += len(grid2D)
+            continue
+        if grid2D is None:
+            u3D.append(np.zeros((len(grid3D), u.shape[1]), dtype=u.dtype))
+            continue
+        stop = start + len(grid2D)
+        r, z = np.unique(grid2D[:, 0]), np.unique(grid2D[:, 2])
+        values = u[start:stop].reshape(len(r), len(z), -1, order='F')
+        interpolant = RegularGridInterpolator(
+            (r, z), values, bounds_error=False, fill_value=None
+        )
+        u3D.append(interpolant(grid3D[:, [0, 2]]))
+        start = stop
+    return np.vstack(u3D)
@@ -1,8 +1,11 @@
 import time
+import functools
 import numpy as np
 import scipy.sparse as sp
 import os
 import json
+import multiprocessing
+import warnings
 from scipy.constants import mu_0
 
 import discretize
@@ -12,25 +15,73 @@ from SimPEG.EM import FDEM, TDEM
 from SimPEG import Utils, Maps
 from SimPEG.EM.Static import DC
 
-try:
-    from pymatsolver import Pardiso as Solver
-except ImportError:
-    import warnings
-    warnings.warn(
-        "Could not import Pardiso, falling back to LU. Will be slow."
-    )
-    from SimPEG import SolverLU as Solver
-
 from .base import LoadableInstance, BaseCasing
 from . import model
 from .model import PhysicalProperties
 from .mesh import BaseMeshGenerator, CylMeshGenerator, TensorMeshGenerator
 from .sources import BaseCasingSrc
+from .solvers import (
+    MATRIX_TYPES, SolverStats, SweepSolver, ThreadLimits, get_solver,
+    worker_threads
+)
+from .krylov import MultiShiftSolver, ReducedOrderModel, affine_split
+from .lowrank import WoodburySolver, changed_unknowns
+from .condensation import PaddingCondensation
+from .azimuthal import (
+    AzimuthalModeSolver, azimuthal_indices, unknown_locations
+)
+from .symmetry import MirrorSymmetricSolver, ODD_COMPONENTS
+from .primary import axisymmetric_to_3D, wholespace_solution
+from . import transforms
+from .timesteps import predict_cost
 from .utils import writeSimulationPy
 from . import sources
 from .info import __version__
 
 
+def _solve_frequencies(args):
+    """
+    Worker for the parallel frequency sweep: re-build the simulation from its
+    serialized parameters for a subset of the frequencies and solve it.
+
+    :param tuple args: (serialized simulation, frequencies to solve)
+    :rtype: tuple
+    :return: (solution with a column per frequency, solver stats summary)
+    """
+    jsondict, freqs = args
+    jsondict = dict(jsondict, num_workers=1)
+    jsondict['modelParameters'] = dict(
+        jsondict['modelParameters'], freqs=list(freqs)
+    )
+
+    sim = properties.HasProperties.deserialize(jsondict, trusted=True)
+    with ThreadLimits(sim.num_threads):
+        fields = sim._compute_fields(sim.physprops.model)
+    return (
+        fields[:, '{}Solution'.format(sim.formulation)],
+        sim.solver_stats.summary
+    )
+
+
+def _solve_shifts(args):
+    """
+    Worker for the parallel frequency-to-time transform: re-build the
+    simulation from its serialized parameters and evaluate the observable at
+    a subset of the Laplace-domain shifts.
+
+    :param tuple args: (serialized simulation, shifts, observable)
+    :rtype: tuple
+    :return: (observable at each shift, solver stats summary)
+    """
+    jsondict, shifts, observable = args
+    jsondict = dict(jsondict, num_workers=1)
+
+    sim = properties.HasProperties.deserialize(jsondict, trusted=True)
+    with ThreadLimits(sim.num_threads):
+        values = sim._solve_shifts_direct(shifts, observable)
+    return values, sim.solver_stats.summary
+
+
 class BaseSimulation(BaseCasing):
     """
     Base class wrapper to run an EM Forward Simulation
@@ -47,8 +98,41 @@ class BaseSimulation(BaseCasing):
     )
 
     num_threads = properties.Integer(
-        "number of threads",
-        default=1
+        "maximum number of threads used by the solver and BLAS during the "
+        "run, in each process (if not set, the thread pools are left as "
+        "they are and worker processes share the cores)",
+        required=False,
+        min=1
+    )
+
+    thread_counts = properties.Dictionary(
+        "effective number of threads of the solver and BLAS thread pools "
+        "during the run",
+        required=False
+    )
+
+    solver = properties.String(
+        "name of the solver backend (see casingSimulations.solvers). "
+        "'default' is Pardiso if pymatsolver is installed and SuperLU "
+        "otherwise, 'auto' chooses one from the size and type of the system "
+        "and the available memory, 'iterative' uses a preconditioned Krylov "
+        "method",
+        default="default"
+    )
+
+    solver_opts = properties.Dictionary(
+        "options passed to the solver backend (for the iterative solver: "
+        "method, preconditioner, tol, maxiter, log_residuals, ...)",
+        default={}
+    )
+
+    matrix_type = properties.StringChoice(
+        "type of the system matrix passed to the solver so it can use a "
+        "symmetric or Cholesky factorization ['auto', 'general', "
+        "'symmetric', 'hermitian', 'spd']. 'auto' uses the known type of the "
+        "formulation ('general' if it is not known)",
+        default="general",
+        choices=MATRIX_TYPES
     )
 
     modelParameters = LoadableInstance(
@@ -89,6 +173,10 @@ class BaseSimulation(BaseCasing):
             self.src.modelParameters = self.modelParameters
             self.src.meshGenerator = self.meshGenerator
 
+    # matrix types of the system matrices of each formulation, known ahead of
+    # time so that no matrix has to be checked for symmetry
+    _formulation_matrix_types = {}
+
     @property
     def physprops(self):
         if getattr(self, '_physprops', None) is None:
@@ -101,6 +189,57 @@ class BaseSimulation(BaseCasing):
     def prob(self):
         return self._prob
 
+    @properties.validator('solver')
+    def _check_solver(self, change):
+        get_solver(change['value'])
+
+    @property
+    def Solver(self):
+        """
+        solver backend class
+
+        :rtype: casingSimulations.solvers.BaseSolver
+        """
+        return get_solver(self.solver)
+
+    @property
+    def solverOpts(self):
+        """
+        keyword arguments the SimPEG problem passes to the solver
+
+        :rtype: dict
+        """
+        opts = dict(self.solver_opts, stats=self.solver_stats)
+        opts.setdefault('matrix_type', self.system_matrix_type)
+        if self.solver == 'iterative':
+            opts.setdefault('verbose', self.verbose)
+        return opts
+
+    @property
+    def system_matrix_type(self):
+        """
+        type of the system matrix given to the solver
+
+        :rtype: str
+        """
+        if self.matrix_type != 'auto':
+            return self.matrix_type
+        return self._formulation_matrix_types.get(
+            getattr(self, 'formulation', None), 'general'
+        )
+
+    @property
+    def solver_stats(self):
+        """
+        counters of the analyses, factorizations and solves done during the
+        simulation
+
+        :rtype: casingSimulations.solvers.SolverStats
+        """
+        if getattr(self, '_solver_stats', None) is None:
+            self._solver_stats = SolverStats()
+        return self._solver_stats
+
     @property
     def survey(self):
         return self._survey
@@ -138,9 +277,112 @@ class BaseSimulation(BaseCasing):
             self._fields = self.run()
         return self._fields
 
+    def _compute_fields(self, m):
+        """
+        compute the fields for the model m with the SimPEG problem
+        """
+        return self.prob.fields(m)
+
+    def _wrapped_solver(self):
+        """
+        Solver backend and options for the solvers that wrap the backend
+        (multi-shift, azimuthal modes, half domain) and have a tol or maxiter
+        of their own: a tol or maxiter in the solver options are options of
+        the backend (e.g. the iterative solver) and are bound to it, so they
+        do not clash with those of the wrapper.
+
+        :rtype: tuple
+        :return: (solver backend, options for the wrapper)
+        """
+        solverOpts = dict(self.prob.solverOpts)
+        solverOpts.pop('verbose', None)
+        backendOpts = {
+            key: solverOpts.pop(key) for key in ['tol', 'maxiter']
+            if key in solverOpts
+        }
+        Solver = self.prob.Solver
+        if backendOpts:
+            Solver = functools.partial(Solver, **backendOpts)
+        return Solver, solverOpts
+
+    def _azimuthal_mode_solver(self, A, location):
+        """
+        solver of the system A that separates the azimuthal modes of a 3D
+        cylindrical mesh (see
+        :class:`casingSimulations.azimuthal.AzimuthalModeSolver`)
+
+        :param scipy.sparse.spmatrix A: system matrix
+        :param str location: location of the unknowns ('E', 'F', 'CC', 'N')
+        :rtype: casingSimulations.azimuthal.AzimuthalModeSolver
+        """
+        mesh = self.meshGenerator.mesh
+        if not isinstance(mesh, discretize.CylMesh) or mesh.nCy < 2:
+            raise Exception(
+                "azimuthal modes are separated on 3D cylindrical meshes"
+            )
+        if not np.allclose(mesh.hy, mesh.hy[0]):
+            raise Exception(
+                "azimuthal modes are separated on meshes with uniform "
+                "azimuthal cells"
+            )
+        if getattr(self, '_azimuthal_indices', None) is None:
+            locations, components = unknown_locations(mesh, location)
+            self._azimuthal_indices = azimuthal_indices(
+                locations, mesh.nCy, components
+            )
+        Solver, solverOpts = self._wrapped_solver()
+        return AzimuthalModeSolver(
+            A, *self._azimuthal_indices, Solver=Solver,
+            num_workers=getattr(self, 'num_workers', 1),
+            num_threads=self.num_threads, **solverOpts
+        )
+
+    def _mirror_solver(self, A, location):
+        """
+        solver of the system A on half of the domain, for a model and a
+        source that are mirror symmetric about the plane through the source
+        electrodes (see
+        :class:`casingSimulations.symmetry.MirrorSymmetricSolver`)
+
+        :param scipy.sparse.spmatrix A: system matrix
+        :param str location: location of the unknowns ('E', 'F', 'CC', 'N')
+        :rtype: casingSimulations.symmetry.MirrorSymmetricSolver
+        """
+        if getattr(self, '_mirror_map', None) is None:
+            self._mirror_map = self.meshGenerator.mirror_map(
+                location, ODD_COMPONENTS[self.formulation]
+            )
+        Solver, solverOpts = self._wrapped_solver()
+        return MirrorSymmetricSolver(
+            A, *self._mirror_map, Solver=Solver, **solverOpts
+        )
+
+    @property
+    def _saves_solution(self):
+        """
+        does the simulation compute and save its solution itself (with
+        :code:`_compute_solution`) rather than through the SimPEG fields?
+        """
+        return False
+
+    def compute_fields(self):
+        """
+        Compute the fields for the model of the simulation without saving
+        them
+
+        :rtype: SimPEG.Fields
+        """
+        with ThreadLimits(self.num_threads):
+            self.solver_stats.reset()
+            return self._compute_fields(self.physprops.model)
+
     def run(self):
         """
         Run the forward simulation
+
+        :return: fields (for TDEM simulations streaming their solution to
+            disk or storing it at output times only, a
+            :class:`TimeSolution`, indexed like the solution of the fields)
         """
 
         # ----------------- Validate Parameters ----------------- #
@@ -157,25 +399,39 @@ class BaseSimulation(BaseCasing):
             sim_mesh.nC
         ))
 
-        # save simulation parameters
-        self.save()
+        # limit the threads used by the solver and BLAS for the run
+        with ThreadLimits(self.num_threads) as thread_limits:
+            self.thread_counts = thread_limits.thread_counts
+            print('      threads: {}'.format(self.thread_counts))
 
-        # ----------------- Set up the simulation ----------------- #
-        physprops = self.physprops
-        prb = self.prob
-        # survey = self.survey
-        # prb.pair(survey)
+            # save simulation parameters
+            self.save()
 
-        # ----------------- Run the the simulation ----------------- #
-        print('Starting {}'.format(type(self).__name__))
-        t = time.time()
-        print('Using {} Solver'.format(prb.Solver))
-        fields = prb.fields(physprops.model)
-        np.save(
-            '/'.join([self.directory, self.fields_filename]),
-            fields[:, '{}Solution'.format(self.formulation)]
-        )
-        print('   ... Done. Elapsed time : {}'.format(time.time()-t))
+            # ----------------- Set up the simulation ----------------- #
+            physprops = self.physprops
+            prb = self.prob
+            # survey = self.survey
+            # prb.pair(survey)
+
+            # ----------------- Run the the simulation ----------------- #
+            print('Starting {}'.format(type(self).__name__))
+            t = time.time()
+            print('Using {} Solver'.format(self.solver))
+            self.solver_stats.reset()
+            fields_filename = '/'.join([self.directory, self.fields_filename])
+            if self._saves_solution:
+                # the simulation writes (a subset of) its solution itself
+                fields = self._compute_solution(
+                    physprops.model, fields_filename
+                )
+            else:
+                fields = self._compute_fields(physprops.model)
+                np.save(
+                    fields_filename,
+                    fields[:, '{}Solution'.format(self.formulation)]
+                )
+            print('   ... Done. Elapsed time : {}'.format(time.time()-t))
+            print(self.solver_stats)
 
         self._fields = fields
         return fields
@@ -194,8 +450,108 @@ class SimulationFDEM(BaseSimulation):
         choices=["e", "b", "h", "j"]
     )
 
+    reuse_analysis = properties.Bool(
+        "re-use the reordering and symbolic analysis of the system matrix "
+        "across frequencies (frequency-sweep mode)? Only the solver "
+        "backends that can re-factor (pardiso, cholmod) re-use it",
+        default=False
+    )
+
+    num_workers = properties.Integer(
+        "number of worker processes the frequencies are split across",
+        default=1,
+        min=1
+    )
+
+    multishift = properties.Bool(
+        "solve all the frequencies at once with a multi-shift Krylov method "
+        "(one factorization, one Krylov space)?",
+        default=False
+    )
+
+    krylov_tol = properties.Float(
+        "relative residual the multi-shift Krylov solve converges to",
+        default=1e-8,
+        min=0.
+    )
+
+    krylov_maxiter = properties.Integer(
+        "maximum number of iterations of the multi-shift Krylov solve",
+        default=500,
+        min=1
+    )
+
+    reduced_order = properties.Bool(
+        "evaluate the fields from a rational Krylov reduced-order model "
+        "built from a few full solves at adaptively chosen frequencies?",
+        default=False
+    )
+
+    rom_tol = properties.Float(
+        "error estimate (relative residual) the reduced-order model must "
+        "reach at every frequency",
+        default=1e-6,
+        min=0.
+    )
+
+    rom_max_solves = properties.Integer(
+        "maximum number of full solves used to build the reduced-order model",
+        default=20,
+        min=2
+    )
+
+    azimuthal_modes = properties.Bool(
+        "on a 3D cylindrical mesh with an axisymmetric model, solve each "
+        "azimuthal Fourier mode of the source as an independent 2D-sized "
+        "system (on num_workers processes)?",
+        default=False
+    )
+
+    primary = properties.StringChoice(
+        "solve for the secondary field of a primary computed cheaply: "
+        "'wholespace' (analytic field of the source in a wholespace of the "
+        "background properties) or 'axisymmetric' (2D run on the "
+        "cylindrically symmetric version of the mesh)",
+        choices=["wholespace", "axisymmetric"],
+        required=False
+    )
+
+    half_domain = properties.Bool(
+        "for a model that is mirror symmetric about the plane through the "
+        "source electrodes, solve on half of the domain (with symmetry "
+        "conditions on the plane) and mirror the fields back?",
+        default=False
+    )
+
+    condense_padding = properties.Bool(
+        "eliminate the padding of the mesh into a boundary operator (stored "
+        "in the simulation directory, once per mesh, background model and "
+        "frequency) and solve only the core region?",
+        default=False
+    )
+
+    padding_extension = properties.Bool(
+        "with condense_padding, keep the extension of the solution to the "
+        "padding (n_padding x n_boundary values per frequency)? Otherwise "
+        "the fields are zero in the padding",
+        default=False
+    )
+
+    padding_filename = properties.String(
+        "file name of the boundary operator of the padding at each "
+        "frequency (formatted with the frequency)",
+        default="padding_{:g}Hz.npz"
+    )
+
     physics = "FDEM"
 
+    # curl-curl + i omega mass matrix: complex symmetric (SimPEG symmetrizes
+    # the b and j systems)
+    _formulation_matrix_types = {
+        'e': 'symmetric', 'h': 'symmetric', 'b': 'symmetric',
+        'j': 'symmetric'
+    }
+
     def __init__(self, **kwargs):
         super(SimulationFDEM, self).__init__(**kwargs)
 
@@ -205,9 +561,10 @@ class SimulationFDEM(BaseSimulation):
                 self.meshGenerator.mesh,
                 sigmaMap=self.physprops.wires.sigma,
                 muMap=self.physprops.wires.mu,
-                Solver=Solver,
+                Solver=self.Solver,
                 verbose=self.verbose
             )
+        self._prob.solverOpts = self.solverOpts
 
         if getattr(self.src, "physics", None) is None:
             self.src.physics = "FDEM"
@@ -216,6 +573,880 @@ class SimulationFDEM(BaseSimulation):
 
         self._prob.pair(self._survey)
 
+    @properties.validator
+    def _check_condense_padding(self):
+        """
+        the padding can only be condensed on meshes with a core region
+        """
+        if (
+            self.condense_padding and
+            getattr(self.meshGenerator, '_core_ranges', None) is None
+        ):
+            raise Exception(
+                "condense_padding needs the core region of the mesh, which "
+                "a {} does not define. Use a TensorMeshGenerator or a "
+                "cylindrical mesh generator".format(
+                    type(self.meshGenerator).__name__
+                )
+            )
+
+    @properties.validator
+    def _check_solution_modes(self):
+        """
+        the ways of solving the system do not compose, at most one of them
+        can be chosen
+        """
+        self._solution_modes()
+
+    def _solution_modes(self):
+        """
+        ways of solving the system that are chosen, raising if they can not
+        be combined. With num_workers > 1, the frequencies are split across
+        processes that each use the frequency mode (reuse_analysis,
+        multishift or reduced_order), or the azimuthal modes are solved in
+        parallel; the other modes solve in one process.
+
+        :rtype: list
+        """
+        modes = [
+            name for name in [
+                'azimuthal_modes', 'half_domain', 'condense_padding',
+                'reuse_analysis', 'multishift', 'reduced_order'
+            ] if getattr(self, name)
+        ]
+        if self.primary is not None:
+            modes.append('primary')
+        if len(modes) > 1:
+            raise Exception(
+                "{} can not be combined, choose one of them".format(
+                    ', '.join(modes)
+                )
+            )
+        if self.num_workers > 1 and any([
+            mode in modes
+            for mode in ['half_domain', 'condense_padding', 'primary']
+        ]):
+            raise Exception(
+                "{} solves in one process, set num_workers to 1".format(
+                    modes[0]
+                )
+            )
+        return modes
+
+    def simulation_at(self, freqs):
+        """
+        Copy of the simulation at other frequencies. The mesh generator (and
+        its mesh) is shared with this simulation.
+
+        :param list freqs: frequencies
+        :rtype: SimulationFDEM
+        """
+        modelParameters = self.modelParameters.copy()
+        modelParameters.freqs = np.array(freqs, dtype=float)
+
+        kwargs = {
+            key: getattr(self, key) for key in self._props
+            if key not in ['modelParameters', 'meshGenerator', 'src'] and
+            getattr(self, key) is not None
+        }
+        simulation = self.__class__(
+            modelParameters=modelParameters,
+            meshGenerator=self.meshGenerator,
+            src=self.src.copy(),
+            **kwargs
+        )
+        # the mesh generator is shared, keep it attached to these parameters
+        self.meshGenerator.modelParameters = self.modelParameters
+        return simulation
+
+    def _compute_fields(self, m):
+        """
+        compute the fields for the model m. If :code:`num_workers > 1`, the
+        frequencies are split across a pool of worker processes. In
+        frequency-sweep mode (:code:`reuse_analysis=True`), the system matrix
+        is analyzed once and only numerically re-factored at each frequency.
+        With :code:`multishift=True`, all the frequencies are solved together
+        in one Krylov space, and with :code:`reduced_order=True` they are
+        evaluated from a reduced-order model. With
+        :code:`condense_padding=True`, the padding is eliminated into a
+        boundary operator stored on disk, with
+        :code:`azimuthal_modes=True` the azimuthal modes are solved
+        separately, and with :code:`half_domain=True` the system is solved
+        on the half of the domain on one side of the plane of the source.
+        With a :code:`primary`, only the secondary field is solved for. If
+        low-rank update solvers
+        are attached (:code:`update_solvers`, see
+        :meth:`casing_update_solvers`), the systems are solved as updates of
+        the factored reference system.
+        """
+        self._solution_modes()
+        if getattr(self, 'update_solvers', None) is not None:
+            return self._compute_fields_update(m)
+        if self.azimuthal_modes:
+            return self._compute_fields_azimuthal(m)
+        if self.primary is not None:
+            return self._compute_fields_secondary(m)
+        if self.half_domain:
+            return self._compute_fields_half(m)
+        if self.condense_padding:
+            return self._compute_fields_condensed(m)
+        if self.num_workers > 1 and len(self.survey.freqs) > 1:
+            return self._compute_fields_parallel(m)
+        if self.reduced_order and len(self.survey.freqs) > 1:
+            return self._compute_fields_reduced(m)
+        if self.multishift and len(self.survey.freqs) > 1:
+            return self._compute_fields_multishift(m)
+        if self.reuse_analysis:
+            return self._compute_fields_sweep(m)
+        return super(SimulationFDEM, self)._compute_fields(m)
+
+    def _compute_fields_sweep(self, m):
+        """
+        frequency sweep that re-uses the analysis of the system matrix
+        """
+        prb = self.prob
+        prb.model = m
+
+        F = prb.fieldsPair(self.meshGenerator.mesh, self.survey)
+        Ainv = SweepSolver(Solver=prb.Solver, **prb.solverOpts)
+
+        for freq in self.survey.freqs:
+            if self.verbose:
+                print('   solving {} Hz'.format(freq))
+            Ainv.factor(prb.getA(freq))
+            u = Ainv * prb.getRHS(freq)
+            Srcs = self.survey.getSrcByFreq(freq)
+            F[Srcs, '{}Solution'.format(self.formulation)] = u
+
+        Ainv.clean()
+
+        print(
+            '   frequency sweep: {} analyses, {} numeric factorizations for '
+            '{} frequencies'.format(
+                self.solver_stats.n_analysis,
+                self.solver_stats.n_factorization,
+                len(self.survey.freqs)
+            )
+        )
+        return F
+
+    def casing_update_solvers(self, stats=None):
+        """
+        Factor the system of this simulation (the reference) at each
+        frequency, ready to solve models that differ from it only by the
+        casing properties (:code:`sigma_casing`, :code:`mur_casing`,
+        :code:`sigma_inside`) with a low-rank update (see
+        :class:`casingSimulations.lowrank.WoodburySolver`). The unknowns of
+        the update are the ones whose rows of the system matrix depend on
+        the properties of the cells the casing (partly) fills, which
+        includes the cut and upscaled cells next to the casing. Attach the solvers to a
+        simulation with another casing as :code:`update_solvers` to use them.
+
+        :param casingSimulations.solvers.SolverStats stats: counters to
+            update with the work done by the solvers (default is the solver
+            stats of this simulation)
+        :rtype: dict
+        :return: update solvers keyed by frequency
+        """
+        modelParameters = self.modelParameters
+        if not isinstance(modelParameters, model.BaseCasingParametersMixin):
+            raise Exception(
+                "low-rank updates of the casing need a model with a casing, "
+                "not {}".format(type(modelParameters).__name__)
+            )
+        mesh = self.meshGenerator.mesh
+        ind_cells = modelParameters.ind_casing_cells(mesh)
+
+        prb = self.prob
+        m = self.physprops.model
+        solverOpts = dict(prb.solverOpts)
+        if stats is not None:
+            solverOpts['stats'] = stats
+
+        solvers = {}
+        for freq in self.survey.freqs:
+            ind = self._unknowns_coupled_to(ind_cells, m, freq)
+            A = prb.getA(freq)
+            solvers[freq] = WoodburySolver(
+                A, ind, Solver=prb.Solver, **solverOpts
+            )
+            print(
+                '   low-rank update at {} Hz: {} of {} unknowns'.format(
+                    freq, len(ind), A.shape[0]
+                )
+            )
+        return solvers
+
+    def _unknowns_coupled_to(self, ind_cells, m, freq):
+        """
+        unknowns whose rows of the system matrix depend on the properties
+        of the cells provided (found by perturbing them). The model of the
+        problem is left at m.
+        """
+        prb = self.prob
+        m_perturbed = m.copy()
+        m_perturbed[np.hstack([ind_cells, ind_cells])] *= 2.
+
+        prb.model = m_perturbed
+        A_perturbed = prb.getA(freq)
+        prb.model = m
+        return changed_unknowns(prb.getA(freq), A_perturbed)
+
+    def _compute_fields_update(self, m):
+        """
+        solve each frequency as a low-rank update of the factored reference
+        system (see :meth:`casing_update_solvers`)
+        """
+        prb = self.prob
+        prb.model = m
+
+        F = prb.fieldsPair(self.meshGenerator.mesh, self.survey)
+        for freq in self.survey.freqs:
+            u = self.update_solvers[freq].solve(
+                prb.getA(freq), prb.getRHS(freq)
+            )
+            Srcs = self.survey.getSrcByFreq(freq)
+            F[Srcs, '{}Solution'.format(self.formulation)] = u
+        return F
+
+    def _compute_fields_azimuthal(self, m):
+        """
+        solve each frequency as independent systems for the azimuthal modes
+        of the source (see
+        :class:`casingSimulations.azimuthal.AzimuthalModeSolver`)
+        """
+        prb = self.prob
+        prb.model = m
+        location = 'E' if self.formulation in ['e', 'h'] else 'F'
+
+        F = prb.fieldsPair(self.meshGenerator.mesh, self.survey)
+        for freq in self.survey.freqs:
+            Ainv = self._azimuthal_mode_solver(prb.getA(freq), location)
+            u = Ainv.solve(prb.getRHS(freq))
+            if self.verbose:
+                print(
+                    '   {} Hz: solved {} of {} azimuthal modes'.format(
+                        freq, len(Ainv.modes), Ainv.n_theta
+                    )
+                )
+            Srcs = self.survey.getSrcByFreq(freq)
+            F[Srcs, '{}Solution'.format(self.formulation)] = u
+        return F
+
+    def _compute_fields_half(self, m):
+        """
+        solve each frequency on half of the domain and mirror the solution
+        back (see :class:`casingSimulations.symmetry.MirrorSymmetricSolver`)
+        """
+        prb = self.prob
+        prb.model = m
+        location = 'E' if self.formulation in ['e', 'h'] else 'F'
+
+        F = prb.fieldsPair(self.meshGenerator.mesh, self.survey)
+        for freq in self.survey.freqs:
+            Ainv = self._mirror_solver(prb.getA(freq), location)
+            u = Ainv.solve(prb.getRHS(freq))
+            if self.verbose:
+                print(
+                    '   {} Hz: solved {} of {} unknowns on the half '
+                    'domain'.format(freq, Ainv.n_half, len(Ainv.mirror))
+                )
+            Ainv.clean()
+            Srcs = self.survey.getSrcByFreq(freq)
+            F[Srcs, '{}Solution'.format(self.formulation)] = u
+        return F
+
+    def primary_solution(self):
+        """
+        Primary model, source and solution of the secondary-field solve.
+        The 'wholespace' primary is the analytic field of the source (its
+        face currents taken as dipoles, see
+        :func:`casingSimulations.primary.wholespace_solution`) in a
+        wholespace of the background properties. The 'axisymmetric' primary
+        is a run of the simulation on the cylindrically symmetric version of
+        the mesh (:code:`create_2D_mesh`), with the model and the source
+        (there, the axisymmetric version of the source) of the simulation,
+        interpolated to the 3D mesh.
+
+        :rtype: tuple
+        :return: (primary model, primary source current density on the
+            faces, primary solution at each frequency)
+        """
+        if getattr(self, '_primary_solution', None) is not None:
+            return self._primary_solution
+
+        mesh = self.meshGenerator.mesh
+        location = 'E' if self.formulation in ['e', 'h'] else 'F'
+        t = time.time()
+        print('Computing the {} primary'.format(self.primary))
+
+        if self.primary == 'wholespace':
+            background = model.Wholespace(
+                sigma_back=self.modelParameters.sigma_back,
+                mur_back=self.modelParameters.mur_back
+            )
+            m_p = PhysicalProperties(self.meshGenerator, background).model
+            s_e = self.src.s_e
+            u_p = {
+                freq: wholespace_solution(
+                    mesh, location, self.formulation, s_e,
+                    background.sigma_back, freq,
+                    mu_0 * background.mur_back
+                ) for freq in self.survey.freqs
+            }
+
+        elif self.primary == 'axisymmetric':
+            if not hasattr(self.meshGenerator, 'create_2D_mesh'):
+                raise Exception(
+                    "the axisymmetric primary needs a cylindrical mesh "
+                    "generator"
+                )
+            kwargs = {
+                key: getattr(self, key) for key in [
+                    'formulation', 'solver', 'solver_opts', 'matrix_type',
+                    'verbose', 'directory'
+                ]
+            }
+            sim2D = self.__class__(
+                modelParameters=self.modelParameters,
+                meshGenerator=self.meshGenerator.create_2D_mesh(),
+                src=self.src.copy(),
+                **kwargs
+            )
+            fields2D = sim2D.compute_fields()
+            mesh2D = sim2D.meshGenerator.mesh
+
+            m_p = self.physprops.model
+            s_e = axisymmetric_to_3D(mesh2D, mesh, sim2D.src.s_e, 'F')
+            u_p = {
+                freq: axisymmetric_to_3D(
+                    mesh2D, mesh, fields2D[
+                        sim2D.survey.getSrcByFreq(freq)[0],
+                        '{}Solution'.format(self.formulation)
+                    ], location
+                ) for freq in self.survey.freqs
+            }
+
+        print('   ... Done. Elapsed time : {}'.format(time.time()-t))
+        self._primary_solution = (m_p, np.ravel(s_e), u_p)
+        return self._primary_solution
+
+    def _compute_fields_secondary(self, m):
+        r"""
+        solve for the secondary field of the primary. With the primary model
+        :math:`m_p`, whose solution for the primary source is :math:`u_p`,
+        the secondary field solves
+
+        .. math::
+
+            A(m) u_s = b(m) - b_p(m_p) - (A(m) - A(m_p)) u_p
+
+        which, if :math:`A(m_p) u_p = b_p(m_p)`, is the total-field system
+        for :math:`u = u_p + u_s`. The primary is accurate where the mesh is
+        too coarse for the total field (near the source, far away), so only
+        the secondary field, which is smoother, needs to be resolved.
+        """
+        m_p, s_e, u_p = self.primary_solution()
+
+        prb = self.prob
+        prb_p = getattr(FDEM, 'Problem3D_{}'.format(self.formulation))(
+            self.meshGenerator.mesh,
+            sigmaMap=self.physprops.wires.sigma,
+            muMap=self.physprops.wires.mu
+        )
+        prb_p.pair(FDEM.Survey([
+            FDEM.Src.RawVec_e([], freq, s_e.astype(complex))
+            for freq in self.survey.freqs
+        ]))
+        prb_p.model = m_p
+        prb.model = m
+
+        F = prb.fieldsPair(self.meshGenerator.mesh, self.survey)
+        for freq in self.survey.freqs:
+            Srcs = self.survey.getSrcByFreq(freq)
+            u_p_freq = np.repeat(
+                np.asarray(u_p[freq]).reshape(-1, 1), len(Srcs), axis=1
+            )
+            A = prb.getA(freq)
+            rhs = (
+                prb.getRHS(freq) - prb_p.getRHS(freq) -
+                (A - prb_p.getA(freq)) * u_p_freq
+            )
+            Ainv = prb.Solver(A, **prb.solverOpts)
+            u_s = np.asarray(Ainv * rhs).reshape(u_p_freq.shape)
+            Ainv.clean()
+            F[Srcs, '{}Solution'.format(self.formulation)] = u_p_freq + u_s
+        return F
+
+    def _compute_fields_condensed(self, m):
+        """
+        solve each frequency on the core of the mesh, with the padding
+        condensed into a boundary operator (see
+        :class:`casingSimulations.condensation.PaddingCondensation`). The
+        operator is loaded from the simulation directory if it was stored
+        for the same padding system, otherwise it is computed and stored.
+        """
+        prb = self.prob
+        prb.model = m
+        ind_core = self.meshGenerator.ind_core()
+
+        F = prb.fieldsPair(self.meshGenerator.mesh, self.survey)
+        for freq in self.survey.freqs:
+            A = prb.getA(freq)
+            filename = '/'.join([
+                self.directory, self.padding_filename.format(freq)
+            ])
+
+            condensation = None
+            if os.path.isfile(filename):
+                condensation = PaddingCondensation.load(
+                    filename, Solver=prb.Solver, **prb.solverOpts
+                )
+                if not condensation.matches(A):
+                    print(
+                        '   the padding of {} differs, condensing it '
+                        'again'.format(filename)
+                    )
+                    condensation = None
+                elif self.padding_extension and condensation.X is None:
+                    # stored without the extension
+                    condensation = None
+
+            if condensation is None:
+                condensation = PaddingCondensation(
+                    A, self._unknowns_coupled_to(ind_core, m, freq),
+                    Solver=prb.Solver,
+                    store_extension=self.padding_extension, **prb.solverOpts
+                )
+                condensation.save(filename)
+
+            if self.verbose:
+                print(
+                    '   {} Hz: {} core unknowns ({} on the boundary) of '
+                    '{}'.format(
+                        freq, len(condensation.ind_core),
+                        len(condensation.ind_boundary), A.shape[0]
+                    )
+                )
+            u = condensation.solve(A, prb.getRHS(freq))
+            Srcs = self.survey.getSrcByFreq(freq)
+            F[Srcs, '{}Solution'.format(self.formulation)] = u
+        return F
+
+    def _affine_system(self, freqs):
+        """
+        split the system matrix and right hand side into the parts that are
+        independent of and proportional to :math:`s = i\omega`:
+        :math:`A(s) = K + s M`, :math:`b(s) = b_0 + s b_1`. They are found
+        from the lowest and highest frequencies and checked against the right
+        hand sides at the others.
+
+        :param list freqs: sorted frequencies (at least two)
+        :rtype: tuple
+        :return: (K, M, b_0, b_1)
+        """
+        prb = self.prob
+        freq_a, freq_b = freqs[0], freqs[-1]
+        s_a, s_b = 2j*np.pi*freq_a, 2j*np.pi*freq_b
+
+        K, M = affine_split(prb.getA(freq_a), prb.getA(freq_b), s_a, s_b)
+
+        def getRHS(freq):
+            rhs = np.asarray(prb.getRHS(freq))
+            return rhs.reshape(rhs.shape[0], -1)
+
+        b0, b1 = affine_split(getRHS(freq_a), getRHS(freq_b), s_a, s_b)
+        for freq in freqs[1:-1]:
+            rhs = getRHS(freq)
+            if not np.allclose(
+                rhs, b0 + 2j*np.pi*freq*b1,
+                atol=1e-10*np.abs(rhs).max()
+            ):
+                raise Exception(
+                    "The right hand side at {} Hz is not affine in the "
+                    "frequency, the multi-shift solve can not be used".format(
+                        freq
+                    )
+                )
+        return K, M, b0, b1
+
+    def _compute_fields_multishift(self, m):
+        """
+        solve every frequency with one shifted Krylov sequence (see
+        :class:`casingSimulations.krylov.MultiShiftSolver`)
+        """
+        prb = self.prob
+        prb.model = m
+        freqs = sorted(self.survey.freqs)
+
+        F = prb.fieldsPair(self.meshGenerator.mesh, self.survey)
+        K, M, b0, b1 = self._affine_system(freqs)
+
+        # krylov_tol and krylov_maxiter control the multi-shift Krylov
+        # sequence
+        Solver, solverOpts = self._wrapped_solver()
+        Ainv = MultiShiftSolver(
+            K, M, Solver=Solver, tol=self.krylov_tol,
+            maxiter=self.krylov_maxiter, verbose=self.verbose, **solverOpts
+        )
+        U = Ainv.solve(2j*np.pi*np.array(freqs), b0, b1)
+        Ainv.clean()
+
+        for freq, u in zip(freqs, U):
+            Srcs = self.survey.getSrcByFreq(freq)
+            F[Srcs, '{}Solution'.format(self.formulation)] = u
+
+        print(
+            '   multi-shift Krylov: {} factorization, {} solves for {} '
+            'frequencies'.format(
+                self.solver_stats.n_factorization,
+                self.solver_stats.n_solve,
+                len(freqs)
+            )
+        )
+        return F
+
+    def _compute_fields_reduced(self, m):
+        """
+        evaluate every frequency from a rational Krylov reduced-order model
+        (see :class:`casingSimulations.krylov.ReducedOrderModel`). The model
+        is kept as :code:`reduced_model` so it can be evaluated at other
+        frequencies, its error estimate at each frequency is in
+        :code:`reduced_model.error_estimates`.
+        """
+        prb = self.prob
+        prb.model = m
+        freqs = sorted(self.survey.freqs)
+        shifts = 2j*np.pi*np.array(freqs)
+
+        F = prb.fieldsPair(self.meshGenerator.mesh, self.survey)
+        K, M, b0, b1 = self._affine_system(freqs)
+
+        rom = ReducedOrderModel(
+            K, M, b0, b1, Solver=prb.Solver, **prb.solverOpts
+        )
+        estimate = rom.fit(
+            shifts, tol=self.rom_tol, max_poles=self.rom_max_solves,
+            verbose=self.verbose
+        )
+        self.reduced_model = rom
+
+        for freq, u in zip(freqs, rom.solve(shifts)):
+            Srcs = self.survey.getSrcByFreq(freq)
+            F[Srcs, '{}Solution'.format(self.formulation)] = u
+
+        print(
+            '   reduced-order model: {} full solves (at {} Hz) for {} '
+            'frequencies, max error estimate {:1.2e}'.format(
+                len(rom.poles),
+                ', '.join(
+                    '{:1.3g}'.format(pole.imag/(2*np.pi))
+                    for pole in sorted(rom.poles, key=abs)
+                ),
+                len(freqs), estimate.max()
+            )
+        )
+        if estimate.max() > self.rom_tol:
+            warnings.warn(
+                'The reduced-order model did not reach the tolerance {} with '
+                '{} full solves'.format(self.rom_tol, self.rom_max_solves)
+            )
+        return F
+
+    def _solve_shifts_direct(self, shifts, observable):
+        """
+        evaluate the observable on the solutions at complex shifts
+        :math:`s` (the system is :math:`K + s M`, with :math:`s = i\omega`
+        for real frequencies), solving each with the solver backend
+        """
+        prb = self.prob
+        prb.model = self.physprops.model
+        K, M, b0, b1 = self._affine_system(sorted(self.survey.freqs))
+
+        Ainv = SweepSolver(Solver=prb.Solver, **prb.solverOpts)
+        values = []
+        for s in shifts:
+            Ainv.factor((K + s*M).tocsc())
+            values.append(np.ravel(observable(self, Ainv * (b0 + s*b1))))
+        Ainv.clean()
+        return np.vstack(values)
+
+    def solve_shifts(self, shifts, observable):
+        """
+        Evaluate an observable on the solutions of the FDEM system at complex
+        shifts :math:`s` (the system is :math:`K + s M`, with
+        :math:`s = i\omega` for real frequencies). With
+        :code:`reduced_order=True`, the solutions come from a reduced-order
+        model fitted on the shifts, otherwise each shift is solved, on
+        :code:`num_workers` worker processes.
+
+        :param numpy.ndarray shifts: shifts s
+        :param callable observable: function of (simulation, solution)
+            returning a vector (the solution has a column per source)
+        :rtype: numpy.ndarray
+        :return: observable at each shift (a row per shift)
+        """
+        shifts = np.atleast_1d(shifts)
+
+        if self.reduced_order:
+            prb = self.prob
+            prb.model = self.physprops.model
+            rom = ReducedOrderModel(
+                *self._affine_system(sorted(self.survey.freqs)),
+                Solver=prb.Solver, **prb.solverOpts
+            )
+            rom.fit(
+                shifts, tol=self.rom_tol, max_poles=self.rom_max_solves,
+                verbose=self.verbose
+            )
+            self.reduced_model = rom
+            print(
+                '   reduced-order model: {} full solves for {} shifts, max '
+                'error estimate {:1.2e}'.format(
+                    len(rom.poles), len(shifts), rom.error_estimates.max()
+                )
+            )
+            return np.vstack([
+                np.ravel(observable(self, u)) for u in rom.solve(shifts)
+            ])
+
+        num_workers = min(self.num_workers, len(shifts))
+        if num_workers == 1:
+            return self._solve_shifts_direct(shifts, observable)
+
+        jsondict = dict(
+            self.serialize(),
+            num_threads=worker_threads(self.num_threads, num_workers)
+        )
+        jobs = [
+            (jsondict, shifts_i, observable)
+            for shifts_i in np.array_split(shifts, num_workers)
+        ]
+        print(
+            '   solving {} shifts on {} worker processes'.format(
+                len(shifts), num_workers
+            )
+        )
+        pool = multiprocessing.Pool(processes=num_workers)
+        try:
+            results = pool.map(_solve_shifts, jobs)
+        finally:
+            pool.close()
+            pool.join()
+
+        for _, summary in results:
+            self.solver_stats.add(summary)
+        return np.vstack([values for values, _ in results])
+
+    def time_domain(
+        self, times, observable=None, method='talbot', n=None,
+        waveform='step-off'
+    ):
+        """
+        Time-domain response of an observable from FDEM solves, without
+        time stepping. The FDEM system is solved at the Laplace-domain
+        frequencies of a fixed Talbot contour (complex) or of the
+        Gaver-Stehfest method (real) for each time, and the observable is
+        transformed to the times requested (see
+        :func:`casingSimulations.transforms.time_domain_response`). The
+        solves are independent: they are split across :code:`num_workers`
+        processes, or replaced by a reduced-order model if
+        :code:`reduced_order=True`.
+
+        :param numpy.ndarray times: times (s)
+        :param callable observable: function of (simulation, solution)
+            returning a vector (default is the casing currents,
+            :func:`casingSimulations.transforms.casing_currents`, for the h
+            and j formulations). It must be defined at the module level to
+            be used by worker processes.
+        :param str method: 'talbot' or 'stehfest'
+        :param int n: number of terms per time
+        :param str waveform: 'impulse', 'step-on' or 'step-off'
+        :rtype: numpy.ndarray
+        :return: observable at each time (a row per time)
+        """
+        if (
+            observable is None and
+            self.formulation not in transforms.CURRENT_FORMULATIONS
+        ):
+            raise ValueError(
+                "the default observable (the casing currents) is computed "
+                "from the {} formulations, provide an observable for the {} "
+                "formulation".format(
+                    transforms.CURRENT_FORMULATIONS, self.formulation
+                )
+            )
+
+        if len(self.survey.freqs) < 2:
+            # two frequencies are needed to find the frequency dependence
+            # of the system
+            return self.simulation_at([1., 10.]).time_domain(
+                times, observable=observable, method=method, n=n,
+                waveform=waveform
+            )
+
+        if observable is None:
+            observable = transforms.casing_currents
+
+        t = time.time()
+        with ThreadLimits(self.num_threads):
+            self.solver_stats.reset()
+            response = transforms.time_domain_response(
+                lambda shifts: self.solve_shifts(shifts, observable),
+                times, method=method, n=n, waveform=waveform
+            )
+        print(
+            '   time-domain response at {} times ({} method) ... Elapsed '
+            'time : {}'.format(
+                len(np.atleast_1d(times)), method, time.time()-t
+            )
+        )
+        print(self.solver_stats)
+        return response
+
+    def _compute_fields_parallel(self, m):
+        """
+        split the frequencies across a pool of worker processes. Each worker
+        builds its own problem from the serialized simulation and the
+        solutions are assembled in the order of
+        :code:`modelParameters.freqs`.
+        """
+        freqs = self.modelParameters.freqs
+        num_workers = min(self.num_workers, len(freqs))
+        jsondict = dict(
+            self.serialize(),
+            num_threads=worker_threads(self.num_threads, num_workers)
+        )
+        jobs = [
+            (jsondict, freqs_i)
+            for freqs_i in np.array_split(freqs, num_workers)
+        ]
+
+        print(
+            '   solving {} frequencies on {} worker processes'.format(
+                len(freqs), num_workers
+            )
+        )
+        pool = multiprocessing.Pool(processes=num_workers)
+        try:
+            results = pool.map(_solve_frequencies, jobs)
+        finally:
+            pool.close()
+            pool.join()
+
+        for _, summary in results:
+            self.solver_stats.add(summary)
+
+        prb = self.prob
+        prb.model = m
+        F = prb.fieldsPair(self.meshGenerator.mesh, self.survey)
+        F[:, '{}Solution'.format(self.formulation)] = np.column_stack(
+            [u for u, _ in results]
+        )
+        return F
+
+
+class _OutputTimesStore(object):
+    """
+    Stand-in for the fields of the SimPEG time stepping. Only the solution
+    of the last time step is kept, and the solution at the output times
+    (linearly interpolated within the time steps) is written to an array.
+
+    :param numpy.ndarray solution: array the solution at the output times is
+        written to (nP x nSrc x nTimes)
+    :param numpy.ndarray times: times of the time steps (s)
+    :param numpy.ndarray output_times: sorted output times (s)
+    :param int flush_every: number of time steps between flushes of a
+        memory-mapped solution (None to never flush)
+    """
+
+    def __init__(self, solution, times, output_times, flush_every=None):
+        self.solution = solution
+        self.times = times
+        self.output_times = output_times
+        self.flush_every = flush_every
+        self._ind = 0  # index of the next output time
+        self._tInd = None
+        self._u = None
+
+    def __getitem__(self, key):
+        _, _, tInd = key
+        if tInd != self._tInd:
+            raise Exception(
+                "only the solution of the last time step ({}) is kept, not "
+                "{}".format(self._tInd, tInd)
+            )
+        return self._u
+
+    def __setitem__(self, key, u):
+        _, _, tInd = key
+        u = np.asarray(u)
+        u = u.reshape(u.shape[0], -1)
+        t = self.times[tInd]
+        while (
+            self._ind < len(self.output_times) and
+            self.output_times[self._ind] <= t * (1. + 1e-10)
+        ):
+            if self._u is None:
+                self.solution[:, :, self._ind] = u
+            else:
+                t_prev = self.times[self._tInd]
+                w = min(
+                    (self.output_times[self._ind] - t_prev) / (t - t_prev), 1.
+                )
+                self.solution[:, :, self._ind] = (1. - w) * self._u + w * u
+            self._ind += 1
+        self._tInd, self._u = tInd, u
+
+        if self.flush_every is not None and tInd % self.flush_every == 0:
+            self.solution.flush()
+
+
+class TimeSolution(object):
+    """
+    Solution of a TDEM simulation at output times, indexed like the solution
+    of the SimPEG fields: :code:`solution[:, 'jSolution']` is the
+    nP x nSrc x nTimes array, :code:`solution[src, 'jSolution']` the
+    solution of a source and :code:`solution[:, 'jSolution', ind]` the
+    solution at output times. Only the solution is stored, the other fields
+    are computed from it.
+
+    :param SimPEG.EM.TDEM.Survey survey: survey
+    :param str formulation: formulation ('e', 'b', 'h' or 'j')
+    :param numpy.ndarray times: output times (s)
+    :param numpy.ndarray array: solution (nP x nSrc x nTimes)
+    """
+
+    def __init__(self, survey, formulation, times, array):
+        self.survey = survey
+        self.formulation = formulation
+        self.times = times
+        self.array = array
+
+    def __array__(self, dtype=None):
+        return np.asarray(self.array, dtype=dtype)
+
+    @property
+    def shape(self):
+        return self.array.shape
+
+    def __getitem__(self, key):
+        srcs, name = key[:2]
+        timeInd = key[2] if len(key) > 2 else slice(None)
+        if name != '{}Solution'.format(self.formulation):
+            raise KeyError(
+                "only the {}Solution is stored, not {}".format(
+                    self.formulation, name
+                )
+            )
+        if isinstance(srcs, slice):
+            srcInd = srcs
+        elif isinstance(srcs, list):
+            srcInd = [self.survey.srcList.index(src) for src in srcs]
+        else:
+            srcInd = self.survey.srcList.index(srcs)
+        return self.array[:, srcInd, timeInd]
+
 
 class SimulationTDEM(BaseSimulation):
     """
@@ -230,8 +1461,34 @@ class SimulationTDEM(BaseSimulation):
         choices=["e", "b", "h", "j"]
     )
 
+    stream_fields = properties.Bool(
+        "write the solution to a memory-mapped file as each time step is "
+        "computed, so the memory used does not grow with the number of time "
+        "steps?",
+        default=False
+    )
+
+    output_times = properties.Array(
+        "times (s) at which the solution is stored. The solution is linearly "
+        "interpolated between time steps during the march, which stops after "
+        "the last output time (default is every time step)",
+        dtype=float,
+        required=False
+    )
+
+    stream_flush_every = properties.Integer(
+        "number of time steps between flushes of the streamed solution to "
+        "disk",
+        default=10,
+        min=1
+    )
+
     physics = "TDEM"
 
+    # curl-curl + mass matrix / dt: symmetric positive definite (SimPEG
+    # symmetrizes the b and j systems)
+    _formulation_matrix_types = {'e': 'spd', 'h': 'spd', 'b': 'spd', 'j': 'spd'}
+
     def __init__(self, **kwargs):
         super(SimulationTDEM, self).__init__(**kwargs)
 
@@ -242,9 +1499,10 @@ class SimulationTDEM(BaseSimulation):
                 timeSteps=self.modelParameters.timeSteps,
                 sigmaMap=self.physprops.wires.sigma,
                 mu=self.physprops.mu, # right now the TDEM code doesn't support mu inversions
-                Solver=Solver,
+                Solver=self.Solver,
                 verbose=self.verbose
             )
+        self._prob.solverOpts = self.solverOpts
 
         if getattr(self.src, "physics", None) is None:
             self.src.physics = "TDEM"
@@ -253,6 +1511,117 @@ class SimulationTDEM(BaseSimulation):
 
         self._prob.pair(self._survey)
 
+    def _compute_fields(self, m):
+        """
+        compute the fields for the model m, reporting the number of
+        factorizations and solves the time steps call for first
+        """
+        predicted = predict_cost(
+            self.modelParameters.timeSteps,
+            dt_threshold=getattr(self.prob, 'dt_threshold', 1e-8)
+        )
+        print(
+            '   predicted: {n_factorizations} factorizations ({n_distinct_dt} '
+            'distinct time steps), {n_solves} solves'.format(**predicted)
+        )
+        return super(SimulationTDEM, self)._compute_fields(m)
+
+    @property
+    def _saves_solution(self):
+        return self.stream_fields or self.output_times is not None
+
+    def _compute_solution(self, m, filename):
+        """
+        march through the time steps with the SimPEG time stepping, keeping
+        only the previous solution in memory, and store the solution at the
+        output times (or every time step). The solution (nF x nSrc x nTimes,
+        the shape of :code:`fields[:, 'jSolution']`) is saved to a .npy
+        file. When streaming, the file is opened as a (fortran ordered)
+        memory map and each solution is written to it as soon as it is
+        computed. The file can be loaded with :code:`np.load` (see
+        :func:`casingSimulations.utils.loadSimulationResults`).
+
+        :param numpy.ndarray m: model
+        :param str filename: file the solution is written to
+        :rtype: TimeSolution
+        :return: solution at the output times (memory-mapped read-only when
+            streaming)
+        """
+        prb = self.prob
+        timeSteps = prb.timeSteps
+        times = np.r_[0., np.cumsum(timeSteps)]
+
+        if self.output_times is None:
+            output_times = times
+            march = timeSteps
+        else:
+            output_times = np.sort(self.output_times)
+            if output_times[0] < 0. or output_times[-1] > times[-1] * (
+                1. + 1e-10
+            ):
+                raise Exception(
+                    "output_times must be between 0 and the end of the last "
+                    "time step, {} s".format(times[-1])
+                )
+            # the march stops after the last output time
+            march = timeSteps[
+                :np.searchsorted(times, output_times[-1] * (1. - 1e-10)) or 1
+            ]
+
+        predicted = predict_cost(
+            march, dt_threshold=getattr(prb, 'dt_threshold', 1e-8)
+        )
+        print(
+            '   predicted: {n_factorizations} factorizations ({n_distinct_dt} '
+            'distinct time steps), {n_solves} solves'.format(**predicted)
+        )
+
+        mesh = self.meshGenerator.mesh
+        location = prb.fieldsPair.knownFields[
+            '{}Solution'.format(self.formulation)
+        ]
+        shape = (
+            getattr(mesh, 'n{}'.format(location)), len(self.survey.srcList),
+            len(output_times)
+        )
+        if self.stream_fields:
+            solution = np.lib.format.open_memmap(
+                filename, mode='w+', dtype=float, shape=shape,
+                fortran_order=True
+            )
+            print(
+                '   streaming the solution to {} ({:1.2e} GB)'.format(
+                    filename, solution.nbytes / 1e9
+                )
+            )
+        else:
+            solution = np.zeros(shape, order='F')
+
+        # the SimPEG time stepping writes the solution of each step to a
+        # store in place of its fields
+        store = _OutputTimesStore(
+            solution, times, output_times,
+            flush_every=self.stream_flush_every if self.stream_fields else
+            None
+        )
+        prb.fieldsPair = lambda mesh, survey: store
+        prb.timeSteps = march
+        try:
+            prb.fields(m)
+        finally:
+            del prb.fieldsPair
+            prb.timeSteps = timeSteps
+
+        if not self.stream_fields:
+            np.save(filename, solution)
+        else:
+            solution.flush()
+            del solution
+            solution = np.load(filename, mmap_mode='r')
+        return TimeSolution(
+            self.survey, self.formulation, output_times, solution
+        )
+
 
 class SimulationDC(BaseSimulation):
     """
@@ -278,8 +1647,31 @@ class SimulationDC(BaseSimulation):
         default="phi"
     )
 
+    azimuthal_modes = properties.Bool(
+        "on a 3D cylindrical mesh with an axisymmetric model, solve each "
+        "azimuthal Fourier mode of the source as an independent 2D-sized "
+        "system?",
+        default=False
+    )
+
+    num_workers = properties.Integer(
+        "number of worker processes the azimuthal modes are split across",
+        default=1,
+        min=1
+    )
+
+    half_domain = properties.Bool(
+        "for a model that is mirror symmetric about the plane through the "
+        "electrodes, solve on half of the domain (with symmetry conditions "
+        "on the plane) and mirror the potentials back?",
+        default=False
+    )
+
     physics = "DC"
 
+    # D M_rho^-1 D^T (Dirichlet boundary conditions): symmetric
+    _formulation_matrix_types = {'phi': 'symmetric'}
+
     def __init__(self, **kwargs):
         super(SimulationDC, self).__init__(**kwargs)
 
@@ -287,9 +1679,72 @@ class SimulationDC(BaseSimulation):
             self.meshGenerator.mesh,
             sigmaMap=self.physprops.wires.sigma,
             bc_type='Dirichlet',
-            Solver=Solver
+            Solver=self.Solver
         )
+        self._prob.solverOpts = self.solverOpts
         self._src = DC.Src.Dipole([], self.src_a, self.src_b)
         self._survey = DC.Survey([self._src])
 
         self._prob.pair(self._survey)
+
+    def _compute_fields(self, m):
+        """
+        compute the fields for the model m. With
+        :code:`azimuthal_modes=True`, the azimuthal modes of the source are
+        solved as independent systems, and with :code:`half_domain=True` the
+        system is solved on half of the domain.
+        """
+        if self.half_domain and self.azimuthal_modes:
+            raise Exception(
+                "half_domain and azimuthal_modes can not be combined, choose "
+                "one of them"
+            )
+        if self.half_domain:
+            return self._compute_fields_half(m)
+        if not self.azimuthal_modes:
+            return super(SimulationDC, self)._compute_fields(m)
+
+        prb = self.prob
+        prb.model = m
+        F = prb.fieldsPair(self.meshGenerator.mesh, self.survey)
+        Ainv = self._azimuthal_mode_solver(prb.getA(), 'CC')
+        F[self.survey.srcList, '{}Solution'.format(self.formulation)] = (
+            Ainv.solve(prb.getRHS())
+        )
+        if self.verbose:
+            print(
+                '   solved {} of {} azimuthal modes'.format(
+                    len(Ainv.modes), Ainv.n_theta
+                )
+            )
+        return F
+
+    def _compute_fields_half(self, m):
+        """
+        solve on half of the domain and mirror the potentials back (see
+        :class:`casingSimulations.symmetry.MirrorSymmetricSolver`)
+        """
+        if not (
+            self.src_a[1] == self.src_b[1] == self.meshGenerator.mirror_plane
+        ):
+            raise Exception(
+                "the electrodes must be on the plane the mesh is mirrored "
+                "about ({}) to use the half domain".format(
+                    self.meshGenerator.mirror_plane
+                )
+            )
+        prb = self.prob
+        prb.model = m
+        F = prb.fieldsPair(self.meshGenerator.mesh, self.survey)
+        Ainv = self._mirror_solver(prb.getA(), 'CC')
+        F[self.survey.srcList, '{}Solution'.format(self.formulation)] = (
+            Ainv.solve(prb.getRHS())
+        )
+        if self.verbose:
+            print(
+                '   solved {} of {} unknowns on the half domain'.format(
+                    Ainv.n_half, len(Ainv.mirror)
+                )
+            )
+        Ainv.clean()
+        return F
@@ -0,0 +1,1030 @@
+import multiprocessing
+import os
+import time
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse import linalg as spla
+
+try:
+    import threadpoolctl
+except ImportError:
+    threadpoolctl = None
+
+try:
+    import mkl
+except ImportError:
+    mkl = None
+
+try:
+    from pymatsolver import Pardiso
+except ImportError:
+    Pardiso = None
+
+try:
+    import scikits.umfpack as umfpack
+except ImportError:
+    umfpack = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+try:
+    import pyamg
+except ImportError:
+    pyamg = None
+
+try:
+    from sksparse import cholmod
+except ImportError:
+    cholmod = None
+
+
+# environment variables read by BLAS / OpenMP when a (worker) process starts
+THREAD_ENV_VARS = [
+    'OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS'
+]
+
+# types of system matrices the solvers can exploit. 'symmetric' is
+# A = A^T (real symmetric or complex symmetric), 'hermitian' is A = A^H and
+# 'spd' is symmetric (hermitian if complex) positive definite
+MATRIX_TYPES = ['auto', 'general', 'symmetric', 'hermitian', 'spd']
+
+
+class SolverStats(object):
+    """
+    Counters for the work done by the solvers during a simulation: the number
+    of symbolic analyses (reorderings), numeric factorizations and solves as
+    well as the time spent in each of them. For iterative solves, the number
+    of iterations and the final relative residual of each solve are kept, and
+    the residual history if it is logged.
+
+    Backends that run the analysis and the numeric factorization as one call
+    (SuperLU, UMFPACK, Pardiso through pymatsolver) count both, but the time
+    of that call is reported as factorization time only.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """
+        set all of the counters back to zero
+        """
+        self.n_analysis = 0
+        self.n_factorization = 0
+        self.n_solve = 0
+        self.time_analysis = 0.
+        self.time_factorization = 0.
+        self.time_solve = 0.
+        self.iterations = []
+        self.residuals = []
+        self.residual_history = []
+
+    def add(self, summary):
+        """
+        add the work done elsewhere (e.g. by a worker process) to the
+        counters
+
+        :param dict summary: summary of the work (see :attr:`summary`) or
+            SolverStats
+        :rtype: SolverStats
+        """
+        if isinstance(summary, SolverStats):
+            summary = summary.summary
+        for key, val in summary.items():
+            setattr(self, key, getattr(self, key) + val)
+        return self
+
+    @property
+    def n_iterations(self):
+        """
+        total number of iterations of the iterative solves
+
+        :rtype: int
+        """
+        return int(np.sum(self.iterations))
+
+    @property
+    def summary(self):
+        """
+        dictionary summarizing the work done by the solvers
+
+        :rtype: dict
+        """
+        return {
+            'n_analysis': self.n_analysis,
+            'n_factorization': self.n_factorization,
+            'n_solve': self.n_solve,
+            'time_analysis': self.time_analysis,
+            'time_factorization': self.time_factorization,
+            'time_solve': self.time_solve,
+            'iterations': list(self.iterations),
+            'residuals': list(self.residuals),
+        }
+
+    def __str__(self):
+        info = (
+            "   {n_analysis} analyses ({time_analysis:1.2f} s), "
+            "{n_factorization} numeric factorizations "
+            "({time_factorization:1.2f} s), {n_solve} solves "
+            "({time_solve:1.2f} s)".format(**self.summary)
+        )
+        if len(self.iterations) > 0:
+            info += (
+                "\n   {} iterations (min {}, max {} per solve), max relative "
+                "residual {:1.2e}".format(
+                    self.n_iterations, min(self.iterations),
+                    max(self.iterations), max(self.residuals)
+                )
+            )
+        return info
+
+
+class ThreadLimits(object):
+    """
+    Context manager that limits the number of threads used by the solver (MKL,
+    which Pardiso runs on) and by the BLAS / OpenMP pools, and restores the
+    previous limits on exit. The environment variables are also set so that
+    worker processes started inside the context inherit the limits.
+
+    MKL is controlled through mkl-service and the other pools through
+    threadpoolctl, each only if it is installed.
+
+    :param int num_threads: maximum number of threads. If None, the limits
+        are left untouched
+    """
+
+    def __init__(self, num_threads=None):
+        self.num_threads = num_threads
+
+    def __enter__(self):
+        self._environ = {key: os.environ.get(key) for key in THREAD_ENV_VARS}
+        self._mkl_threads = None
+        self._threadpool_limits = None
+
+        if self.num_threads is None:
+            return self
+
+        for key in THREAD_ENV_VARS:
+            os.environ[key] = str(self.num_threads)
+
+        if mkl is not None:
+            self._mkl_threads = mkl.get_max_threads()
+            mkl.set_num_threads(self.num_threads)
+
+        if threadpoolctl is not None:
+            self._threadpool_limits = threadpoolctl.threadpool_limits(
+                limits=self.num_threads
+            )
+
+        return self
+
+    def __exit__(self, *args):
+        if self._threadpool_limits is not None:
+            self._threadpool_limits.restore_original_limits()
+
+        if self._mkl_threads is not None:
+            mkl.set_num_threads(self._mkl_threads)
+
+        for key, val in self._environ.items():
+            if val is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = val
+
+    @property
+    def thread_counts(self):
+        """
+        effective number of threads of each of the thread pools that could be
+        inspected
+
+        :rtype: dict
+        """
+        counts = {}
+        if mkl is not None:
+            counts['mkl'] = mkl.get_max_threads()
+        if threadpoolctl is not None:
+            for pool in threadpoolctl.threadpool_info():
+                key = '{}:{}'.format(pool['internal_api'], pool['prefix'])
+                counts[key] = pool['num_threads']
+        if not counts:
+            counts['environment'] = os.environ.get('OMP_NUM_THREADS', 'unset')
+        return counts
+
+
+def worker_threads(num_threads, num_workers):
+    """
+    Number of threads of each of num_workers worker processes. If
+    num_threads is not set, the cores are shared between the workers so that
+    the machine is not oversubscribed.
+
+    :param int num_threads: number of threads of a process (None if not set)
+    :param int num_workers: number of worker processes
+    :rtype: int
+    """
+    if num_threads is not None:
+        return num_threads
+    return max(1, multiprocessing.cpu_count() // max(num_workers, 1))
+
+
+def _same_pattern(A, B):
+    """
+    Check if two csc matrices have the same sparsity pattern
+    """
+    return (
+        A.shape == B.shape and
+        A.nnz == B.nnz and
+        np.array_equal(A.indptr, B.indptr) and
+        np.array_equal(A.indices, B.indices)
+    )
+
+
+def is_symmetric(A, tol=1e-12):
+    """
+    Check if a sparse matrix is symmetric (:math:`A = A^T`, complex symmetric
+    matrices included)
+
+    :param scipy.sparse.spmatrix A: matrix to check
+    :param float tol: relative tolerance
+    :rtype: bool
+    """
+    A = sp.csr_matrix(A)
+    if A.shape[0] != A.shape[1]:
+        return False
+    diff = A - A.T
+    if diff.nnz == 0:
+        return True
+    return np.abs(diff.data).max() <= tol * np.abs(A.data).max()
+
+
+def is_hermitian(A, tol=1e-12):
+    """
+    Check if a sparse matrix is hermitian (:math:`A = A^H`)
+
+    :param scipy.sparse.spmatrix A: matrix to check
+    :param float tol: relative tolerance
+    :rtype: bool
+    """
+    A = sp.csr_matrix(A)
+    if A.shape[0] != A.shape[1]:
+        return False
+    diff = A - A.T.conj()
+    if diff.nnz == 0:
+        return True
+    return np.abs(diff.data).max() <= tol * np.abs(A.data).max()
+
+
+def matrix_type(A, tol=1e-12):
+    """
+    Detect the type of a sparse matrix: 'symmetric' (real symmetric or
+    complex symmetric), 'hermitian' or 'general'. Positive definiteness can
+    not be detected cheaply, declare 'spd' if it is known.
+
+    :param scipy.sparse.spmatrix A: matrix
+    :param float tol: relative tolerance for the symmetry checks
+    :rtype: str
+    """
+    if is_symmetric(A, tol):
+        return 'symmetric'
+    if np.iscomplexobj(A) and is_hermitian(A, tol):
+        return 'hermitian'
+    return 'general'
+
+
+def available_memory():
+    """
+    Available memory (bytes) on the machine, None if it can not be determined
+
+    :rtype: int
+    """
+    if psutil is not None:
+        return psutil.virtual_memory().available
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def estimate_factor_memory(A, fill_factor=None, matrix_type='general'):
+    """
+    Rough estimate of the memory (bytes) needed by a sparse direct
+    factorization of A. Unless a fill factor (nnz of the factors over the nnz
+    of A) is provided, it is taken to grow like :math:`n^{1/3}`, the growth
+    of nested dissection fill-in for 3D meshes. Symmetric factorizations
+    (Cholesky, :math:`LDL^T`) only store one triangle.
+
+    :param scipy.sparse.spmatrix A: matrix to factor
+    :param float fill_factor: ratio of the nnz of the factors to the nnz of A
+    :param str matrix_type: type of the matrix
+    :rtype: float
+    """
+    if fill_factor is None:
+        fill_factor = max(10., 3. * A.shape[0]**(1./3.))
+    bytes_per_entry = np.dtype(A.dtype).itemsize + 4  # value + index
+    memory = fill_factor * A.nnz * bytes_per_entry
+    if matrix_type in ['symmetric', 'spd']:
+        memory = memory / 2.
+    return memory
+
+
+class BaseSolver(object):
+    """
+    Base class for the solver backends. Backends follow the pymatsolver
+    interface (:code:`Ainv = Solver(A); x = Ainv * b; Ainv.clean()`) so they
+    can be handed to the SimPEG problems, and keep track of the work done in
+    a :class:`SolverStats` instance.
+
+    :param scipy.sparse.spmatrix A: matrix to factor
+    :param SolverStats stats: counters to update with the work done
+    :param str matrix_type: declared type of the matrix (see
+        :data:`MATRIX_TYPES`), 'auto' to detect it (which costs a
+        symmetry check of A, declare the type when it is known)
+    """
+
+    name = None
+    is_direct = True
+    available = True
+    options = ('matrix_type',)  # keyword arguments accepted by the backend
+
+    def __init__(self, A, stats=None, matrix_type='general'):
+        if not self.available:
+            raise ImportError(
+                "the {} solver backend is not available".format(self.name)
+            )
+        if matrix_type not in MATRIX_TYPES:
+            raise ValueError(
+                "matrix_type must be one of {}, not {}".format(
+                    MATRIX_TYPES, matrix_type
+                )
+            )
+        self.A = sp.csc_matrix(A)
+        self.A.sort_indices()
+        self.stats = stats if stats is not None else SolverStats()
+        self.matrix_type = (
+            globals()['matrix_type'](self.A) if matrix_type == 'auto' else
+            matrix_type
+        )
+
+        t = time.time()
+        self._analyze(self.A)
+        t_analysis = time.time() - t
+
+        t = time.time()
+        self._factor(self.A)
+        if self.is_direct:
+            self.stats.n_analysis += 1
+            self.stats.n_factorization += 1
+            self.stats.time_analysis += t_analysis
+            self.stats.time_factorization += time.time() - t
+
+    def _analyze(self, A):
+        # backends with a separate symbolic phase run it here
+        pass
+
+    def _factor(self, A):
+        raise NotImplementedError
+
+    def _refactor(self, A):
+        # backends that can re-use the symbolic analysis for a new matrix
+        # with the same pattern run the numeric phase only and return True
+        return False
+
+    def _solve(self, rhs):
+        raise NotImplementedError
+
+    def refactor(self, A):
+        """
+        Numerically factor a new matrix with the same sparsity pattern,
+        re-using the analysis of the current one
+
+        :param scipy.sparse.spmatrix A: matrix to factor
+        :rtype: bool
+        :return: True if the analysis could be re-used
+        """
+        A = sp.csc_matrix(A)
+        A.sort_indices()
+        if not _same_pattern(A, self.A):
+            return False
+
+        t = time.time()
+        if not self._refactor(A):
+            return False
+        self.A = A
+        if self.is_direct:
+            self.stats.n_factorization += 1
+            self.stats.time_factorization += time.time() - t
+        return True
+
+    def solve(self, rhs):
+        """
+        Solve the system for the right hand side(s) provided
+
+        :param numpy.ndarray rhs: right hand side (vector or array with a
+            column per source)
+        :rtype: numpy.ndarray
+        """
+        rhs = np.asarray(rhs)
+        t = time.time()
+        x = self._solve(rhs)
+        self.stats.n_solve += 1 if rhs.ndim == 1 else rhs.shape[1]
+        self.stats.time_solve += time.time() - t
+        return x
+
+    def __mul__(self, rhs):
+        return self.solve(rhs)
+
+    def clean(self):
+        """
+        Release the factors
+        """
+        pass
+
+
+class SuperLUSolver(BaseSolver):
+    """
+    SuperLU (scipy) direct solver. The column ordering is tuned to the
+    declared type of the matrix: for symmetric matrices (such as the
+    curl-curl and DC operators) the minimum degree ordering of
+    :math:`A^T + A` is used together with SuperLU's symmetric mode, which
+    favours diagonal pivots (none at all for 'spd' matrices) so the symmetric
+    ordering is preserved. 'general' matrices are factored with scipy's
+    defaults (COLAMD ordering), as SimPEG's SolverLU does. SuperLU can not re-use
+    its symbolic analysis: every new matrix is analyzed and factored again.
+
+    :param str permc_spec: column ordering ('auto' to choose from the
+        type of A)
+    :param float diag_pivot_thresh: threshold for partial pivoting
+    """
+
+    name = 'superlu'
+    options = BaseSolver.options + ('permc_spec', 'diag_pivot_thresh')
+
+    def __init__(
+        self, A, stats=None, matrix_type='general', permc_spec='auto',
+        diag_pivot_thresh=None
+    ):
+        self.permc_spec = permc_spec
+        self.diag_pivot_thresh = diag_pivot_thresh
+        super(SuperLUSolver, self).__init__(
+            A, stats=stats, matrix_type=matrix_type
+        )
+
+    def _splu_kwargs(self, A):
+        permc_spec = self.permc_spec
+        if permc_spec == 'auto':
+            permc_spec = (
+                'COLAMD' if self.matrix_type == 'general' else 'MMD_AT_PLUS_A'
+            )
+        kwargs = {'permc_spec': permc_spec}
+        if permc_spec == 'MMD_AT_PLUS_A':
+            kwargs['options'] = {'SymmetricMode': True}
+            kwargs['diag_pivot_thresh'] = (
+                0. if self.matrix_type == 'spd' else 0.1
+            )
+        if self.diag_pivot_thresh is not None:
+            kwargs['diag_pivot_thresh'] = self.diag_pivot_thresh
+        return kwargs
+
+    def _factor(self, A):
+        self._kwargs = self._splu_kwargs(A)
+        self._lu = spla.splu(A, **self._kwargs)
+
+    def _solve(self, rhs):
+        if np.iscomplexobj(rhs) and not np.iscomplexobj(self._lu.L):
+            return self._lu.solve(rhs.real) + 1j*self._lu.solve(rhs.imag)
+        return self._lu.solve(rhs.astype(self._lu.L.dtype, copy=False))
+
+    def clean(self):
+        self._lu = None
+
+
+class PardisoSolver(BaseSolver):
+    """
+    MKL Pardiso direct solver (through pymatsolver). The matrix type is
+    passed on so that Pardiso uses a Cholesky factorization for 'spd'
+    matrices and a symmetric :math:`LDL^T` factorization (complex symmetric
+    if the matrix is complex) for 'symmetric' ones. If the installed
+    pymatsolver can re-factor a matrix (:code:`Ainv.factor(A)`, which runs
+    Pardiso's numeric factorization, phase 22, on the analysis of the first
+    matrix), the analysis is re-used when re-factoring.
+    """
+
+    name = 'pardiso'
+    available = Pardiso is not None
+    options = BaseSolver.options + ('is_symmetric', 'is_positive_definite')
+
+    def __init__(self, A, stats=None, matrix_type='general', **kwargs):
+        self.kwargs = kwargs
+        super(PardisoSolver, self).__init__(
+            A, stats=stats, matrix_type=matrix_type
+        )
+
+    def _factor(self, A):
+        kwargs = dict(self.kwargs)
+        if self.matrix_type in ['symmetric', 'spd']:
+            kwargs.setdefault('is_symmetric', True)
+            kwargs.setdefault(
+                'is_positive_definite', self.matrix_type == 'spd'
+            )
+        self._Ainv = Pardiso(A, **kwargs)
+
+    def _refactor(self, A):
+        try:
+            self._Ainv.factor(A)
+        except (TypeError, AttributeError):
+            # older versions can only factor the matrix they were built with
+            return False
+        return True
+
+    def _solve(self, rhs):
+        return self._Ainv * rhs
+
+    def clean(self):
+        if getattr(self, '_Ainv', None) is not None:
+            self._Ainv.clean()
+        self._Ainv = None
+
+
+class UmfpackSolver(BaseSolver):
+    """
+    UMFPACK direct solver (through scikit-umfpack)
+    """
+
+    name = 'umfpack'
+    available = umfpack is not None
+
+    def _factor(self, A):
+        self._lu = umfpack.splu(A)
+
+    def _solve(self, rhs):
+        if np.iscomplexobj(rhs) and not np.iscomplexobj(self.A):
+            return self._solve(rhs.real) + 1j*self._solve(rhs.imag)
+        if rhs.ndim == 1:
+            return self._lu.solve(rhs)
+        return np.column_stack(
+            [self._lu.solve(rhs[:, i]) for i in range(rhs.shape[1])]
+        )
+
+    def clean(self):
+        self._lu = None
+
+
+class CholmodSolver(BaseSolver):
+    """
+    CHOLMOD sparse Cholesky solver (through scikit-sparse) for symmetric
+    (hermitian if complex) positive definite matrices. It stores a single
+    triangular factor, roughly halving the memory and time of an LU
+    factorization. The symbolic analysis (:code:`cholmod.analyze`) is
+    separate from the numeric factorization and is re-used when
+    re-factoring.
+    """
+
+    name = 'cholmod'
+    available = cholmod is not None
+
+    def __init__(self, A, stats=None, matrix_type='spd'):
+        super(CholmodSolver, self).__init__(
+            A, stats=stats, matrix_type=matrix_type
+        )
+
+    def _analyze(self, A):
+        if self.matrix_type != 'spd':
+            raise ValueError(
+                "the cholmod solver requires a symmetric positive definite "
+                "matrix, not {}".format(self.matrix_type)
+            )
+        self._factor_chol = cholmod.analyze(A)
+
+    def _factor(self, A):
+        self._factor_chol.cholesky_inplace(A)
+
+    def _refactor(self, A):
+        self._factor_chol.cholesky_inplace(A)
+        return True
+
+    def _solve(self, rhs):
+        if np.iscomplexobj(rhs) and not np.iscomplexobj(self.A):
+            return self._solve(rhs.real) + 1j*self._solve(rhs.imag)
+        return self._factor_chol(rhs)
+
+    def clean(self):
+        self._factor_chol = None
+
+
+def _krylov_tol_kwarg():
+    """
+    scipy >= 1.12 renamed the relative tolerance of the Krylov solvers from
+    tol to rtol
+    """
+    try:
+        from inspect import signature
+    except ImportError:  # python 2
+        return 'tol'
+    return 'rtol' if 'rtol' in signature(spla.gmres).parameters else 'tol'
+
+
+def block_diagonal(A, block_size):
+    """
+    Block diagonal part of a sparse matrix, with contiguous blocks of
+    block_size unknowns
+
+    :param scipy.sparse.spmatrix A: matrix
+    :param int block_size: number of unknowns per block
+    :rtype: scipy.sparse.csc_matrix
+    """
+    A = sp.coo_matrix(A)
+    keep = (A.row // block_size) == (A.col // block_size)
+    return sp.csc_matrix(
+        (A.data[keep], (A.row[keep], A.col[keep])), shape=A.shape
+    )
+
+
+def preconditioner(
+    A, kind='ilu', drop_tol=1e-4, fill_factor=10., block_size=1000
+):
+    """
+    Build a preconditioner for the Krylov solvers. All of them need memory
+    that grows linearly with the size of the system.
+
+    - 'ilu': incomplete LU factorization (fill controlled by fill_factor)
+    - 'amg': smoothed aggregation algebraic multigrid (requires pyamg)
+    - 'block_jacobi': exact factorization of the diagonal blocks of
+      block_size unknowns
+    - 'jacobi': inverse of the absolute value of the diagonal (symmetric
+      positive definite, so it may be used with CG and MINRES)
+
+    :param scipy.sparse.spmatrix A: system matrix
+    :param str kind: type of preconditioner
+    :rtype: scipy.sparse.linalg.LinearOperator
+    """
+    A = sp.csc_matrix(A)
+    if kind == 'ilu':
+        ilu = spla.spilu(A, drop_tol=drop_tol, fill_factor=fill_factor)
+        return spla.LinearOperator(A.shape, ilu.solve, dtype=ilu.L.dtype)
+
+    elif kind == 'amg':
+        if pyamg is None:
+            raise ImportError(
+                "pyamg is required for the amg preconditioner"
+            )
+        ml = pyamg.smoothed_aggregation_solver(sp.csr_matrix(A))
+        return ml.aspreconditioner()
+
+    elif kind == 'block_jacobi':
+        lu = spla.splu(block_diagonal(A, block_size))
+        return spla.LinearOperator(A.shape, lu.solve, dtype=A.dtype)
+
+    elif kind == 'jacobi':
+        d = 1./np.abs(A.diagonal())
+        return spla.LinearOperator(A.shape, lambda v: d*v, dtype=A.dtype)
+
+    raise ValueError(
+        "unknown preconditioner {}, choose from 'ilu', 'amg', "
+        "'block_jacobi', 'jacobi'".format(kind)
+    )
+
+
+class IterativeSolver(BaseSolver):
+    """
+    Preconditioned Krylov solver. Its memory grows linearly with the size of
+    the system rather than with the fill-in of direct factors. The number of
+    iterations and the final relative residual of each solve are recorded in
+    the solver stats.
+
+    :param str method: Krylov method ('gmres', 'bicgstab', 'cg', 'minres').
+        By default, CG is used for 'spd' matrices, MINRES for real symmetric
+        ones and GMRES otherwise
+    :param str preconditioner: 'ilu', 'amg', 'block_jacobi' or 'jacobi'
+        (default is 'ilu', or 'jacobi' for CG and MINRES which need a
+        symmetric positive definite preconditioner)
+    :param float tol: relative residual tolerance
+    :param int maxiter: maximum number of iterations per solve
+    :param float drop_tol: drop tolerance of the ILU preconditioner
+    :param float fill_factor: fill factor of the ILU preconditioner
+    :param int block_size: block size of the block Jacobi preconditioner
+    :param bool log_residuals: keep the residual history of each solve
+        (costs an extra matrix-vector product per iteration for the methods
+        other than GMRES)
+    :param bool verbose: print the iterations and residual of each solve
+    """
+
+    name = 'iterative'
+    is_direct = False
+    options = BaseSolver.options + (
+        'method', 'preconditioner', 'tol', 'maxiter', 'drop_tol',
+        'fill_factor', 'block_size', 'log_residuals', 'verbose'
+    )
+
+    def __init__(
+        self, A, stats=None, matrix_type='general', method=None,
+        preconditioner=None, tol=1e-8, maxiter=1000, drop_tol=1e-4,
+        fill_factor=10., block_size=1000, log_residuals=False, verbose=False
+    ):
+        self.method = method
+        self.preconditioner = preconditioner
+        self.tol = tol
+        self.maxiter = maxiter
+        self.drop_tol = drop_tol
+        self.fill_factor = fill_factor
+        self.block_size = block_size
+        self.log_residuals = log_residuals
+        self.verbose = verbose
+        super(IterativeSolver, self).__init__(
+            A, stats=stats, matrix_type=matrix_type
+        )
+
+    def _factor(self, A):
+        if self.method is None:
+            if self.matrix_type == 'spd':
+                self.method = 'cg'
+            elif self.matrix_type == 'symmetric' and not np.iscomplexobj(A):
+                self.method = 'minres'
+            else:
+                self.method = 'gmres'
+        if self.preconditioner is None:
+            self.preconditioner = (
+                'jacobi' if self.method in ['cg', 'minres'] else 'ilu'
+            )
+        self.M = preconditioner(
+            A, kind=self.preconditioner, drop_tol=self.drop_tol,
+            fill_factor=self.fill_factor, block_size=self.block_size
+        )
+
+    def _refactor(self, A):
+        self._factor(A)
+        return True
+
+    def _solve1(self, b):
+        if np.iscomplexobj(b) and not np.iscomplexobj(self.A):
+            return self._solve1(b.real) + 1j*self._solve1(b.imag)
+
+        A = self.A
+        b = b.astype(A.dtype, copy=False)
+        bnorm = np.linalg.norm(b)
+        history = []
+
+        kwargs = {_krylov_tol_kwarg(): self.tol, 'maxiter': self.maxiter}
+        if self.method == 'gmres':
+            # the preconditioned residual norm is available for free
+            kwargs['callback_type'] = 'pr_norm'
+            kwargs['callback'] = history.append
+        elif self.log_residuals:
+            kwargs['callback'] = lambda xk: history.append(
+                np.linalg.norm(b - A*xk) / bnorm
+            )
+        else:
+            kwargs['callback'] = lambda xk: history.append(None)
+
+        x, info = getattr(spla, self.method)(A, b, M=self.M, **kwargs)
+
+        residual = np.linalg.norm(b - A*x) / bnorm if bnorm > 0 else 0.
+        self.stats.iterations.append(len(history))
+        self.stats.residuals.append(residual)
+        if self.log_residuals:
+            self.stats.residual_history.append(np.array(history))
+
+        if self.verbose:
+            print(
+                "   {} ({}): {} iterations, relative residual {:1.2e}".format(
+                    self.method, self.preconditioner, len(history), residual
+                )
+            )
+
+        if info != 0:
+            raise Exception(
+                "{} did not converge to {} in {} iterations (relative "
+                "residual {:1.2e})".format(
+                    self.method, self.tol, self.maxiter, residual
+                )
+            )
+        return x
+
+    def _solve(self, rhs):
+        if rhs.ndim == 1:
+            return self._solve1(rhs)
+        return np.column_stack(
+            [self._solve1(rhs[:, i]) for i in range(rhs.shape[1])]
+        )
+
+    def clean(self):
+        self.M = None
+
+
+# registry of the solver backends, in order of preference for direct solves
+SOLVERS = {}
+DIRECT_SOLVER_PREFERENCE = ['pardiso', 'umfpack', 'superlu']
+SPD_SOLVER_PREFERENCE = ['pardiso', 'cholmod', 'umfpack', 'superlu']
+
+
+def register_solver(Solver):
+    """
+    Add a solver backend to the registry so that simulations can choose it
+    by name
+
+    :param BaseSolver Solver: solver backend class
+    """
+    SOLVERS[Solver.name] = Solver
+    return Solver
+
+
+for _Solver in [
+    SuperLUSolver, PardisoSolver, UmfpackSolver, CholmodSolver,
+    IterativeSolver
+]:
+    register_solver(_Solver)
+
+
+def available_solvers():
+    """
+    names of the solver backends that can be used on this machine
+
+    :rtype: list
+    """
+    return ['auto', 'default'] + sorted(
+        name for name, Solver in SOLVERS.items() if Solver.available
+    )
+
+
+def select_solver(
+    A, matrix_type='auto', memory_fraction=0.5, fill_factor=None,
+    min_size=5000
+):
+    """
+    Choose a solver backend from the size and type of the matrix and the
+    available memory. Small systems use SuperLU, larger ones the preferred
+    direct solver that is installed (a Cholesky solver for 'spd' matrices if
+    one is available), and systems whose estimated factors do not fit in the
+    given fraction of the available memory use a preconditioned iterative
+    solver (CG for 'spd' matrices, MINRES for real symmetric matrices, GMRES
+    otherwise).
+
+    :param scipy.sparse.spmatrix A: system matrix
+    :param str matrix_type: type of the matrix (see :data:`MATRIX_TYPES`),
+        'auto' to detect it
+    :param float memory_fraction: fraction of the available memory the
+        factors may use
+    :param float fill_factor: fill factor for the memory estimate
+    :param int min_size: systems smaller than this use SuperLU
+    :rtype: tuple
+    :return: (solver backend class, dictionary of options for it)
+    """
+    if matrix_type == 'auto':
+        matrix_type = globals()['matrix_type'](A)
+    opts = {'matrix_type': matrix_type}
+
+    if A.shape[0] < min_size:
+        return SuperLUSolver, opts
+
+    memory = available_memory()
+    if (
+        memory is None or
+        estimate_factor_memory(A, fill_factor, matrix_type) <
+        memory_fraction * memory
+    ):
+        preference = (
+            SPD_SOLVER_PREFERENCE if matrix_type == 'spd' else
+            DIRECT_SOLVER_PREFERENCE
+        )
+        for name in preference:
+            if SOLVERS[name].available:
+                return SOLVERS[name], opts
+
+    # the iterative solver picks its Krylov method from the matrix type
+    return IterativeSolver, opts
+
+
+class AutoSolver(BaseSolver):
+    """
+    Solver that picks its backend with :func:`select_solver` once it sees the
+    matrix. Options are passed on to the backend if it accepts them.
+
+    :param str matrix_type: type of the matrix (see :data:`MATRIX_TYPES`),
+        detected once if 'auto'
+    :param float memory_fraction: fraction of the available memory the
+        factors may use
+    :param float fill_factor: fill factor for the memory estimate
+    """
+
+    name = 'auto'
+
+    def __init__(
+        self, A, stats=None, matrix_type='auto', memory_fraction=0.5,
+        fill_factor=None, **kwargs
+    ):
+        Solver, opts = select_solver(
+            sp.csc_matrix(A), matrix_type=matrix_type,
+            memory_fraction=memory_fraction, fill_factor=fill_factor
+        )
+        opts.update(
+            {key: val for key, val in kwargs.items() if key in Solver.options}
+        )
+        self.backend = Solver(A, stats=stats, **opts)
+        self.A = self.backend.A
+        self.stats = self.backend.stats
+
+    def refactor(self, A):
+        return self.backend.refactor(A)
+
+    def solve(self, rhs):
+        return self.backend.solve(rhs)
+
+    def clean(self):
+        self.backend.clean()
+
+
+def default_solver():
+    """
+    The solver backend simulations use unless another one is chosen:
+    Pardiso if pymatsolver is installed, SuperLU (as SimPEG's SolverLU)
+    otherwise
+
+    :rtype: BaseSolver
+    """
+    return PardisoSolver if PardisoSolver.available else SuperLUSolver
+
+
+def get_solver(name='default'):
+    """
+    Get a solver backend class by name
+
+    :param str name: name of the backend ('default' for
+        :func:`default_solver`, 'auto' to choose one from the matrix)
+    :rtype: BaseSolver
+    """
+    if name == 'default':
+        return default_solver()
+    if name == 'auto':
+        return AutoSolver
+    if name not in SOLVERS:
+        raise KeyError(
+            "unknown solver {}, the registered solvers are {}".format(
+                name, sorted(SOLVERS.keys())
+            )
+        )
+    if not SOLVERS[name].available:
+        raise ImportError(
+            "the {} solver backend is not installed, the available solvers "
+            "are {}".format(name, available_solvers())
+        )
+    return SOLVERS[name]
+
+
+class SweepSolver(object):
+    """
+    Factor a sequence of sparse matrices that share a sparsity pattern (for
+    example the FDEM system matrix at each frequency of a sweep). For the
+    backends that can re-factor (Pardiso, CHOLMOD), the reordering and
+    symbolic analysis are done for the first matrix and reused for every
+    matrix with the same pattern that follows; only the numeric
+    factorization is repeated. The other backends factor each matrix from
+    scratch.
+
+    :param BaseSolver Solver: solver backend class (default is SuperLU)
+    :param SolverStats stats: counters to update with the work done
+    """
+
+    def __init__(self, Solver=None, stats=None, **solverOpts):
+        self.Solver = Solver if Solver is not None else SuperLUSolver
+        self.stats = stats if stats is not None else SolverStats()
+        self.solverOpts = solverOpts
+        self._Ainv = None
+
+    def factor(self, A):
+        """
+        Numerically factor the matrix A, re-using the analysis of the previous
+        matrix if the sparsity pattern is unchanged
+
+        :param scipy.sparse.spmatrix A: matrix to factor
+        """
+        if self.solverOpts.get('matrix_type') == 'auto':
+            # detect the type once for the whole sequence
+            self.solverOpts['matrix_type'] = matrix_type(A)
+        if self._Ainv is None or not self._Ainv.refactor(A):
+            self.clean()
+            self._Ainv = self.Solver(A, stats=self.stats, **self.solverOpts)
+        return self
+
+    def solve(self, rhs):
+        """
+        Solve the factored system for the right hand side(s) provided
+
+        :param numpy.ndarray rhs: right hand side (vector or array with a
+            column per source)
+        :rtype: numpy.ndarray
+        """
+        if self._Ainv is None:
+            raise Exception("factor a matrix before solving")
+        return self._Ainv.solve(rhs)
+
+    def __mul__(self, rhs):
+        return self.solve(rhs)
+
+    def clean(self):
+        """
+        Release the factors
+        """
+        if self._Ainv is not None:
+            self._Ainv.clean()
+        self._Ainv = None
@@ -0,0 +1,408 @@
+import itertools
+import multiprocessing
+import time
+import numpy as np
+import properties
+
+from discretize import utils
+
+from .run import BaseSimulation
+from .solvers import SolverStats, ThreadLimits, worker_threads
+from .adaptive import casing_currents
+
+
+# model parameters that change only the physical properties: runs that differ
+# only by these share the mesh (and its operators) and the source
+PHYSICAL_PROPERTIES = [
+    'sigma_back', 'mur_back', 'sigma_air', 'sigma_layer', 'sigma_casing',
+    'sigma_inside', 'mur_casing'
+]
+
+# properties of the casing cells only: runs that differ only by these can be
+# solved as low-rank updates of one factorization
+CASING_PROPERTIES = ['sigma_casing', 'sigma_inside', 'mur_casing']
+
+
+def _hashable(value):
+    """
+    hashable version of a parameter value (arrays become tuples)
+    """
+    if np.ndim(value) > 0:
+        return tuple(float(v) for v in np.ravel(value))
+    if isinstance(value, (bool, str)):
+        return value
+    return float(value)
+
+
+def expand_grid(parameters):
+    """
+    All the combinations of the values of the parameters, without
+    duplicates
+
+    :param dict parameters: values of each parameter, keyed by name
+    :rtype: list
+    :return: configurations, each a tuple of sorted (name, value) pairs
+    """
+    names = sorted(parameters.keys())
+    configurations, seen = [], set()
+    for values in itertools.product(*[parameters[name] for name in names]):
+        configuration = tuple(
+            (name, _hashable(value)) for name, value in zip(names, values)
+        )
+        if configuration not in seen:
+            seen.add(configuration)
+            configurations.append(configuration)
+    return configurations
+
+
+def mesh_key(configuration):
+    """
+    parameters of a configuration that may change the mesh or the source
+
+    :param tuple configuration: sorted (name, value) pairs
+    :rtype: tuple
+    """
+    return tuple(
+        (name, value) for name, value in configuration
+        if name not in PHYSICAL_PROPERTIES
+    )
+
+
+def casing_key(configuration):
+    """
+    parameters of a configuration other than the casing properties
+
+    :param tuple configuration: sorted (name, value) pairs
+    :rtype: tuple
+    """
+    return tuple(
+        (name, value) for name, value in configuration
+        if name not in CASING_PROPERTIES
+    )
+
+
+def plan_jobs(configurations, num_workers=1):
+    """
+    Order the configurations so that the runs sharing a mesh (and, among
+    them, the runs differing only by the casing properties) are done one
+    after the other, and group them into jobs. Each job shares one mesh and
+    one source. Jobs are split (in halves of the largest one) until there
+    is one per worker.
+
+    :param list configurations: configurations (see :func:`expand_grid`)
+    :param int num_workers: number of worker processes
+    :rtype: list
+    :return: jobs, each a list of configurations with the same mesh
+    """
+    ordered = sorted(
+        configurations, key=lambda config: (
+            mesh_key(config), casing_key(config), config
+        )
+    )
+    jobs = [
+        list(group) for _, group in itertools.groupby(ordered, key=mesh_key)
+    ]
+    while len(jobs) < num_workers:
+        largest = max(range(len(jobs)), key=lambda i: len(jobs[i]))
+        job = jobs[largest]
+        if len(job) < 2:
+            break
+        half = len(job) // 2
+        jobs[largest:largest+1] = [job[:half], job[half:]]
+    return jobs
+
+
+def _run_job(
+    template, job, freqs, observable, save_fields, low_rank=False
+):
+    """
+    Run the configurations of a job sharing one mesh generator (and so one
+    mesh and its operators) and one source. With :code:`low_rank`,
+    configurations that differ only by the casing properties are solved as
+    low-rank updates of the factorization of the first of them.
+
+    :rtype: tuple
+    :return: (observables of each configuration, solver stats summary)
+    """
+    meshGenerator = template.meshGenerator.copy()
+    src = template.src.copy()
+    kwargs = {
+        key: getattr(template, key) for key in template._props
+        if key not in ['modelParameters', 'meshGenerator', 'src'] and
+        getattr(template, key) is not None
+    }
+
+    results = []
+    total = SolverStats()
+    reference, solvers, stats = None, None, SolverStats()
+    for configuration in job:
+        modelParameters = template.modelParameters.copy()
+        for name, value in configuration:
+            setattr(modelParameters, name, value)
+        if freqs is not None:
+            modelParameters.freqs = freqs
+
+        directory = template.directory
+        if save_fields:
+            directory = '/'.join([directory, run_name(configuration)])
+
+        sim = template.__class__(
+            modelParameters=modelParameters,
+            meshGenerator=meshGenerator,
+            src=src,
+            **dict(kwargs, directory=directory)
+        )
+
+        if low_rank:
+            key = casing_key(configuration)
+            if key != reference:
+                for solver in (solvers or {}).values():
+                    solver.clean()
+                reference = key
+                solvers = sim.casing_update_solvers(stats=stats)
+            sim.update_solvers = solvers
+
+        if save_fields:
+            fields = sim.run()
+        else:
+            fields = sim.compute_fields()
+        results.append(
+            np.vstack([
+                utils.mkvc(observable(sim, fields, s))
+                for s in sim.survey.srcList
+            ])
+        )
+        total.add(sim.solver_stats)
+
+    for solver in (solvers or {}).values():
+        solver.clean()
+    total.add(stats)
+    return results, total.summary
+
+
+def _run_sweep_job(args):
+    """
+    Worker of the parameter sweep: re-build the template simulation from its
+    serialized parameters and run a job
+
+    :param tuple args: (serialized simulation, job, frequencies, observable,
+        save the fields?, use low-rank updates?)
+    :rtype: tuple
+    """
+    jsondict, job, freqs, observable, save_fields, low_rank = args
+    template = properties.HasProperties.deserialize(
+        dict(jsondict, num_workers=1), trusted=True
+    )
+    with ThreadLimits(template.num_threads):
+        return _run_job(
+            template, job, freqs, observable, save_fields, low_rank
+        )
+
+
+def run_name(configuration):
+    """
+    name of the directory a run is saved to
+
+    :param tuple configuration: sorted (name, value) pairs
+    :rtype: str
+    """
+    return '_'.join(
+        '{}{}'.format(
+            name, '-'.join(
+                '{:g}'.format(v) for v in np.atleast_1d(value)
+            ) if not isinstance(value, str) else value
+        )
+        for name, value in configuration
+    )
+
+
+class ParameterSweep(properties.HasProperties):
+    """
+    Sweep of a simulation over a grid of model parameters (any property of
+    the :code:`model.CasingIn*` classes) and frequencies. Duplicate
+    configurations are run once. Runs that differ only by physical
+    properties (see :code:`PHYSICAL_PROPERTIES`) share one mesh and one
+    source, and are run one after the other in the same process so the mesh
+    operators are built once. Jobs run on a pool of :code:`num_workers`
+    processes. All the frequencies of a configuration are solved in one
+    simulation, so the frequency options of the template simulation (for
+    example :code:`reuse_analysis`) apply. With :code:`low_rank=True`,
+    sweeps over the casing properties factor the system once per frequency
+    and solve each configuration as a low-rank update restricted to the
+    unknowns of the casing cells.
+
+    .. code:: python
+
+        sweep = ParameterSweep(
+            simulation=simulation,
+            parameters={'mur_casing': [1., 50., 100.]},
+            freqs=np.r_[0.1, 1., 10.],
+            num_workers=3
+        )
+        results = sweep.run()
+        currents = sweep.results_by('mur_casing')
+    """
+
+    simulation = properties.Instance(
+        "template simulation (its mesh generator, source, model and solver "
+        "options are used for every run)",
+        BaseSimulation,
+        required=True
+    )
+
+    parameters = properties.Dictionary(
+        "values of the model parameters to sweep, keyed by property name",
+        required=True
+    )
+
+    freqs = properties.Array(
+        "frequencies solved for each configuration (default is the "
+        "frequencies of the template model)",
+        dtype=float,
+        required=False
+    )
+
+    num_workers = properties.Integer(
+        "number of worker processes the jobs are split across",
+        default=1,
+        min=1
+    )
+
+    low_rank = properties.Bool(
+        "solve configurations that differ only by the casing properties "
+        "(see CASING_PROPERTIES) as low-rank (Woodbury) updates of one "
+        "factorization per frequency (FDEM simulations only)?",
+        default=False
+    )
+
+    save_fields = properties.Bool(
+        "save each run (parameters and fields) in a sub-directory of the "
+        "simulation directory?",
+        default=False
+    )
+
+    verbose = properties.Bool(
+        "print the progress of the sweep?",
+        default=False
+    )
+
+    @properties.validator('parameters')
+    def _check_parameters(self, change):
+        if self.simulation is None:
+            return
+        modelParameters = self.simulation.modelParameters
+        for name in change['value'].keys():
+            if name not in modelParameters._props:
+                raise properties.ValidationError(
+                    "{} is not a property of {}".format(
+                        name, type(modelParameters).__name__
+                    )
+                )
+            if name == 'freqs':
+                raise properties.ValidationError(
+                    "frequencies are swept with the freqs property"
+                )
+
+    @property
+    def configurations(self):
+        """
+        configurations of the sweep, without duplicates
+
+        :rtype: list
+        """
+        return expand_grid(self.parameters)
+
+    def run(self, observable=None):
+        """
+        Run the sweep
+
+        :param callable observable: function of (simulation, fields, src)
+            returning a vector (default is the casing currents,
+            :func:`casingSimulations.adaptive.casing_currents`). It must be
+            defined at the module level to be used by worker processes.
+        :rtype: dict
+        :return: observables of each configuration (a row per source),
+            keyed by configuration
+        """
+        self.validate()
+        if observable is None:
+            observable = casing_currents
+
+        configurations = self.configurations
+        jobs = plan_jobs(configurations, self.num_workers)
+        num_workers = min(self.num_workers, len(jobs))
+        if self.verbose:
+            print(
+                'Sweeping {} configurations ({} meshes) in {} jobs on {} '
+                'processes'.format(
+                    len(configurations),
+                    len(set(mesh_key(config) for config in configurations)),
+                    len(jobs), num_workers
+                )
+            )
+
+        t = time.time()
+        if num_workers == 1:
+            with ThreadLimits(self.simulation.num_threads):
+                results = [
+                    _run_job(
+                        self.simulation, job, self.freqs, observable,
+                        self.save_fields, self.low_rank
+                    ) for job in jobs
+                ]
+        else:
+            jsondict = dict(
+                self.simulation.serialize(),
+                num_threads=worker_threads(
+                    self.simulation.num_threads, num_workers
+                )
+            )
+            pool = multiprocessing.Pool(processes=num_workers)
+            try:
+                results = pool.map(
+                    _run_sweep_job,
+                    [
+                        (
+                            jsondict, job, self.freqs, observable,
+                            self.save_fields, self.low_rank
+                        ) for job in jobs
+                    ],
+                    chunksize=1
+                )
+            finally:
+                pool.close()
+                pool.join()
+        if self.verbose:
+            print('   ... Done. Elapsed time : {}'.format(time.time()-t))
+
+        stats = SolverStats()
+        self.results = {}
+        for job, (values, summary) in zip(jobs, results):
+            self.results.update(zip(job, values))
+            stats.add(summary)
+        self.solver_stats = stats.summary
+        return self.results
+
+    def results_by(self, name):
+        """
+        Results keyed by the value of one parameter (the others must take a
+        single value), for example to plot them with
+        :func:`casingSimulations.physics.plot_currents_over_mu`
+
+        :param str name: name of the parameter
+        :rtype: dict
+        """
+        results = getattr(self, 'results', None)
+        if results is None:
+            raise Exception("run the sweep first")
+        by_value = {}
+        for configuration, values in results.items():
+            value = dict(configuration)[name]
+            if value in by_value:
+                raise Exception(
+                    "parameters other than {} take several values".format(
+                        name
+                    )
+                )
+            by_value[value] = values
+        return by_value
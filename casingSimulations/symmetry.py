@@ -0,0 +1,172 @@
+import numpy as np
+import scipy.sparse as sp
+
+from .solvers import SolverStats, SuperLUSolver
+
+
+# components of each field that change sign under a reflection through a
+# plane normal to y (or theta): the normal component of vectors (e, j) and
+# the tangential components of pseudo-vectors (h, b)
+ODD_COMPONENTS = {
+    'e': [1],
+    'j': [1],
+    'h': [0, 2],
+    'b': [0, 2],
+    'phi': [],
+}
+
+
+def mirror_map(
+    locations, plane, components=None, odd_components=(), cylindrical=False,
+    decimals=8
+):
+    """
+    Mirror image of each unknown through a plane normal to y (or, on a
+    cylindrical mesh, through the plane at the azimuth provided) and the
+    sign it takes there
+
+    :param numpy.ndarray locations: locations of the unknowns, (x, y, z) or
+        (r, theta, z)
+    :param float plane: y (or azimuth) of the plane
+    :param numpy.ndarray components: component of each unknown (default is
+        a single component)
+    :param list odd_components: components that change sign
+    :param bool cylindrical: are the locations cylindrical coordinates?
+    :param int decimals: decimals the coordinates are rounded to when they
+        are compared
+    :rtype: tuple
+    :return: (index of the mirror image, sign)
+    """
+    locations = np.asarray(locations, dtype=float)
+    n = len(locations)
+    if components is None:
+        components = np.zeros(n, dtype=int)
+
+    mirrored = locations.copy()
+    mirrored[:, 1] = 2*plane - locations[:, 1]
+
+    def keys(loc):
+        loc = loc.copy()
+        if cylindrical:
+            loc[:, 1] = np.mod(loc[:, 1], 2*np.pi)
+            loc[:, 1][np.isclose(loc[:, 1], 2*np.pi)] = 0.
+        return np.c_[components, np.round(loc, decimals=decimals)]
+
+    _, inverse = np.unique(
+        np.vstack([keys(locations), keys(mirrored)]), axis=0,
+        return_inverse=True
+    )
+    inverse = np.ravel(inverse)
+    index_of = -np.ones(inverse.max() + 1, dtype=int)
+    index_of[inverse[:n]] = np.arange(n)
+    mirror = index_of[inverse[n:]]
+    if np.any(mirror < 0):
+        raise Exception(
+            "The mesh is not symmetric about the plane at {}, the half "
+            "domain can not be used".format(plane)
+        )
+
+    sign = np.ones(n)
+    sign[np.isin(components, list(odd_components))] = -1.
+    return mirror, sign
+
+
+def half_basis(mirror, sign):
+    """
+    Basis of the mirror-symmetric vectors: each column is an unknown and
+    its mirror image (with its sign). Unknowns on the plane that change sign
+    are zero.
+
+    :param numpy.ndarray mirror: index of the mirror image of each unknown
+    :param numpy.ndarray sign: sign of the mirror image
+    :rtype: scipy.sparse.csr_matrix
+    """
+    n = len(mirror)
+    index = np.arange(n)
+    keep = (index < mirror) | ((index == mirror) & (sign > 0))
+    representatives = index[keep]
+    images = mirror[keep]
+    columns = np.arange(len(representatives))
+
+    off_plane = images != representatives
+    rows = np.hstack([representatives, images[off_plane]])
+    cols = np.hstack([columns, columns[off_plane]])
+    vals = np.hstack([
+        np.ones(len(representatives)), sign[representatives][off_plane]
+    ])
+    return sp.csr_matrix((vals, (rows, cols)), shape=(n, len(columns)))
+
+
+class MirrorSymmetricSolver(object):
+    """
+    Solve a system that is symmetric under a reflection (the model and the
+    mesh are mirror symmetric) for mirror-symmetric sources on half of the
+    domain. The solution is mirror symmetric too, so it is sought in the
+    basis P of the symmetric vectors (:func:`half_basis`), which imposes the
+    symmetry conditions on the plane: the reduced system
+    :math:`P^T A P y = P^T b` has half the unknowns, and the solution is
+    mirrored back, :math:`x = P y`.
+
+    :param scipy.sparse.spmatrix A: system matrix
+    :param numpy.ndarray mirror: index of the mirror image of each unknown
+    :param numpy.ndarray sign: sign of the mirror image
+    :param BaseSolver Solver: solver backend class (default is SuperLU)
+    :param SolverStats stats: counters to update with the work done
+    :param float tol: relative tolerance of the symmetry of the source
+    """
+
+    def __init__(
+        self, A, mirror, sign, Solver=None, stats=None, tol=1e-8,
+        **solverOpts
+    ):
+        self.mirror = np.asarray(mirror, dtype=int)
+        self.sign = np.asarray(sign, dtype=float)
+        self.Solver = Solver if Solver is not None else SuperLUSolver
+        self.stats = stats if stats is not None else SolverStats()
+        self.tol = tol
+
+        self.P = half_basis(self.mirror, self.sign)
+        self._Ainv = self.Solver(
+            (self.P.T * sp.csr_matrix(A) * self.P).tocsc(), stats=self.stats,
+            **solverOpts
+        )
+
+    @property
+    def n_half(self):
+        """
+        number of unknowns of the half domain
+        """
+        return self.P.shape[1]
+
+    def solve(self, b):
+        """
+        Solve the system for mirror-symmetric right hand side(s)
+
+        :param numpy.ndarray b: right hand side (vector or array with a column
+            per source)
+        :rtype: numpy.ndarray
+        """
+        b = np.asarray(b)
+        shape = b.shape
+        b = b.reshape(shape[0], -1)
+
+        mirrored = self.sign[:, None] * b[self.mirror]
+        if np.linalg.norm(mirrored - b) > self.tol * np.linalg.norm(b):
+            raise Exception(
+                "The source is not mirror symmetric, the half domain can not "
+                "be used"
+            )
+
+        y = np.asarray(self._Ainv * (self.P.T * b)).reshape(self.n_half, -1)
+        return (self.P * y).reshape(shape)
+
+    def __mul__(self, b):
+        return self.solve(b)
+
+    def clean(self):
+        """
+        Release the factors
+        """
+        if self._Ainv is not None:
+            self._Ainv.clean()
+        self._Ainv = None
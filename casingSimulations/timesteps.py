@@ -0,0 +1,186 @@
+import numpy as np
+import properties
+
+
+def predict_cost(timeSteps, dt_threshold=1e-8):
+    """
+    Predict the work done by a TDEM simulation with the time steps provided:
+    the system matrix is factored for the first step and every time the step
+    size changes (by more than dt_threshold, as in SimPEG), and there is one
+    solve per step.
+
+    :param numpy.ndarray timeSteps: time steps (s)
+    :param float dt_threshold: step sizes closer than this are the same
+    :rtype: dict
+    """
+    timeSteps = np.asarray(timeSteps, dtype=float)
+    changes = np.abs(np.diff(timeSteps)) > dt_threshold
+    distinct = [timeSteps[0]] + list(timeSteps[1:][changes])
+    return {
+        'n_factorizations': int(1 + changes.sum()),
+        'n_solves': len(timeSteps),
+        'n_distinct_dt': len(np.unique(np.round(distinct, 12))),
+        'total_time': timeSteps.sum(),
+    }
+
+
+class TimeStepPlanner(properties.HasProperties):
+    """
+    Plan the time steps of a TDEM simulation from the times at which the
+    fields are needed. For backward Euler, the relative error of the
+    response decaying at time t is controlled by :math:`\\Delta t / t`, so
+    the step size may grow with time. To keep the number of factorizations
+    low (one per distinct step size), the steps are constant over blocks and
+    grow by a ratio r from one block to the next: a block with step
+    :math:`\\Delta t` lasts until :math:`r \\Delta t` is below
+    :code:`accuracy` times the time. Larger ratios need fewer
+    factorizations but more steps; the ratio minimizing the predicted cost
+    (factorizations weighted by :code:`factorization_cost`, plus solves) is
+    chosen.
+
+    .. code:: python
+
+        planner = TimeStepPlanner(output_times=np.logspace(-5, -2, 31))
+        planner.plan()
+        modelParameters.timeSteps = planner.steps
+    """
+
+    output_times = properties.Array(
+        "times (s) at which the fields are needed",
+        dtype=float,
+        required=True
+    )
+
+    t_min = properties.Float(
+        "earliest time (s) at which the fields need to be accurate (default "
+        "is the earliest output time)",
+        min=0.,
+        required=False
+    )
+
+    accuracy = properties.Float(
+        "target accuracy: maximum ratio of the time step to the time",
+        default=0.05,
+        min=0.
+    )
+
+    factorization_cost = properties.Float(
+        "cost of a factorization relative to a solve",
+        default=20.,
+        min=0.
+    )
+
+    ratios = properties.Array(
+        "candidate ratios between the step sizes of successive blocks",
+        dtype=float,
+        default=np.r_[1.5, 2., 3., 4., 5., 8., 10.]
+    )
+
+    @property
+    def earliest_time(self):
+        """
+        earliest time at which the fields need to be accurate
+        """
+        if self.t_min is not None:
+            return self.t_min
+        return self.output_times.min()
+
+    def steps_for_ratio(self, ratio):
+        """
+        Blocks of constant time steps growing by the ratio provided
+
+        :param float ratio: ratio between the step sizes of successive blocks
+        :rtype: list
+        :return: list of (step size, number of steps) tuples
+        """
+        t_end = self.output_times.max()
+        dt = self.accuracy * self.earliest_time
+        t = 0.
+        steps = []
+        while t < t_end * (1. - 1e-10):
+            t_switch = min(ratio * dt / self.accuracy, t_end)
+            n = max(int(np.ceil((t_switch - t) / dt - 1e-10)), 1)
+            steps.append((dt, n))
+            t += n * dt
+            dt *= ratio
+        return steps
+
+    def cost(self, steps):
+        """
+        Predicted cost of the steps, in solves
+
+        :param list steps: list of (step size, number of steps) tuples
+        :rtype: float
+        """
+        return (
+            self.factorization_cost * len(steps) +
+            sum([n for _, n in steps])
+        )
+
+    def plan(self, verbose=False):
+        """
+        Choose the ratio between blocks that minimizes the predicted cost
+
+        :param bool verbose: print the plan?
+        :rtype: list
+        :return: list of (step size, number of steps) tuples
+        """
+        self.validate()
+        costs = [self.cost(self.steps_for_ratio(r)) for r in self.ratios]
+        self._ratio = self.ratios[np.argmin(costs)]
+        self._steps = self.steps_for_ratio(self._ratio)
+        if verbose:
+            print(self.info)
+        return self._steps
+
+    @property
+    def ratio(self):
+        """
+        ratio between the step sizes of successive blocks of the plan
+        """
+        if getattr(self, '_steps', None) is None:
+            self.plan(verbose=False)
+        return self._ratio
+
+    @property
+    def steps(self):
+        """
+        planned time steps as a list of (step size, number of steps) tuples
+        (the format of :code:`modelParameters.timeSteps`)
+        """
+        if getattr(self, '_steps', None) is None:
+            self.plan(verbose=False)
+        return self._steps
+
+    @property
+    def timeSteps(self):
+        """
+        planned time steps
+
+        :rtype: numpy.ndarray
+        """
+        return np.hstack([dt * np.ones(n) for dt, n in self.steps])
+
+    @property
+    def predicted(self):
+        """
+        predicted number of factorizations and solves of the plan
+
+        :rtype: dict
+        """
+        return predict_cost(self.timeSteps)
+
+    @property
+    def info(self):
+        predicted = self.predicted
+        info = "\n ---- Time steps ---- "
+        info += "\n\n   {} blocks of constant steps, ratio {}".format(
+            len(self.steps), self.ratio
+        )
+        for dt, n in self.steps:
+            info += "\n      {:4d} steps of {:1.3e} s".format(n, dt)
+        info += (
+            "\n   predicted: {n_factorizations} factorizations, {n_solves} "
+            "solves, total time {total_time:1.3e} s".format(**predicted)
+        )
+        return info
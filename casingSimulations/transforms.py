@@ -0,0 +1,228 @@
+import numpy as np
+from scipy.special import factorial
+
+from . import physics
+
+
+# methods to invert the Laplace transform and source waveforms they apply to
+LAPLACE_METHODS = ['talbot', 'stehfest']
+WAVEFORMS = ['impulse', 'step-on', 'step-off']
+
+# formulations the casing currents are computed from
+CURRENT_FORMULATIONS = ['h', 'j']
+
+# smallest shift (rad/s) the DC response of the 'step-off' waveform is
+# approximated at
+MIN_DC_SHIFT = 1e-8
+
+
+def stehfest_weights(n=14):
+    """
+    Weights of the Gaver-Stehfest inversion of the Laplace transform
+
+    .. math::
+
+        f(t) \\approx \\frac{\\ln 2}{t} \\sum_{k=1}^{n} V_k
+        F\\left(\\frac{k \\ln 2}{t}\\right)
+
+    The shifts are real, so the FDEM systems are solved at real Laplace
+    frequencies. In double precision, n should be even and no more than
+    about 16.
+
+    :param int n: number of terms (even)
+    :rtype: numpy.ndarray
+    """
+    if n % 2:
+        raise ValueError("n must be even for the Gaver-Stehfest method")
+    half = n // 2
+    V = np.zeros(n)
+    for k in range(1, n + 1):
+        for j in range((k + 1) // 2, min(k, half) + 1):
+            V[k - 1] += (
+                j**half * factorial(2*j) / (
+                    factorial(half - j) * factorial(j) * factorial(j - 1) *
+                    factorial(k - j) * factorial(2*j - k)
+                )
+            )
+        V[k - 1] *= (-1)**(k + half)
+    return V
+
+
+def talbot_nodes(n=24):
+    """
+    Nodes and weights of the fixed Talbot contour (Abate and Whitt, 2006)
+    for the inversion of the Laplace transform
+
+    .. math::
+
+        f(t) \\approx \\frac{2}{5 t} \\sum_{k=0}^{n-1}
+        \\mathrm{Re}\\left[\\gamma_k F\\left(\\frac{\\delta_k}{t}\\right)
+        \\right]
+
+    The shifts are complex, with positive real parts.
+
+    :param int n: number of nodes
+    :rtype: tuple
+    :return: (delta, gamma)
+    """
+    r = 2. * n / 5.
+    theta = np.pi * np.arange(1, n) / n
+    cot = 1. / np.tan(theta)
+
+    delta = np.hstack([r, r * theta * (cot + 1j)])
+    gamma = np.hstack([
+        0.5 * np.exp(r),
+        (1. + 1j * theta * (1. + cot**2) - 1j * cot) * np.exp(delta[1:])
+    ])
+    return delta, gamma
+
+
+def laplace_shifts(times, method='talbot', n=None):
+    """
+    Laplace-domain shifts s at which the response is needed to invert the
+    Laplace transform at the times provided. The shifts scale as 1/t, the
+    smallest is about 10/t ('talbot') or 0.7/t ('stehfest') for the latest
+    time t.
+
+    :param numpy.ndarray times: times (s)
+    :param str method: 'talbot' or 'stehfest'
+    :param int n: number of terms per time (default is 24 for 'talbot' and
+        14 for 'stehfest')
+    :rtype: numpy.ndarray
+    :return: shifts (a row per time)
+    """
+    times = np.atleast_1d(times).astype(float)
+    if method == 'talbot':
+        delta, _ = talbot_nodes(24 if n is None else n)
+        return delta[None, :] / times[:, None]
+    elif method == 'stehfest':
+        n = 14 if n is None else n
+        return (
+            np.log(2.) * np.arange(1, n + 1)[None, :] / times[:, None]
+        ).astype(complex)
+    raise KeyError(
+        "method must be one of {}, not {}".format(LAPLACE_METHODS, method)
+    )
+
+
+def laplace_inverse(values, times, method='talbot', n=None):
+    """
+    Invert the Laplace transform from its values at the shifts given by
+    :func:`laplace_shifts`
+
+    :param numpy.ndarray values: transform at the shifts (times x terms x
+        observables)
+    :param numpy.ndarray times: times (s)
+    :param str method: 'talbot' or 'stehfest'
+    :param int n: number of terms per time
+    :rtype: numpy.ndarray
+    :return: time-domain response (times x observables)
+    """
+    times = np.atleast_1d(times).astype(float)
+    values = np.asarray(values)
+    if method == 'talbot':
+        _, gamma = talbot_nodes(values.shape[1])
+        return (
+            0.4 / times[:, None] *
+            np.real((gamma[None, :, None] * values).sum(1))
+        )
+    elif method == 'stehfest':
+        V = stehfest_weights(values.shape[1])
+        return (
+            np.log(2.) / times[:, None] *
+            np.real((V[None, :, None] * values).sum(1))
+        )
+    raise KeyError(
+        "method must be one of {}, not {}".format(LAPLACE_METHODS, method)
+    )
+
+
+def time_domain_response(
+    response, times, method='talbot', n=None, waveform='step-off', dc=None,
+    dc_shift=None
+):
+    """
+    Time-domain response from a response in the Laplace domain. The
+    response is evaluated once at all the shifts needed (so the solves can
+    be batched or done in parallel) and then transformed. The response is
+    taken as the transfer function of a unit source, so the waveforms are
+
+    - 'impulse': :math:`F(s)`
+    - 'step-on': :math:`F(s) / s`
+    - 'step-off': :math:`(F(0) - F(s)) / s`, that is the DC response minus
+      the step-on response
+
+    :param callable response: function of an array of shifts returning the
+        response at each of them (a row per shift)
+    :param numpy.ndarray times: times (s)
+    :param str method: 'talbot' or 'stehfest'
+    :param int n: number of terms per time
+    :param str waveform: 'impulse', 'step-on' or 'step-off'
+    :param numpy.ndarray dc: DC response :math:`F(0)` for the 'step-off'
+        waveform (default is the response at :code:`dc_shift`)
+    :param float dc_shift: shift the DC response is approximated at if dc is
+        not provided (default is a million times smaller than the smallest
+        shift, and not smaller than :code:`MIN_DC_SHIFT`). This gives
+        :math:`F(0)` to a relative error of about
+        :math:`s_{dc} \tau` for the longest time constant :math:`\tau` of the
+        response, while the FDEM systems get more ill-conditioned as the
+        shift goes to zero.
+    :rtype: numpy.ndarray
+    :return: time-domain response (a row per time)
+    """
+    if waveform not in WAVEFORMS:
+        raise KeyError(
+            "waveform must be one of {}, not {}".format(WAVEFORMS, waveform)
+        )
+    times = np.atleast_1d(times).astype(float)
+    shifts = laplace_shifts(times, method=method, n=n)
+
+    s = shifts.ravel()
+    if waveform == 'step-off' and dc is None:
+        if dc_shift is None:
+            dc_shift = max(1e-6 * np.abs(s).min(), MIN_DC_SHIFT)
+        s = np.hstack([s, dc_shift])
+    values = np.asarray(response(s)).reshape(len(s), -1)
+    if waveform == 'step-off' and dc is None:
+        values, dc = values[:-1], values[-1]
+    values = values.reshape(shifts.shape + (values.shape[-1], ))
+
+    if waveform == 'impulse':
+        return laplace_inverse(values, times, method=method, n=n)
+
+    step_on = laplace_inverse(
+        values / shifts[:, :, None], times, method=method, n=n
+    )
+    if waveform == 'step-on':
+        return step_on
+    return np.real(np.asarray(dc)).reshape(1, -1) - step_on
+
+
+def casing_currents(simulation, u):
+    """
+    Default observable of the time-domain transform: the radial and
+    vertical currents in the casing (see
+    :func:`casingSimulations.physics.casing_currents`) computed from the
+    solution of an 'h' or 'j' formulation (one column per source). The e
+    and b formulations have the current density on the edges, not on the
+    faces the casing currents are summed over, provide an observable for
+    them.
+
+    :param casingSimulations.run.SimulationFDEM simulation: simulation
+    :param numpy.ndarray u: solution of the FDEM system
+    :rtype: numpy.ndarray
+    """
+    mesh = simulation.meshGenerator.mesh
+    u = np.asarray(u).reshape(u.shape[0], -1)
+    if simulation.formulation == 'h':
+        j = mesh.edgeCurl * u
+    elif simulation.formulation == 'j':
+        j = u
+    else:
+        raise ValueError(
+            "casing currents are computed from the {} formulations, "
+            "provide an observable for the {} formulation".format(
+                CURRENT_FORMULATIONS, simulation.formulation
+            )
+        )
+    return physics.casing_currents(simulation, j)
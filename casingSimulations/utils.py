@@ -194,20 +194,33 @@ def loadSimulationResults(
     directory=".",
     simulationParameters="simulationParameters.json",
     fields="fields.npy",
-    meshGenerator=None
+    meshGenerator=None,
+    mmap_mode=None
 ):
+    """
+    Load a simulation and its solution from a directory
+
+    :param str directory: working directory of the simulation
+    :param str simulationParameters: file with the simulation parameters
+    :param str fields: file with the solution
+    :param casingSimulations.mesh.BaseMeshGenerator meshGenerator: mesh
+        generator (default is the one of the simulation)
+    :param str mmap_mode: if set (e.g. 'r'), the solution is memory-mapped
+        rather than read into memory (see :func:`numpy.load`), for large
+        TDEM solutions streamed to disk
+    """
     print("Loading simulation in {}".format(directory))
 
     # load and populate the simulation
     simulation = load_properties(
-        os.path.sep.join([directory, "simulationParameters.json"]),
+        os.path.sep.join([directory, simulationParameters]),
     )
 
     simulation.prob.model = simulation.physprops.model
 
     # load up the numpy array of the soln
     print("   loading fields")
-    field = np.load(os.path.sep.join([directory, fields]))
+    field = np.load(os.path.sep.join([directory, fields]), mmap_mode=mmap_mode)
 
     if meshGenerator is None:
         meshGenerator = simulation.meshGenerator
@@ -0,0 +1,326 @@
+import numpy as np
+import properties
+from scipy.interpolate import CubicSpline
+
+
+# types of stored responses that can be convolved with a waveform
+RESPONSE_TYPES = ['step-off', 'impulse']
+
+
+class Waveform(properties.HasProperties):
+    """
+    Piecewise-linear transmitter waveform. The current is linear between the
+    nodes; a repeated time is an instantaneous jump. The current is zero
+    before the first node and after the last one, and the times are on the
+    same clock as the times at which the response is evaluated (usually the
+    end of the waveform is at t = 0).
+
+    .. code:: python
+
+        waveform = Waveform(
+            times=np.r_[-1e-2, -1e-2, -1e-3, 0.], currents=np.r_[0, 1, 1, 0]
+        )
+    """
+
+    times = properties.Array(
+        "times (s) of the nodes of the waveform",
+        dtype=float,
+        required=True
+    )
+
+    currents = properties.Array(
+        "normalized current at the nodes",
+        dtype=float,
+        required=True
+    )
+
+    @properties.validator
+    def _check_nodes(self):
+        if len(self.times) != len(self.currents):
+            raise properties.ValidationError(
+                "times and currents must have the same length, {} != "
+                "{}".format(len(self.times), len(self.currents))
+            )
+        if np.any(np.diff(self.times) < 0.):
+            raise properties.ValidationError(
+                "the times of the waveform must be increasing"
+            )
+
+    def eval(self, t):
+        """
+        current at the times provided (right-continuous at jumps)
+
+        :param numpy.ndarray t: times (s)
+        :rtype: numpy.ndarray
+        """
+        t = np.atleast_1d(t).astype(float)
+        times, currents = self.times, self.currents
+        ind = np.searchsorted(times, t, side='right')
+        current = np.zeros(len(t))
+        inside = (ind > 0) & (ind < len(times))
+        i = ind[inside]
+        dt = times[i] - times[i - 1]
+        w = (t[inside] - times[i - 1]) / np.where(dt > 0., dt, 1.)
+        current[inside] = (1. - w) * currents[i - 1] + w * currents[i]
+        return current
+
+    @property
+    def segments(self):
+        """
+        segments of the waveform, including the jumps to zero at its ends
+
+        :rtype: tuple
+        :return: (start times, end times, changes of the current)
+        """
+        times = np.r_[self.times[0], self.times, self.times[-1]]
+        currents = np.r_[0., self.currents, 0.]
+        dI = np.diff(currents)
+        keep = dI != 0.
+        return times[:-1][keep], times[1:][keep], dI[keep]
+
+
+def step_off(t_off=0.):
+    """
+    Step-off waveform: the current, on long enough for the fields to be at
+    DC, is switched off instantaneously at t_off. The response to it is the
+    step-off response itself.
+
+    :param float t_off: switch-off time (s)
+    :rtype: Waveform
+    """
+    return Waveform(times=np.r_[t_off - 1e10, t_off], currents=np.r_[1., 1.])
+
+
+def ramp_off(ramp_time, t_off=0., on_time=None):
+    """
+    Linear ramp from full current to zero ending at t_off
+
+    :param float ramp_time: duration of the ramp (s)
+    :param float t_off: end of the ramp (s)
+    :param float on_time: duration of the on-time before the ramp (default
+        is long enough for the fields to be at DC)
+    :rtype: Waveform
+    """
+    on_time = 1e10 if on_time is None else on_time
+    t_ramp = t_off - ramp_time
+    return Waveform(
+        times=np.r_[t_ramp - on_time, t_ramp, t_off],
+        currents=np.r_[1., 1., 0.]
+    )
+
+
+def trapezoid(ramp_on, on_time, ramp_off, t_off=0.):
+    """
+    Trapezoidal waveform: linear ramp on, constant on-time, linear ramp off
+    ending at t_off
+
+    :param float ramp_on: duration of the ramp on (s)
+    :param float on_time: duration of the constant on-time (s)
+    :param float ramp_off: duration of the ramp off (s)
+    :param float t_off: end of the ramp off (s)
+    :rtype: Waveform
+    """
+    t = t_off - np.cumsum([ramp_off, on_time, ramp_on])[::-1]
+    return Waveform(
+        times=np.r_[t, t_off], currents=np.r_[0., 1., 1., 0.]
+    )
+
+
+def half_sine(duration, t_off=0., n=64):
+    """
+    Half-sine pulse ending at t_off, sampled at n intervals
+
+    :param float duration: duration of the pulse (s)
+    :param float t_off: end of the pulse (s)
+    :param int n: number of linear segments
+    :rtype: Waveform
+    """
+    phase = np.linspace(0., np.pi, n + 1)
+    return Waveform(
+        times=t_off - duration + phase / np.pi * duration,
+        currents=np.sin(phase)
+    )
+
+
+def bipolar(on_time, off_time, ramp_time=0., n_cycles=1, t_off=0.):
+    """
+    Bipolar square wave: positive on-time, off-time, negative on-time and
+    off-time, repeated n_cycles times. The last negative pulse ends at t_off.
+
+    :param float on_time: duration of each pulse (s)
+    :param float off_time: duration of the off-time after each pulse (s)
+    :param float ramp_time: duration of the linear ramp off of each pulse
+        (the ramp on is instantaneous)
+    :param int n_cycles: number of cycles
+    :param float t_off: end of the last pulse (s)
+    :rtype: Waveform
+    """
+    period = 2. * (on_time + off_time)
+    t_start = t_off - on_time - (n_cycles - 1) * period - period / 2.
+    times, currents = [], []
+    for i in range(2 * n_cycles):
+        t0 = t_start + i * period / 2.
+        sign = 1. if i % 2 == 0 else -1.
+        times += [t0, t0, t0 + on_time - ramp_time, t0 + on_time]
+        currents += [0., sign, sign, 0.]
+    return Waveform(times=np.array(times), currents=np.array(currents))
+
+
+def from_function(fun, times):
+    """
+    Piecewise-linear waveform sampling a function of time (for example the
+    :code:`eval` method of a SimPEG TDEM waveform)
+
+    :param callable fun: current as a function of time
+    :param numpy.ndarray times: times (s) at which it is sampled
+    :rtype: Waveform
+    """
+    times = np.sort(np.asarray(times, dtype=float))
+    return Waveform(
+        times=times, currents=np.array([fun(t) for t in times], dtype=float)
+    )
+
+
+class StepOffResponse(object):
+    """
+    Step-off response of observables (a column per observable, for example a
+    receiver or a component) and its integral over time, interpolated from
+    the response at the stored times. The integral uses a cubic spline of
+    :math:`t r(t)` in :math:`\\ln t`, which suits log-spaced times. Before
+    the first stored time the response is taken as constant, and after the
+    last one it is taken as decayed to zero.
+
+    :param numpy.ndarray times: times (s) of the stored response
+    :param numpy.ndarray response: stored response (a row per time)
+    :param str response_type: 'step-off' or 'impulse' (the step-off
+        response is then the integral of the impulse response from t to the
+        last time)
+    """
+
+    def __init__(self, times, response, response_type='step-off'):
+        if response_type not in RESPONSE_TYPES:
+            raise KeyError(
+                "response_type must be one of {}, not {}".format(
+                    RESPONSE_TYPES, response_type
+                )
+            )
+        times = np.asarray(times, dtype=float)
+        order = np.argsort(times)
+        self.times = times[order]
+        response = np.asarray(response)
+        response = response.reshape(len(times), -1)[order]
+
+        x = np.log(self.times)
+        if response_type == 'impulse':
+            H = CubicSpline(
+                x, self.times[:, None] * response, axis=0
+            ).antiderivative()
+            response = H(x[-1]) - H(x)
+
+        self.response = response
+        self._spline = CubicSpline(x, response, axis=0)
+        self._integral = CubicSpline(
+            x, self.times[:, None] * response, axis=0
+        ).antiderivative()
+
+    def __call__(self, t):
+        """
+        step-off response at the times provided
+
+        :param numpy.ndarray t: times (s)
+        :rtype: numpy.ndarray
+        :return: response (an extra leading dimension per dimension of t)
+        """
+        t = np.asarray(t, dtype=float)
+        tc = np.clip(t, self.times[0], self.times[-1])
+        r = self._spline(np.log(tc))
+        r[t > self.times[-1]] = 0.
+        return r
+
+    def integral(self, t):
+        """
+        integral of the step-off response from 0 to the times provided
+
+        :param numpy.ndarray t: times (s)
+        :rtype: numpy.ndarray
+        """
+        t = np.asarray(t, dtype=float)
+        tc = np.clip(t, self.times[0], self.times[-1])
+        # constant response before the first time
+        early = self.times[0] * self.response[0]
+        return early + self._integral(np.log(tc)) - (
+            np.clip(self.times[0] - t, 0., None)[..., None] *
+            self.response[0]
+        )
+
+
+def convolve(
+    times, response_times, response, waveform, response_type='step-off',
+    dc=None
+):
+    """
+    Response to an arbitrary waveform from a stored step-off (or impulse)
+    response. With :math:`r(t)` the step-off response of a unit current,
+    the response to a current :math:`I(t)` that starts at zero is
+
+    .. math::
+
+        d(t) = I(t) d_{DC} - \\int_{-\\infty}^{t} I'(\\tau) r(t - \\tau)
+        d\\tau
+
+    For a piecewise-linear waveform, :math:`I'` is constant on each segment
+    (and a jump is a delta), so the integral is a sum of differences of the
+    integral of :math:`r` (and of values of :math:`r`). This is evaluated
+    for all the times, segments and observables at once. The stored
+    response should span from the earliest time after the end of the
+    waveform to the duration of the waveform.
+
+    :param numpy.ndarray times: times (s) at which the response is needed
+    :param numpy.ndarray response_times: times (s) of the stored response
+    :param numpy.ndarray response: stored response (a row per time, a column
+        per observable)
+    :param Waveform waveform: transmitter waveform
+    :param str response_type: 'step-off' or 'impulse'
+    :param numpy.ndarray dc: DC response (needed only at times when the
+        current is on)
+    :rtype: numpy.ndarray
+    :return: response to the waveform (a row per time)
+    """
+    waveform.validate()
+    times = np.atleast_1d(times).astype(float)
+    step_off_response = StepOffResponse(
+        response_times, response, response_type=response_type
+    )
+
+    t0, t1, dI = waveform.segments
+    t = times[:, None]
+    jump = t1 == t0
+
+    # jumps: -dI r(t - tau) for the jumps before t
+    u = t - t0[None, :]
+    before = (u >= 0.) & jump[None, :]
+    d = -np.einsum(
+        'ij,ijk->ik', np.where(before, dI[None, :], 0.),
+        step_off_response(np.clip(u, 0., None))
+    )
+
+    # ramps: -dI / (t1 - t0) (R(t - t0) - R(t - min(t1, t)))
+    ramp = ~jump
+    if np.any(ramp):
+        t0r, t1r = t0[ramp], t1[ramp]
+        slope = dI[ramp] / (t1r - t0r)
+        ua = np.clip(t - t0r[None, :], 0., None)
+        ub = np.clip(t - t1r[None, :], 0., None)
+        d -= np.einsum(
+            'ij,ijk->ik', np.where(ua > 0., slope[None, :], 0.),
+            step_off_response.integral(ua) - step_off_response.integral(ub)
+        )
+
+    current = waveform.eval(times)
+    if np.any(current != 0.):
+        if dc is None:
+            raise ValueError(
+                "the DC response is needed at times when the current is on"
+            )
+        d += current[:, None] * np.asarray(dc).reshape(1, -1)
+    return d
@@ -82,10 +82,556 @@ class ForwardSimulationTestCyl2D(unittest.TestCase):
 
         self.runSimulation(src)
 
+    def test_simulation2DParallelFreqs(self):
+
+        self.modelParameters.freqs = np.r_[0.5, 5., 50.]
+
+        src = casingSimulations.sources.TopCasingSrc(
+            modelParameters=self.modelParameters,
+            meshGenerator=self.meshGenerator,
+            physics="FDEM"
+        )
+        src.validate()
+
+        fields = {}
+        for num_workers in [1, 2]:
+            simulation = casingSimulations.run.SimulationFDEM(
+                modelParameters=self.modelParameters,
+                meshGenerator=self.meshGenerator,
+                src=src,
+                directory=self.dir2D,
+                num_workers=num_workers
+            )
+            simulation.run()
+            fields[num_workers] = np.load(
+                '/'.join([self.dir2D, 'fields.npy'])
+            )
+
+        self.assertTrue(
+            np.allclose(fields[1], fields[2], rtol=TOL, atol=ZERO)
+        )
+
+    def test_simulation2DMultiShift(self):
+
+        self.modelParameters.freqs = np.r_[0.5, 5., 50.]
+
+        src = casingSimulations.sources.TopCasingSrc(
+            modelParameters=self.modelParameters,
+            meshGenerator=self.meshGenerator,
+            physics="FDEM"
+        )
+        src.validate()
+
+        fields = {}
+        for multishift in [False, True]:
+            simulation = casingSimulations.run.SimulationFDEM(
+                modelParameters=self.modelParameters,
+                meshGenerator=self.meshGenerator,
+                src=src,
+                directory=self.dir2D,
+                multishift=multishift,
+                krylov_tol=1e-10
+            )
+            simulation.run()
+            fields[multishift] = np.load(
+                '/'.join([self.dir2D, 'fields.npy'])
+            )
+
+        self.assertTrue(
+            np.linalg.norm(fields[True] - fields[False]) <
+            1e-6 * np.linalg.norm(fields[False])
+        )
+
+    def test_simulation2DReducedOrder(self):
+
+        self.modelParameters.freqs = np.logspace(-1, 2, 12)
+
+        src = casingSimulations.sources.TopCasingSrc(
+            modelParameters=self.modelParameters,
+            meshGenerator=self.meshGenerator,
+            physics="FDEM"
+        )
+        src.validate()
+
+        fields = {}
+        for reduced_order in [False, True]:
+            simulation = casingSimulations.run.SimulationFDEM(
+                modelParameters=self.modelParameters,
+                meshGenerator=self.meshGenerator,
+                src=src,
+                directory=self.dir2D,
+                reduced_order=reduced_order,
+                rom_tol=1e-8,
+                rom_max_solves=12
+            )
+            simulation.run()
+            fields[reduced_order] = np.load(
+                '/'.join([self.dir2D, 'fields.npy'])
+            )
+
+        self.assertTrue(
+            simulation.reduced_model.error_estimates.max() < 1e-8
+        )
+        self.assertTrue(
+            np.linalg.norm(fields[True] - fields[False]) <
+            1e-5 * np.linalg.norm(fields[False])
+        )
+
+    def test_solutionModes(self):
+        src = casingSimulations.sources.TopCasingSrc(
+            modelParameters=self.modelParameters,
+            meshGenerator=self.meshGenerator,
+            physics="FDEM"
+        )
+        src.validate()
+
+        # modes that do not compose are rejected rather than ignored
+        for options in [
+            dict(multishift=True, reduced_order=True),
+            dict(condense_padding=True, primary='wholespace'),
+            dict(condense_padding=True, num_workers=2),
+        ]:
+            simulation = casingSimulations.run.SimulationFDEM(
+                modelParameters=self.modelParameters,
+                meshGenerator=self.meshGenerator,
+                src=src,
+                directory=self.dir2D,
+                **options
+            )
+            with self.assertRaises(Exception):
+                simulation.validate()
+            with self.assertRaises(Exception):
+                simulation.compute_fields()
+
+    def test_adaptiveFrequencySampling(self):
+
+        src = casingSimulations.sources.TopCasingSrc(
+            modelParameters=self.modelParameters,
+            meshGenerator=self.meshGenerator,
+            physics="FDEM"
+        )
+        src.validate()
+
+        simulation = casingSimulations.run.SimulationFDEM(
+            modelParameters=self.modelParameters,
+            meshGenerator=self.meshGenerator,
+            src=src,
+            directory=self.dir2D
+        )
+
+        sampler = casingSimulations.adaptive.AdaptiveFrequencySampler(
+            simulation, 1e-1, 1e2, tol=1e-2, n_initial=3, max_solves=15
+        )
+        freqs, interpolant = sampler.run()
+        self.assertTrue(len(freqs) <= 15)
+
+        # compare with the casing currents of a direct solve
+        check_freqs = [0.33, 33.]
+        sim = simulation.simulation_at(check_freqs)
+        fields = sim.compute_fields()
+        for freq, predicted in zip(check_freqs, interpolant(check_freqs)):
+            currents = casingSimulations.adaptive.casing_currents(
+                sim, fields, sim.survey.getSrcByFreq(freq)[0]
+            )
+            self.assertTrue(
+                np.abs(currents - predicted).max() <
+                5e-2 * np.abs(sampler.values).max()
+            )
+
+    def test_parameterSweep(self):
+
+        src = casingSimulations.sources.TopCasingSrc(
+            modelParameters=self.modelParameters,
+            meshGenerator=self.meshGenerator,
+            physics="FDEM"
+        )
+        src.validate()
+
+        simulation = casingSimulations.run.SimulationFDEM(
+            modelParameters=self.modelParameters,
+            meshGenerator=self.meshGenerator,
+            src=src,
+            directory=self.dir2D
+        )
+
+        # the duplicate value is run once
+        results = {}
+        for num_workers in [1, 2]:
+            sweep = casingSimulations.sweep.ParameterSweep(
+                simulation=simulation,
+                parameters={'mur_casing': [1., 50., 50.]},
+                freqs=np.r_[0.5, 5.],
+                num_workers=num_workers
+            )
+            sweep.run()
+            results[num_workers] = sweep.results_by('mur_casing')
+            self.assertEqual(len(results[num_workers]), 2)
+
+        # compare with a direct run
+        modelParameters = self.modelParameters.copy()
+        modelParameters.mur_casing = 50.
+        modelParameters.freqs = np.r_[0.5, 5.]
+        sim = casingSimulations.run.SimulationFDEM(
+            modelParameters=modelParameters,
+            meshGenerator=self.meshGenerator.copy(),
+            src=src.copy(),
+            directory=self.dir2D
+        )
+        fields = sim.compute_fields()
+        currents = np.vstack([
+            casingSimulations.adaptive.casing_currents(sim, fields, s)
+            for s in sim.survey.srcList
+        ])
+        for num_workers in [1, 2]:
+            self.assertTrue(
+                np.allclose(
+                    results[num_workers][50.], currents, rtol=TOL, atol=ZERO
+                )
+            )
+
+    def test_parameterSweepLowRank(self):
+
+        # with upscaling, the cells next to the casing change with it too
+        for casing_upscaling in [False, True]:
+            modelParameters = self.modelParameters.copy()
+            modelParameters.casing_upscaling = casing_upscaling
+            meshGenerator = self.meshGenerator.copy()
+            meshGenerator.modelParameters = modelParameters
+
+            src = casingSimulations.sources.TopCasingSrc(
+                modelParameters=modelParameters,
+                meshGenerator=meshGenerator,
+                physics="FDEM"
+            )
+            src.validate()
+
+            simulation = casingSimulations.run.SimulationFDEM(
+                modelParameters=modelParameters,
+                meshGenerator=meshGenerator,
+                src=src,
+                directory=self.dir2D
+            )
+
+            results = {}
+            for low_rank in [False, True]:
+                sweep = casingSimulations.sweep.ParameterSweep(
+                    simulation=simulation,
+                    parameters={
+                        'mur_casing': [1., 50.], 'sigma_casing': [1e5, 5e6]
+                    },
+                    low_rank=low_rank
+                )
+                results[low_rank] = sweep.run()
+
+            # one factorization per frequency for all the casing properties
+            self.assertEqual(
+                sweep.solver_stats['n_factorization'],
+                len(modelParameters.freqs)
+            )
+            for configuration, currents in results[False].items():
+                self.assertTrue(
+                    np.allclose(
+                        results[True][configuration], currents, rtol=TOL,
+                        atol=ZERO
+                    )
+                )
+
+    def test_condensePadding(self):
+
+        # the return electrode must be in the core of the mesh
+        modelParameters = self.modelParameters.copy()
+        modelParameters.src_b = np.r_[500., np.pi, 0.]
+        meshGenerator = self.meshGenerator.copy()
+        meshGenerator.modelParameters = modelParameters
+
+        src = casingSimulations.sources.TopCasingSrc(
+            modelParameters=modelParameters,
+            meshGenerator=meshGenerator,
+            physics="FDEM"
+        )
+        src.validate()
+
+        solutions = {}
+        for condense_padding in [False, True, True]:
+            simulation = casingSimulations.run.SimulationFDEM(
+                modelParameters=modelParameters,
+                meshGenerator=meshGenerator,
+                src=src,
+                directory=self.dir2D,
+                condense_padding=condense_padding,
+                padding_extension=True
+            )
+            fields = simulation.run()
+            solutions[condense_padding] = fields[:, 'hSolution']
+
+        # the second condensed run loads the boundary operator from disk
+        self.assertTrue(
+            np.allclose(
+                solutions[True], solutions[False], rtol=TOL, atol=ZERO
+            )
+        )
+
+    def test_timeDomainFromFrequency(self):
+
+        self.modelParameters.freqs = np.r_[1., 10.]
+
+        src = casingSimulations.sources.TopCasingSrc(
+            modelParameters=self.modelParameters,
+            meshGenerator=self.meshGenerator,
+            physics="FDEM"
+        )
+        src.validate()
+
+        simulation = casingSimulations.run.SimulationFDEM(
+            modelParameters=self.modelParameters,
+            meshGenerator=self.meshGenerator,
+            src=src,
+            directory=self.dir2D
+        )
+
+        times = np.logspace(-3, -1, 3)
+        currents = {
+            method: simulation.time_domain(times, method=method)
+            for method in ['talbot', 'stehfest']
+        }
+        self.assertEqual(currents['talbot'].shape[0], len(times))
+        self.assertTrue(
+            np.abs(currents['talbot'] - currents['stehfest']).max() <
+            1e-2 * np.abs(currents['talbot']).max()
+        )
+
+    def test_casingCurrentObservable(self):
+
+        src = casingSimulations.sources.TopCasingSrc(
+            modelParameters=self.modelParameters,
+            meshGenerator=self.meshGenerator,
+            physics="FDEM"
+        )
+        src.validate()
+
+        simulation = casingSimulations.run.SimulationFDEM(
+            modelParameters=self.modelParameters,
+            meshGenerator=self.meshGenerator,
+            src=src,
+            directory=self.dir2D
+        )
+        fields = simulation.compute_fields()
+
+        # the sampler and the time-domain transforms share the observable
+        for s in simulation.survey.srcList:
+            self.assertTrue(np.allclose(
+                casingSimulations.adaptive.casing_currents(
+                    simulation, fields, s
+                ),
+                casingSimulations.transforms.casing_currents(
+                    simulation, fields[s, 'hSolution']
+                )
+            ))
+
     def tearDown(self):
         for d in [self.dir2D]:
             shutil.rmtree(d)
 
 
+class ForwardSimulationTestCyl3D(unittest.TestCase):
+
+    dir3D = './sim3D'
+
+    def setUp(self):
+        modelParameters = casingSimulations.model.CasingInWholespace(
+            src_a=np.r_[0., np.pi, 0.],
+            src_b=np.r_[100., np.pi, 0.],  # breaks the axisymmetry
+            freqs=np.r_[0.5],
+            sigma_back=1e-1,
+            casing_l=50.
+        )
+        self.modelParameters = modelParameters
+        self.meshGenerator = casingSimulations.CasingMeshGenerator(
+            modelParameters=modelParameters, npadx=6, npadz=8, csz=2.5,
+            domain_x=150., hy=np.ones(8) * 2*np.pi / 8.
+        )
+
+    def test_azimuthalModes(self):
+        src = casingSimulations.sources.TopCasingSrc(
+            modelParameters=self.modelParameters,
+            meshGenerator=self.meshGenerator,
+            physics="FDEM"
+        )
+        src.validate()
+
+        solutions = {}
+        for azimuthal_modes in [False, True]:
+            simulation = casingSimulations.run.SimulationFDEM(
+                modelParameters=self.modelParameters,
+                meshGenerator=self.meshGenerator,
+                src=src,
+                directory=self.dir3D,
+                azimuthal_modes=azimuthal_modes,
+                num_workers=2 if azimuthal_modes else 1
+            )
+            fields = simulation.compute_fields()
+            solutions[azimuthal_modes] = fields[:, 'hSolution']
+
+        self.assertTrue(
+            np.allclose(solutions[True], solutions[False], rtol=TOL, atol=ZERO)
+        )
+
+    def test_halfDomain(self):
+        src = casingSimulations.sources.TopCasingSrc(
+            modelParameters=self.modelParameters,
+            meshGenerator=self.meshGenerator,
+            physics="FDEM"
+        )
+        src.validate()
+
+        solutions = {}
+        for half_domain in [False, True]:
+            simulation = casingSimulations.run.SimulationFDEM(
+                modelParameters=self.modelParameters,
+                meshGenerator=self.meshGenerator,
+                src=src,
+                directory=self.dir3D,
+                half_domain=half_domain
+            )
+            fields = simulation.compute_fields()
+            solutions[half_domain] = fields[:, 'hSolution']
+
+        self.assertTrue(
+            np.allclose(solutions[True], solutions[False], rtol=TOL, atol=ZERO)
+        )
+
+    def test_axisymmetricPrimary(self):
+        src = casingSimulations.sources.TopCasingSrc(
+            modelParameters=self.modelParameters,
+            meshGenerator=self.meshGenerator,
+            physics="FDEM"
+        )
+        src.validate()
+
+        solutions = {}
+        for primary in [None, 'axisymmetric']:
+            simulation = casingSimulations.run.SimulationFDEM(
+                modelParameters=self.modelParameters,
+                meshGenerator=self.meshGenerator,
+                src=src,
+                directory=self.dir3D,
+                primary=primary
+            )
+            fields = simulation.compute_fields()
+            solutions[primary] = fields[:, 'hSolution']
+
+        # the 3D discretization of the axisymmetric primary is the 2D one,
+        # so primary + secondary is the total field
+        self.assertTrue(
+            np.linalg.norm(solutions['axisymmetric'] - solutions[None]) <
+            1e-6 * np.linalg.norm(solutions[None])
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.dir3D)
+
+
+class ForwardSimulationTestTDEM2D(unittest.TestCase):
+
+    dirTDEM = './simTDEM'
+
+    def setUp(self):
+        modelParameters = casingSimulations.model.CasingInWholespace(
+            src_a=np.r_[0., np.pi, 0.],
+            src_b=np.r_[1e3, np.pi, 0.],
+            timeSteps=[(1e-5, 5), (1e-4, 5)],
+            sigma_back=1e-1,
+        )
+        meshGenerator = casingSimulations.CasingMeshGenerator(
+            modelParameters=modelParameters, npadx=8, npadz=19, csz=0.25
+        )
+        self.src = casingSimulations.sources.TopCasingSrc(
+            modelParameters=modelParameters,
+            meshGenerator=meshGenerator,
+            physics="TDEM"
+        )
+        self.modelParameters = modelParameters
+        self.meshGenerator = meshGenerator
+
+    def test_streamFields(self):
+        solutions = {}
+        for stream_fields in [False, True]:
+            simulation = casingSimulations.run.SimulationTDEM(
+                modelParameters=self.modelParameters,
+                meshGenerator=self.meshGenerator,
+                src=self.src,
+                directory=self.dirTDEM,
+                stream_fields=stream_fields,
+                stream_flush_every=3
+            )
+            simulation.run()
+
+            # the results can be loaded back
+            loaded = casingSimulations.utils.loadSimulationResults(
+                self.dirTDEM, mmap_mode='r'
+            )
+            self.assertTrue(loaded.stream_fields == stream_fields)
+            solutions[stream_fields] = np.array(
+                np.load('/'.join([self.dirTDEM, 'fields.npy']))
+            )
+
+        self.assertEqual(solutions[True].shape, solutions[False].shape)
+        self.assertTrue(
+            np.allclose(solutions[True], solutions[False], rtol=TOL, atol=ZERO)
+        )
+
+    def test_outputTimes(self):
+        simulation = casingSimulations.run.SimulationTDEM(
+            modelParameters=self.modelParameters,
+            meshGenerator=self.meshGenerator,
+            src=self.src,
+            directory=self.dirTDEM
+        )
+        simulation.run()
+        full = np.load('/'.join([self.dirTDEM, 'fields.npy']))
+        times = np.r_[0., np.cumsum(simulation.prob.timeSteps)]
+
+        # on and between the time steps, stopping before the last step
+        output_times = np.r_[times[3], 0.5 * (times[6] + times[7])]
+        for stream_fields in [False, True]:
+            simulation = casingSimulations.run.SimulationTDEM(
+                modelParameters=self.modelParameters,
+                meshGenerator=self.meshGenerator,
+                src=self.src,
+                directory=self.dirTDEM,
+                output_times=output_times,
+                stream_fields=stream_fields
+            )
+            result = simulation.run()
+            solution = np.load('/'.join([self.dirTDEM, 'fields.npy']))
+
+            # the solution is indexed like the solution of the fields
+            self.assertTrue(
+                isinstance(result, casingSimulations.run.TimeSolution)
+            )
+            self.assertTrue(np.all(result.times == output_times))
+            self.assertTrue(np.all(result[:, 'jSolution'] == solution))
+            self.assertTrue(np.all(
+                result[self.src.srcList[0], 'jSolution', 1] ==
+                solution[:, 0, 1]
+            ))
+
+            self.assertEqual(solution.shape[-1], len(output_times))
+            self.assertTrue(
+                np.allclose(
+                    solution[:, :, 0], full[:, :, 3], rtol=TOL, atol=ZERO
+                )
+            )
+            self.assertTrue(
+                np.allclose(
+                    solution[:, :, 1], 0.5 * (full[:, :, 6] + full[:, :, 7]),
+                    rtol=TOL, atol=ZERO
+                )
+            )
+
+    def tearDown(self):
+        shutil.rmtree(self.dirTDEM)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,45 @@
+import unittest
+import numpy as np
+
+from casingSimulations import adaptive
+
+
+def response(freqs):
+    """
+    a vector response with poles on the negative real s-axis, like a
+    diffusive EM response
+    """
+    s = 2j*np.pi*np.atleast_1d(freqs)
+    poles = -2*np.pi*np.r_[0.3, 3., 30.]
+    residues = np.array([[1., 2.], [0.5, -1.], [2., 0.3]])
+    return (residues[None, :, :] / (s[:, None, None] - poles[None, :, None])).sum(1)
+
+
+class TestInterpolants(unittest.TestCase):
+
+    def setUp(self):
+        self.freqs = np.logspace(-2, 3, 25)
+        self.values = response(self.freqs)
+        self.test_freqs = np.logspace(-1.9, 2.9, 50)
+
+    def test_rational(self):
+        interpolant = adaptive.RationalInterpolant(self.freqs, self.values)
+        self.assertTrue(np.allclose(interpolant(self.freqs), self.values))
+        self.assertTrue(
+            np.abs(interpolant(self.test_freqs) - response(self.test_freqs))
+            .max() < 1e-8 * np.abs(self.values).max()
+        )
+        # the response is of degree 3
+        self.assertTrue(len(interpolant.support) <= 5)
+
+    def test_spline(self):
+        interpolant = adaptive.SplineInterpolant(self.freqs, self.values)
+        self.assertTrue(np.allclose(interpolant(self.freqs), self.values))
+        self.assertTrue(
+            np.abs(interpolant(self.test_freqs) - response(self.test_freqs))
+            .max() < 1e-2 * np.abs(self.values).max()
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
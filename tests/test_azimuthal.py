@@ -0,0 +1,97 @@
+import unittest
+import numpy as np
+import scipy.sparse as sp
+
+from casingSimulations import azimuthal
+
+
+def circulantSystem(n_theta=8, n_positions=40, dtype=float):
+    """
+    block-circulant system coupling each azimuth to its neighbours
+    """
+    np.random.seed(2)
+    C1 = sp.random(n_positions, n_positions, density=0.1, dtype=float)
+    C0 = sp.random(n_positions, n_positions, density=0.1, dtype=float)
+    C0 = C0 + C0.T
+    C0 = C0 + sp.diags(np.abs(C0).sum(1).A1 + 2*np.abs(C1).sum(1).A1 + 1.)
+    if dtype == complex:
+        C0 = C0 + 1j*sp.eye(n_positions)
+    shift = sp.diags(np.ones(n_theta - 1), 1, shape=(n_theta, n_theta))
+    shift = (shift + sp.csr_matrix(([1.], ([n_theta - 1], [0])),
+                                   shape=(n_theta, n_theta)))
+    return (
+        sp.kron(sp.eye(n_theta), C0) + sp.kron(shift, C1) +
+        sp.kron(shift.T, C1.T)
+    ).tocsr()
+
+
+class TestAzimuthalModeSolver(unittest.TestCase):
+
+    def setUp(self):
+        self.n_theta, self.n_positions = 8, 40
+        n = self.n_theta * self.n_positions
+        self.theta_index = np.arange(n) // self.n_positions
+        self.position_index = np.arange(n) % self.n_positions
+
+    def test_indices(self):
+        # unknowns at cell centers of a cylindrical mesh
+        r, z = np.meshgrid(np.arange(5) + 0.5, np.arange(8) - 7.5)
+        dtheta = 2*np.pi / self.n_theta
+        theta = (np.arange(self.n_theta) + 0.5) * dtheta
+        locations = np.vstack([
+            np.c_[r.ravel(), t * np.ones(r.size), z.ravel()] for t in theta
+        ])
+        theta_index, position_index = azimuthal.azimuthal_indices(
+            locations, self.n_theta
+        )
+        self.assertTrue(
+            np.all(theta_index == np.arange(len(locations)) // r.size)
+        )
+        self.assertEqual(position_index.max() + 1, r.size)
+
+        with self.assertRaises(Exception):
+            azimuthal.azimuthal_indices(locations[1:], self.n_theta)
+
+    def test_solve(self):
+        for dtype in [float, complex]:
+            A = circulantSystem(self.n_theta, self.n_positions, dtype)
+            b = np.random.rand(A.shape[0], 2)
+            for num_workers in [1, 2]:
+                Ainv = azimuthal.AzimuthalModeSolver(
+                    A, self.theta_index, self.position_index,
+                    num_workers=num_workers
+                )
+                x = Ainv.solve(b)
+                self.assertEqual(x.shape, b.shape)
+                self.assertTrue(
+                    np.linalg.norm(A * x - b) < 1e-10 * np.linalg.norm(b)
+                )
+            if dtype == float:
+                self.assertFalse(np.iscomplexobj(x))
+
+    def test_modes(self):
+        # a source varying as cos(theta) only excites the modes +-1
+        A = circulantSystem(self.n_theta, self.n_positions)
+        v = np.random.rand(self.n_positions)
+        b = np.cos(2*np.pi*self.theta_index / self.n_theta) * np.tile(
+            v, self.n_theta
+        )
+        Ainv = azimuthal.AzimuthalModeSolver(
+            A, self.theta_index, self.position_index
+        )
+        x = Ainv.solve(b)
+        self.assertEqual(list(Ainv.modes), [1, self.n_theta - 1])
+        self.assertEqual(Ainv.stats.n_factorization, 2)
+        self.assertTrue(np.linalg.norm(A * x - b) < 1e-10 * np.linalg.norm(b))
+
+    def test_notCirculant(self):
+        A = circulantSystem(self.n_theta, self.n_positions).tolil()
+        A[0, 0] += 1.
+        with self.assertRaises(Exception):
+            azimuthal.AzimuthalModeSolver(
+                A.tocsr(), self.theta_index, self.position_index
+            )
+
+
+if __name__ == '__main__':
+    unittest.main()
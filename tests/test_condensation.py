@@ -0,0 +1,95 @@
+import os
+import shutil
+import unittest
+import numpy as np
+import scipy.sparse as sp
+
+from casingSimulations import condensation
+
+from .utils import frequencySystem
+
+
+class TestPaddingCondensation(unittest.TestCase):
+
+    directory = './condensation'
+
+    def setUp(self):
+        K, M = frequencySystem(n=500)
+        self.A = (K + 2j*np.pi*M).tocsr()
+        n = self.A.shape[0]
+        self.ind_core = np.arange(n // 2)
+        self.b = np.zeros((n, 2))
+        self.b[self.ind_core[:10]] = np.random.rand(10, 2)
+
+        # change restricted to the interior of the core
+        D = sp.lil_matrix((n, n))
+        D[5, 5], D[5, 6], D[6, 5] = 3., 1., 1.
+        self.delta = D.tocsr()
+
+        if not os.path.isdir(self.directory):
+            os.mkdir(self.directory)
+
+    def test_solve(self):
+        filename = '/'.join([self.directory, 'padding.npz'])
+        cond = condensation.PaddingCondensation(
+            self.A, self.ind_core, store_extension=True
+        )
+        cond.save(filename)
+        loaded = condensation.PaddingCondensation.load(filename)
+
+        for A in [self.A, self.A + self.delta]:
+            for c in [cond, loaded]:
+                x = c.solve(A, self.b)
+                self.assertEqual(x.shape, self.b.shape)
+                self.assertTrue(
+                    np.linalg.norm(A * x - self.b) <
+                    1e-8 * np.linalg.norm(self.b)
+                )
+
+        # the core systems are smaller
+        self.assertTrue(
+            cond.core_matrix(self.A).shape[0] < self.A.shape[0]
+        )
+
+    def test_noExtension(self):
+        # the same core solution and boundary operator without keeping the
+        # extension, the padding is zero
+        cond = condensation.PaddingCondensation(
+            self.A, self.ind_core, store_extension=True, block_size=16
+        )
+        light = condensation.PaddingCondensation(self.A, self.ind_core)
+        self.assertTrue(light.X is None)
+        self.assertTrue(np.allclose(light.G, cond.G))
+        x = light.solve(self.A, self.b)
+        self.assertTrue(np.allclose(
+            x[self.ind_core], cond.solve(self.A, self.b)[self.ind_core]
+        ))
+        self.assertFalse(np.any(x[light.ind_padding]))
+
+    def test_paddingChanged(self):
+        cond = condensation.PaddingCondensation(self.A, self.ind_core)
+        n = self.A.shape[0]
+        A = self.A + sp.csr_matrix(([1.], ([n - 1], [n - 1])), shape=(n, n))
+        self.assertFalse(cond.matches(A))
+        with self.assertRaises(Exception):
+            cond.solve(A, self.b)
+
+        # a change in the coupling of the core to the padding (A_CP) only
+        rows, cols, _ = sp.find(self.A[self.ind_core][:, cond.ind_padding])
+        i, j = self.ind_core[rows[0]], cond.ind_padding[cols[0]]
+        A = self.A + sp.csr_matrix(([1.], ([i], [j])), shape=(n, n))
+        self.assertFalse(cond.matches(A))
+        self.assertTrue(cond.matches(self.A.copy()))
+
+    def test_sourceInPadding(self):
+        cond = condensation.PaddingCondensation(self.A, self.ind_core)
+        b = np.ones(self.A.shape[0])
+        with self.assertRaises(Exception):
+            cond.solve(self.A, b)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+import functools
+import unittest
+import numpy as np
+
+from casingSimulations import krylov, solvers
+
+from .utils import frequencySystem
+
+
+class TestMultiShiftSolver(unittest.TestCase):
+
+    def setUp(self):
+        self.K, self.M = frequencySystem(n=500)
+        self.shifts = 2j*np.pi*np.logspace(-1, 1, 12)
+        self.b0 = np.random.rand(self.K.shape[0], 2)
+        self.b1 = np.random.rand(self.K.shape[0], 2)
+
+    def test_affine_split(self):
+        s_a, s_b = 2j*np.pi, 20j*np.pi
+        K, M = krylov.affine_split(
+            self.K + s_a*self.M, self.K + s_b*self.M, s_a, s_b
+        )
+        self.assertTrue(abs(K - self.K).max() < 1e-12)
+        self.assertTrue(abs(M - self.M).max() < 1e-12)
+
+    def test_shifted_solutions(self):
+        Ainv = krylov.MultiShiftSolver(self.K, self.M, tol=1e-10)
+        X = Ainv.solve(self.shifts, self.b0, self.b1)
+
+        for s, x in zip(self.shifts, X):
+            A = self.K + s*self.M
+            b = self.b0 + s*self.b1
+            self.assertEqual(x.shape, b.shape)
+            self.assertTrue(
+                np.linalg.norm(A*x - b) < 1e-8 * np.linalg.norm(b)
+            )
+
+        # a single factorization for all the shifts
+        self.assertEqual(Ainv.stats.n_factorization, 1)
+        self.assertTrue(
+            Ainv.stats.n_solve < len(self.shifts) * self.b0.shape[1] * 20
+        )
+
+    def test_backend_tolerance(self):
+        # the tolerance of an iterative backend is bound to it and is
+        # independent of the tolerance of the multi-shift sequence
+        Solver = functools.partial(
+            solvers.IterativeSolver, tol=1e-12, maxiter=2000
+        )
+        Ainv = krylov.MultiShiftSolver(
+            self.K, self.M, Solver=Solver, tol=1e-8, maxiter=100
+        )
+        X = Ainv.solve(self.shifts[:3], self.b0[:, 0])
+        for s, x in zip(self.shifts[:3], X):
+            A = self.K + s*self.M
+            self.assertTrue(
+                np.linalg.norm(A*x - self.b0[:, 0]) <
+                1e-6 * np.linalg.norm(self.b0[:, 0])
+            )
+
+    def test_basis_grows(self):
+        # the Krylov basis is not allocated for maxiter vectors
+        Ainv = krylov.MultiShiftSolver(
+            self.K, self.M, tol=1e-10, maxiter=10**8
+        )
+        X = Ainv.solve(self.shifts, self.b0[:, 0])
+        for s, x in zip(self.shifts, X):
+            A = self.K + s*self.M
+            self.assertTrue(
+                np.linalg.norm(A*x - self.b0[:, 0]) <
+                1e-8 * np.linalg.norm(self.b0[:, 0])
+            )
+        self.assertTrue(Ainv.stats.iterations[0] > krylov.KRYLOV_BLOCK)
+
+    def test_not_converged(self):
+        Ainv = krylov.MultiShiftSolver(self.K, self.M, tol=1e-14, maxiter=2)
+        with self.assertRaises(Exception):
+            Ainv.solve(self.shifts, self.b0[:, 0])
+
+
+class TestReducedOrderModel(unittest.TestCase):
+
+    def setUp(self):
+        self.K, self.M = frequencySystem(n=500)
+        self.shifts = 2j*np.pi*np.logspace(-1, 1, 40)
+        self.b0 = np.random.rand(self.K.shape[0], 2)
+        self.b1 = np.random.rand(self.K.shape[0], 2)
+
+    def test_fit(self):
+        rom = krylov.ReducedOrderModel(self.K, self.M, self.b0, self.b1)
+        estimate = rom.fit(self.shifts, tol=1e-6, max_poles=20)
+        self.assertTrue(estimate.max() < 1e-6)
+        self.assertTrue(len(rom.poles) < len(self.shifts))
+        # a factorization per full solve
+        self.assertEqual(rom.stats.n_factorization, len(rom.poles))
+
+        # the error estimate is the relative residual of the reduced solution
+        shifts = 2j*np.pi*np.r_[0.33, 3.3]
+        for s, x, est in zip(
+            shifts, rom.solve(shifts), rom.error_estimate(shifts)
+        ):
+            b = self.b0 + s*self.b1
+            residual = (
+                np.linalg.norm(b - (self.K + s*self.M)*x, axis=0) /
+                np.linalg.norm(b, axis=0)
+            ).max()
+            self.assertTrue(abs(residual - est) < 1e-2 * est + 1e-12)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+import numpy as np
+import scipy.sparse as sp
+
+from casingSimulations import lowrank
+
+from .utils import frequencySystem
+
+
+class TestWoodburySolver(unittest.TestCase):
+
+    def setUp(self):
+        K, M = frequencySystem(n=500)
+        self.A = (K + 2j*np.pi*M).tocsr()
+        self.b = np.random.rand(self.A.shape[0], 2)
+
+        # symmetric change restricted to a few unknowns
+        n = self.A.shape[0]
+        self.ind = np.arange(100, 120)
+        P = sp.csr_matrix(
+            (np.ones(len(self.ind)), (self.ind, np.arange(len(self.ind)))),
+            shape=(n, len(self.ind))
+        )
+        D = np.random.rand(len(self.ind), len(self.ind))
+        self.delta = P * sp.csr_matrix(D + D.T) * P.T
+
+    def test_changedUnknowns(self):
+        ind = lowrank.changed_unknowns(self.A, self.A + self.delta)
+        self.assertTrue(np.all(np.isin(ind, self.ind)))
+
+    def test_update(self):
+        Ainv = lowrank.WoodburySolver(self.A, self.ind)
+        n_solve = Ainv.stats.n_solve
+        for scale in [0., 1., 10.]:
+            A = self.A + scale * self.delta
+            x = Ainv.solve(A, self.b)
+            self.assertEqual(x.shape, self.b.shape)
+            self.assertTrue(
+                np.linalg.norm(A * x - self.b) < 1e-8 * np.linalg.norm(self.b)
+            )
+
+        # one factorization, and a solve (per source) per system
+        self.assertEqual(Ainv.stats.n_factorization, 1)
+        self.assertEqual(Ainv.stats.n_solve - n_solve, 3 * self.b.shape[1])
+
+    def test_changeOutside(self):
+        Ainv = lowrank.WoodburySolver(self.A, self.ind[:5])
+        with self.assertRaises(Exception):
+            Ainv.solve(self.A + self.delta, self.b)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -117,6 +117,16 @@ class TestTensorMeshConstruction(unittest.TestCase):
     def test_TensorCreation(self):
         compareTensorMeshes(self.mesh_c, self.mesh_d, 'TensorCreation')
 
+    def test_TensorOrigin(self):
+        # the mesh does not move with the y of the source
+        modelParameters = self.meshGen.modelParameters.copy()
+        modelParameters.src_a = np.r_[0., 100., -950.]
+        modelParameters.src_b = np.r_[-1e3, 100., 0.]
+        meshGen = self.meshGen.copy()
+        meshGen.modelParameters = modelParameters
+        compareTensorMeshes(self.mesh_c, meshGen.mesh, 'TensorOrigin')
+        self.assertEqual(meshGen.mirror_plane, 0.)
+
     def test_TensorCopy(self):
         mesh_a = self.meshGen.mesh
         mesh_b = self.meshGen.copy().mesh
@@ -129,6 +139,112 @@ class TestTensorMeshConstruction(unittest.TestCase):
         )
         compareTensorMeshes(self.meshGen.mesh, meshGen2.mesh, 'TensorSaveLoad')
 
+    def test_TensorCore(self):
+        mesh = self.meshGen.mesh
+        ind_core = self.meshGen.ind_core()
+        npad = self.meshGen.npadx
+
+        # the core is the box of the non-padding cells
+        for i, h in enumerate([mesh.hx, mesh.hy, mesh.hz]):
+            nodes = np.r_[0., np.cumsum(h)] + mesh.x0[i]
+            inside = (
+                (mesh.gridCC[:, i] > nodes[npad]) &
+                (mesh.gridCC[:, i] < nodes[-npad-1])
+            )
+            self.assertTrue(np.all(inside[ind_core]))
+        self.assertEqual(
+            ind_core.sum(),
+            np.prod([len(h) - 2*npad for h in [mesh.hx, mesh.hy, mesh.hz]])
+        )
+
+
+
+class TestCasingMeshDesign(unittest.TestCase):
+
+    def setUp(self):
+        self.modelParameters = casingSimulations.model.CasingInWholespace(
+            src_a=np.r_[0., np.pi, -500.],
+            src_b=np.r_[500., np.pi, 0.],
+            freqs=np.r_[0.1, 1., 10.],
+            sigma_back=0.1
+        )
+        self.meshGen = casingSimulations.CasingMeshGenerator(
+            modelParameters=self.modelParameters, csz=5., npadx=30, npadz=40
+        )
+
+    def test_paddingCells(self):
+        cs, distance = 10., 5e3
+        npad, pf = casingSimulations.mesh.padding_cells(cs, distance, 1.5)
+        extent = lambda n, pf: cs * np.sum(pf**np.arange(1, n+1))
+        self.assertTrue(pf <= 1.5)
+        self.assertTrue(extent(npad, pf) >= distance)
+        self.assertTrue(extent(npad - 1, 1.5) < distance)
+        self.assertTrue(extent(npad, pf - 1e-6) < distance)
+
+    def test_design(self):
+        accuracy = 1e-2
+        designed = self.meshGen.design(accuracy=accuracy)
+        delta = self.modelParameters.skin_depth()
+
+        self.assertTrue(designed.nC < self.meshGen.nC)
+        self.assertTrue(designed.csz <= np.sqrt(accuracy) * delta.min())
+        self.assertTrue(designed.domain_x > self.modelParameters.src_b[0])
+
+        # the padding reaches the distance the fields decay over
+        padding = designed.hz[:designed.npadz].sum()
+        self.assertTrue(padding >= min(
+            delta.max() * np.log(1. / accuracy),
+            designed.domain_z / np.sqrt(accuracy)
+        ))
+        self.assertEqual(designed.mesh.nC, designed.nC)
+
+
+class TestGradedCore(unittest.TestCase):
+
+    def setUp(self):
+        self.modelParameters = casingSimulations.model.CasingInHalfspace(
+            src_a=np.r_[0., np.pi, -975.],
+            src_b=np.r_[1e3, np.pi, 0.],
+            casing_l=1000.,
+            freqs=np.r_[1.]
+        )
+        self.kwargs = dict(
+            modelParameters=self.modelParameters, csz=0.25, npadx=10,
+            npadz=20
+        )
+
+    def test_gradedTensor(self):
+        points = [0., -975., -1000.]
+        h = casingSimulations.mesh.graded_tensor(
+            -1010., 5., points, 0.25, 20., 1.1, 5
+        )
+        nodes = -1010. + np.r_[0., np.cumsum(h)]
+        self.assertTrue(np.isclose(nodes[-1], 5.))
+        for point in points:
+            i = np.argmin(np.abs(nodes - point))
+            self.assertTrue(np.isclose(nodes[i], point))
+            self.assertTrue(np.all(h[max(i-5, 0):i+5] <= 0.25 + 1e-10))
+        self.assertTrue(h.max() <= 20.)
+        ratio = h[1:] / h[:-1]
+        self.assertTrue(np.all(ratio < 1.15) and np.all(1. / ratio < 1.15))
+
+    def test_gradedCore(self):
+        uniform = casingSimulations.CasingMeshGenerator(**self.kwargs)
+        graded = casingSimulations.CasingMeshGenerator(
+            csz_max=20., **self.kwargs
+        )
+        ncz = lambda gen: len(gen.hz) - 2*gen.npadz
+        self.assertTrue(ncz(graded) < ncz(uniform) / 10.)
+
+        # same core, with nodes at the casing ends and the surface
+        nodes = graded.mesh.vectorNz
+        core = nodes[graded.npadz:len(nodes)-graded.npadz]
+        self.assertTrue(np.isclose(core[0], uniform.mesh.vectorNz[
+            uniform.npadz
+        ]))
+        for z in np.r_[self.modelParameters.casing_z, 0.]:
+            self.assertTrue(np.isclose(np.abs(nodes - z).min(), 0.))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -5,6 +5,7 @@ import os
 import pytest
 from discretize import utils
 from scipy.constants import mu_0
+from scipy.sparse.linalg import spsolve
 
 import casingSimulations as casingSim
 
@@ -53,5 +54,281 @@ class ModelTests(unittest.TestCase):
         #     wholespace.validate()
 
 
+def dcAxisSource(mesh, sigma):
+    """
+    DC potentials for a unit current injected on the axis of a cylindrically
+    symmetric mesh at z = -0.5 m (Dirichlet boundaries)
+
+    :return: (current through the disc r < 0.2 m at z, potential at (r, z))
+    """
+    D = utils.sdiag(mesh.vol) * mesh.faceDiv
+    MfRhoI = mesh.getFaceInnerProduct(1./sigma, invMat=True)
+    q = np.zeros(mesh.nC)
+    q[np.argmin(np.abs(mesh.vectorCCz + 0.5)) * mesh.nCx] = 1.
+    phi = spsolve((D * MfRhoI * D.T).tocsc(), q)
+
+    I = (MfRhoI * (D.T * phi)) * mesh.area
+    Iz = I[mesh.nFx:].reshape(mesh.nCx, -1, order='F')
+    r, z = mesh.vectorCCx, mesh.vectorCCz
+
+    def current(zq):
+        return abs(Iz[r < 0.2, np.argmin(np.abs(mesh.vectorNz - zq))].sum())
+
+    def potential(rq, zq):
+        return phi[
+            np.argmin(np.abs(z - zq)) * mesh.nCx + np.argmin(np.abs(r - rq))
+        ]
+
+    return current, potential
+
+
+class CasingUpscalingTests(unittest.TestCase):
+
+    def setUp(self):
+        self.modelParameters = casingSim.model.CasingInWholespace(
+            casing_d=10e-2, casing_t=1e-2, casing_l=10., sigma_back=0.1,
+            casing_upscaling=True
+        )
+        # radial cells 4 times larger than the casing thickness
+        self.mesh = discretize.CylMesh(
+            [np.ones(10) * 4e-2, 1, np.ones(20)], x0=np.r_[0., 0., -15.]
+        )
+
+    def test_radialFractions(self):
+        nodes = np.r_[0., 1., 2., 4.]
+        area = casingSim.model.radial_fractions(nodes, 0.5, 3., 'area')
+        self.assertTrue(np.allclose(area, [0.75, 1., 5./12.]))
+        log = casingSim.model.radial_fractions(nodes, 0.5, 3., 'log')
+        self.assertTrue(np.allclose(
+            log, [0.5, 1., np.log(1.5)/np.log(2.)]
+        ))
+
+    def test_conductance(self):
+        mp = self.modelParameters
+        sigma = mp.sigma(self.mesh)
+        indz = mp.indz_casing(self.mesh)
+
+        # the conductance along the axis of a slice is preserved
+        nodes = np.r_[0., np.cumsum(self.mesh.hx)]
+        area = np.pi * np.diff(nodes**2)
+        slice_ = indz & (np.arange(self.mesh.nC) % self.mesh.nCx < 5)
+        row = sigma[slice_][:5]
+        expected = (
+            mp.sigma_inside * np.pi * mp.casing_a**2 +
+            mp.sigma_casing * np.pi * (mp.casing_b**2 - mp.casing_a**2) +
+            mp.sigma_back * (
+                np.pi * nodes[5]**2 - np.pi * mp.casing_b**2
+            )
+        )
+        self.assertTrue(np.isclose((row * area[:5]).sum(), expected))
+
+        # outside of the casing z-extent the background is unchanged
+        self.assertTrue(np.all(sigma[~indz] == mp.sigma_back))
+
+    def test_coarseVsFine(self):
+        # DC source on the axis at the top of a 100 m casing: the upscaled
+        # casing on 4 cm radial cells against 2.5 mm cells resolving the
+        # 1 cm wall
+        pad = 0.04 * 1.3**np.arange(1, 31)
+        hz = np.r_[
+            1.3**np.arange(20, 0, -1), np.ones(200), 1.3**np.arange(1, 21)
+        ]
+        x0 = np.r_[0., 0., -hz[:20].sum() - 150.]
+
+        results = []
+        for hx, upscaling in [
+            (np.r_[np.ones(160) * 2.5e-3, pad], False),
+            (np.r_[np.ones(10) * 4e-2, pad], True),
+            (np.r_[np.ones(10) * 4e-2, pad], False),
+        ]:
+            mesh = discretize.CylMesh([hx, 1, hz], x0=x0)
+            mp = casingSim.model.CasingInWholespace(
+                casing_d=10e-2, casing_t=1e-2, casing_l=100., sigma_back=0.1,
+                sigma_inside=1., casing_upscaling=upscaling
+            )
+            results.append(dcAxisSource(mesh, mp.sigma(mesh)))
+
+        (I_fine, phi_fine), (I_up, phi_up), (I_center, _) = results
+        for z in [-10., -50., -75.]:
+            self.assertTrue(abs(I_up(z) / I_fine(z) - 1.) < 5e-3)
+            # without upscaling, no cell center is in the wall
+            self.assertTrue(I_center(z) < 1e-2 * I_fine(z))
+        for r in [1., 10., 100.]:
+            for z in [-5., -50.]:
+                self.assertTrue(
+                    abs(phi_up(r, z) / phi_fine(r, z) - 1.) < 5e-3
+                )
+
+    def test_casingCells(self):
+        # the cells whose properties change with the casing properties
+        mp = self.modelParameters
+        other = mp.copy()
+        other.sigma_casing, other.mur_casing = 1e5, 50.
+        changed = (
+            (mp.sigma(self.mesh) != other.sigma(self.mesh)) |
+            (mp.mur(self.mesh) != other.mur(self.mesh))
+        )
+        ind = mp.ind_casing_cells(self.mesh)
+        self.assertTrue(np.all(ind[changed]))
+        self.assertTrue(np.any(changed & ~mp.ind_casing(self.mesh)))
+
+    def test_permeability(self):
+        mp = self.modelParameters
+        mur = mp.mur(self.mesh)
+        ind = mp.indz_casing(self.mesh) & (
+            np.arange(self.mesh.nC) % self.mesh.nCx == 1
+        )
+        # the casing is in the second radial cell, [4, 8] cm
+        fraction = np.log(mp.casing_b / mp.casing_a) / np.log(2.)
+        self.assertTrue(np.allclose(
+            mur[ind], 1. + fraction * (mp.mur_casing - 1.)
+        ))
+
+
+class VolumeAveragingTests(unittest.TestCase):
+
+    def setUp(self):
+        self.mesh = discretize.TensorMesh([4, 2, 4], x0='CCC')
+
+    def test_intervalFractions(self):
+        nodes = np.r_[0., 1., 2., 4.]
+        fractions = casingSim.model.interval_fractions(nodes, 0.5, 3.)
+        self.assertTrue(np.allclose(fractions, [0.5, 1., 0.5]))
+
+    def test_regionFractions(self):
+        fractions = casingSim.model.region_fractions(
+            self.mesh, z_range=[0.1, np.inf]
+        )
+        self.assertTrue(np.allclose(
+            fractions.reshape(self.mesh.vnC, order='F')[0, 0, :],
+            [0., 0., 0.6, 1.]
+        ))
+        # the fractions sum to the volume of the region
+        self.assertTrue(np.isclose((fractions * self.mesh.vol).sum(), 0.4))
+
+    def test_halfspace(self):
+        for averaging, mean in [
+            ('arithmetic', 0.6*1e-6 + 0.4*1e-2),
+            ('harmonic', 1./(0.6/1e-6 + 0.4/1e-2))
+        ]:
+            halfspace = casingSim.model.Halfspace(
+                surface_z=0.1, averaging=averaging
+            )
+            sigma = halfspace.sigma(self.mesh).reshape(
+                self.mesh.vnC, order='F'
+            )
+            self.assertTrue(np.allclose(sigma[:, :, 2], mean))
+            self.assertTrue(np.all(sigma[:, :, 3] == 1e-6))
+            self.assertTrue(np.all(sigma[:, :, :2] == 1e-2))
+
+    def test_cutCells(self):
+        # a column of cells cut by the boundaries of a layer: the harmonic
+        # mean gives the exact resistance across the layers and the
+        # arithmetic mean the exact conductance along them
+        hz = np.r_[3., 1., 2., 1.5, 2.5, 1.]
+        mesh = discretize.TensorMesh([[1.], [1.], hz], x0=[0., 0., -11.])
+        layer = casingSim.model.SingleLayer(
+            surface_z=0., sigma_back=1e-2, sigma_layer=1.,
+            layer_z=np.r_[-8.2, -4.6]
+        )
+        thickness = np.r_[11. - 8.2, 8.2 - 4.6, 4.6]
+        sigma_layers = np.r_[1e-2, 1., 1e-2]
+
+        layer.sigma_averaging = 'harmonic'
+        self.assertTrue(np.isclose(
+            (hz / layer.sigma(mesh)).sum(),
+            (thickness / sigma_layers).sum()
+        ))
+        layer.sigma_averaging = 'arithmetic'
+        self.assertTrue(np.isclose(
+            (hz * layer.sigma(mesh)).sum(),
+            (thickness * sigma_layers).sum()
+        ))
+
+    def test_perProperty(self):
+        mesh = discretize.CylMesh(
+            [np.ones(10) * 4e-2, 1, np.ones(20)], x0=np.r_[0., 0., -15.]
+        )
+        mp = casingSim.model.CasingInWholespace(
+            casing_d=10e-2, casing_t=1e-2, casing_l=10.5, sigma_back=0.1,
+            averaging='arithmetic', mur_averaging='harmonic'
+        )
+        self.assertEqual(mp.averaging_of('sigma'), 'arithmetic')
+        self.assertEqual(mp.averaging_of('mur'), 'harmonic')
+
+        # the permeability is averaged on its own
+        arithmetic = casingSim.model.CasingInWholespace(
+            casing_d=10e-2, casing_t=1e-2, casing_l=10.5, sigma_back=0.1,
+            averaging='arithmetic'
+        )
+        self.assertTrue(np.all(mp.sigma(mesh) == arithmetic.sigma(mesh)))
+        fraction = mp.fraction_casing(mesh)
+        self.assertTrue(np.allclose(
+            mp.mur(mesh),
+            1. / ((1. - fraction) / mp.mur_back + fraction / mp.mur_casing)
+        ))
+
+    def test_casing(self):
+        mesh = discretize.CylMesh(
+            [np.ones(10) * 4e-2, 1, np.ones(20)], x0=np.r_[0., 0., -15.]
+        )
+        mp = casingSim.model.CasingInWholespace(
+            casing_d=10e-2, casing_t=1e-2, casing_l=10.5, sigma_back=0.1,
+            averaging='arithmetic'
+        )
+        sigma = mp.sigma(mesh)
+        # the conductance of the casing (and what is inside of it) is
+        # preserved along the z-axis and across the radius
+        expected = (
+            mp.sigma_inside * np.pi * mp.casing_a**2 +
+            mp.sigma_casing * np.pi * (mp.casing_b**2 - mp.casing_a**2) +
+            mp.sigma_back * (np.pi * 0.4**2 - np.pi * mp.casing_b**2)
+        ) * 10.5 + mp.sigma_back * np.pi * 0.4**2 * 9.5
+        self.assertTrue(np.isclose((sigma * mesh.vol).sum(), expected))
+
+        mp.averaging = 'harmonic'
+        self.assertTrue(np.all(mp.sigma(mesh) <= sigma + 1e-12))
+
+    def test_paint(self):
+        values = np.ones(3)
+        casingSim.model.paint(
+            values, [(np.r_[0., 0.5, 1.], 3.)], 'harmonic'
+        )
+        self.assertTrue(np.allclose(values, [1., 1.5, 3.]))
+        with self.assertRaises(KeyError):
+            casingSim.model.paint(values, [(np.ones(3), 1.)], 'geometric')
+
+
+class RegionIndexingTests(unittest.TestCase):
+
+    def test_sameAsGridCC(self):
+        mp = casingSim.model.CasingInHalfspace(
+            casing_d=10e-2, casing_t=1e-2, casing_l=10., surface_z=0.5
+        )
+        meshes = [
+            discretize.CylMesh(
+                [np.ones(10) * 4e-2, np.ones(4) * np.pi/2., np.ones(20)],
+                x0=np.r_[0., 0., -15.]
+            ),
+            discretize.TensorMesh(
+                [np.ones(10) * 4e-2, 3, np.ones(20)], x0=np.r_[0., 0., -15.]
+            )
+        ]
+        for mesh in meshes:
+            x, z = mesh.gridCC[:, 0], mesh.gridCC[:, 2]
+            indz = (z > mp.casing_z[0]) & (z < mp.casing_z[1])
+            expected = {
+                'ind_air': z > mp.surface_z,
+                'indz_casing': indz,
+                'indx_inside': x < mp.casing_a,
+                'ind_casing': (x > mp.casing_a) & (x < mp.casing_b) & indz,
+                'ind_inside': (x < mp.casing_a) & indz,
+            }
+            for name, ind in expected.items():
+                self.assertTrue(
+                    np.array_equal(getattr(mp, name)(mesh), ind), name
+                )
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+import numpy as np
+from scipy.constants import mu_0
+
+from casingSimulations import primary
+
+
+def curl(f, x, h=1e-3):
+    """
+    curl of the vector function f at x (centered differences)
+    """
+    J = np.zeros((3, 3), dtype=complex)
+    for i in range(3):
+        dx = np.zeros(3)
+        dx[i] = h
+        J[:, i] = (f(x + dx) - f(x - dx)) / (2*h)
+    return np.r_[J[2, 1] - J[1, 2], J[0, 2] - J[2, 0], J[1, 0] - J[0, 1]]
+
+
+class TestWholespaceFields(unittest.TestCase):
+
+    def setUp(self):
+        self.sigma, self.freq = 1., 1e3
+        self.dipole_locations = np.array([[0., 0., 0.], [0., 0., -5.]])
+        self.moments = np.array([[1., 0.5, -0.3], [0., 0., 2.]])
+        self.x = np.r_[3., -2., 5.]
+
+    def fields(self, x, freq=None):
+        return primary.wholespace_fields(
+            np.atleast_2d(x), self.dipole_locations, self.moments,
+            self.sigma, self.freq if freq is None else freq
+        )
+
+    def test_maxwell(self):
+        E, H = self.fields(self.x)
+        # Faraday and Ampere (quasi-static)
+        curlE = curl(lambda x: self.fields(x)[0][0], self.x)
+        curlH = curl(lambda x: self.fields(x)[1][0], self.x)
+        omega = 2*np.pi*self.freq
+        self.assertTrue(
+            np.linalg.norm(curlE + 1j*omega*mu_0*H[0]) <
+            1e-5 * np.linalg.norm(curlE)
+        )
+        self.assertTrue(
+            np.linalg.norm(curlH - self.sigma*E[0]) <
+            1e-5 * np.linalg.norm(curlH)
+        )
+
+    def test_static(self):
+        # at low frequency, the electric field is the one of static dipoles
+        E, _ = self.fields(self.x, freq=1e-12)
+        E_static = np.zeros(3)
+        for location, p in zip(self.dipole_locations, self.moments):
+            dr = self.x - location
+            r = np.linalg.norm(dr)
+            rhat = dr / r
+            E_static += (3*rhat*rhat.dot(p) - p) / (4*np.pi*self.sigma*r**3)
+        self.assertTrue(np.allclose(E[0], E_static, rtol=1e-6))
+
+    def test_selfContribution(self):
+        E, H = self.fields(self.dipole_locations[0])
+        self.assertTrue(np.all(np.isfinite(E)) and np.all(np.isfinite(H)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,248 @@
+import multiprocessing
+import os
+import time
+import unittest
+import numpy as np
+import scipy.sparse as sp
+
+from casingSimulations import solvers
+
+from .utils import frequencySystem
+
+
+class PhasedSolver(solvers.SuperLUSolver):
+    """
+    SuperLU with a symbolic phase and a numeric phase that re-factors the
+    matrix, each taking at least delay seconds
+    """
+
+    delay = 0.05
+
+    def _analyze(self, A):
+        time.sleep(self.delay)
+
+    def _factor(self, A):
+        time.sleep(self.delay)
+        super(PhasedSolver, self)._factor(A)
+
+    def _refactor(self, A):
+        self._factor(A)
+        return True
+
+
+class TestSweepSolver(unittest.TestCase):
+
+    def setUp(self):
+        self.K, self.M = frequencySystem()
+        self.freqs = np.logspace(-1, 3, 6)
+        self.rhs = np.random.rand(self.K.shape[0]) + 0j
+
+    def test_sweep_solutions(self):
+        Ainv = solvers.SweepSolver()
+        for f in self.freqs:
+            A = self.K + 1j*2*np.pi*f*self.M
+            x = Ainv.factor(A) * self.rhs
+            self.assertTrue(
+                np.linalg.norm(A*x - self.rhs) <
+                1e-10 * np.linalg.norm(self.rhs)
+            )
+
+        # SuperLU can not re-use its analysis: every frequency is analyzed
+        # and factored
+        self.assertEqual(Ainv.stats.n_analysis, len(self.freqs))
+        self.assertEqual(Ainv.stats.n_factorization, len(self.freqs))
+        self.assertEqual(Ainv.stats.n_solve, len(self.freqs))
+
+    def test_analysis_reuse(self):
+        # a backend with separate symbolic and numeric phases
+        Ainv = solvers.SweepSolver(Solver=PhasedSolver)
+        for f in self.freqs:
+            Ainv.factor(self.K + 1j*2*np.pi*f*self.M)
+        stats = Ainv.stats
+        self.assertEqual(stats.n_analysis, 1)
+        self.assertEqual(stats.n_factorization, len(self.freqs))
+
+        # each phase is timed separately
+        self.assertTrue(
+            PhasedSolver.delay <= stats.time_analysis < 2*PhasedSolver.delay
+        )
+        self.assertTrue(
+            stats.time_factorization >= len(self.freqs) * PhasedSolver.delay
+        )
+
+    def test_detect_once(self):
+        Ainv = solvers.SweepSolver(matrix_type='auto')
+        Ainv.factor(self.K + 1j*self.M)
+        self.assertEqual(Ainv.solverOpts['matrix_type'], 'symmetric')
+
+    def test_new_pattern(self):
+        Ainv = solvers.SweepSolver()
+        Ainv.factor(self.K + 1j*self.M)
+        Ainv.factor(self.K + 1j*self.M + sp.eye(self.K.shape[0], k=3))
+        self.assertEqual(Ainv.stats.n_analysis, 2)
+
+
+class TestSolverBackends(unittest.TestCase):
+
+    def setUp(self):
+        K, M = frequencySystem(n=2000)
+        self.A = (K + 1j*M).tocsc()
+        self.rhs = np.random.rand(self.A.shape[0], 2) + 0j
+
+    def test_backends(self):
+        for name in solvers.available_solvers():
+            Ainv = solvers.get_solver(name)(self.A)
+            x = Ainv * self.rhs
+            Ainv.clean()
+            self.assertTrue(
+                np.linalg.norm(self.A*x - self.rhs) <
+                1e-6 * np.linalg.norm(self.rhs),
+                '{} solver is inaccurate'.format(name)
+            )
+
+    def test_preconditioners(self):
+        for kind in ['ilu', 'block_jacobi', 'jacobi']:
+            stats = solvers.SolverStats()
+            Ainv = solvers.IterativeSolver(
+                self.A, stats=stats, preconditioner=kind, tol=1e-10,
+                log_residuals=True
+            )
+            x = Ainv * self.rhs
+            self.assertTrue(
+                np.linalg.norm(self.A*x - self.rhs) <
+                1e-8 * np.linalg.norm(self.rhs)
+            )
+
+            # iterations and residuals are recorded for each solve
+            self.assertEqual(len(stats.iterations), self.rhs.shape[1])
+            self.assertEqual(len(stats.residual_history), self.rhs.shape[1])
+            self.assertTrue(max(stats.residuals) < 1e-10)
+
+    def test_add_stats(self):
+        # the work of solvers with their own counters (e.g. in worker
+        # processes) is added up, iterations included
+        total = solvers.SolverStats()
+        for kind in ['superlu', 'iterative']:
+            stats = solvers.SolverStats()
+            Ainv = solvers.get_solver(kind)(self.A, stats=stats)
+            Ainv * self.rhs
+            total.add(stats.summary)
+        self.assertEqual(total.n_factorization, 1)
+        self.assertEqual(total.n_solve, 2 * self.rhs.shape[1])
+        self.assertEqual(len(total.iterations), self.rhs.shape[1])
+
+    def test_default_solver(self):
+        # Pardiso if it is installed, as in SimPEG's defaults
+        Solver = solvers.get_solver('default')
+        if solvers.PardisoSolver.available:
+            self.assertTrue(Solver is solvers.PardisoSolver)
+        else:
+            self.assertTrue(Solver is solvers.SuperLUSolver)
+
+        # the matrix is not checked for symmetry unless asked to
+        Ainv = Solver(self.A)
+        self.assertEqual(Ainv.matrix_type, 'general')
+
+    def test_unknown_solver(self):
+        with self.assertRaises(KeyError):
+            solvers.get_solver('not_a_solver')
+
+    def test_select_solver(self):
+        # small systems use SuperLU
+        Solver, opts = solvers.select_solver(self.A, min_size=1e5)
+        self.assertTrue(Solver is solvers.SuperLUSolver)
+
+        # if the factors do not fit in memory, use an iterative solver
+        Solver, opts = solvers.select_solver(
+            self.A, min_size=0, memory_fraction=0.
+        )
+        self.assertTrue(Solver is solvers.IterativeSolver)
+
+
+class TestMatrixType(unittest.TestCase):
+
+    def setUp(self):
+        self.K, self.M = frequencySystem(n=1000)
+        self.rhs = np.random.rand(self.K.shape[0]) + 0j
+
+    def test_detect(self):
+        self.assertEqual(solvers.matrix_type(self.K), 'symmetric')
+        self.assertEqual(solvers.matrix_type(self.K + 1j*self.M), 'symmetric')
+        self.assertEqual(
+            solvers.matrix_type(self.K + 1j*sp.triu(self.K, k=1)), 'general'
+        )
+        H = self.K + 1j*(sp.triu(self.K, k=1) - sp.tril(self.K, k=-1))
+        self.assertEqual(solvers.matrix_type(H), 'hermitian')
+
+    def test_symmetric_solves(self):
+        A = (self.K + 1j*self.M).tocsc()
+        for name in solvers.available_solvers():
+            if name == 'cholmod':
+                continue
+            Ainv = solvers.get_solver(name)(A, matrix_type='symmetric')
+            x = Ainv * self.rhs
+            self.assertTrue(
+                np.linalg.norm(A*x - self.rhs) <
+                1e-6 * np.linalg.norm(self.rhs),
+                '{} solver is inaccurate'.format(name)
+            )
+
+    def test_spd(self):
+        # diagonally dominant, so positive definite
+        A = (
+            self.K + sp.diags(np.asarray(abs(self.K).sum(1)).ravel())
+        ).tocsc()
+        for Ainv in [
+            solvers.SuperLUSolver(A, matrix_type='spd'),
+            solvers.IterativeSolver(A, matrix_type='spd', tol=1e-10)
+        ]:
+            x = Ainv * self.rhs
+            self.assertTrue(
+                np.linalg.norm(A*x - self.rhs) <
+                1e-8 * np.linalg.norm(self.rhs)
+            )
+        self.assertEqual(Ainv.method, 'cg')
+
+        Solver, opts = solvers.select_solver(A, matrix_type='spd')
+        self.assertEqual(opts['matrix_type'], 'spd')
+        self.assertTrue(
+            solvers.estimate_factor_memory(A, matrix_type='spd') <
+            solvers.estimate_factor_memory(A)
+        )
+
+    def test_bad_matrix_type(self):
+        with self.assertRaises(ValueError):
+            solvers.SuperLUSolver(self.K, matrix_type='not_a_type')
+
+
+class TestThreadLimits(unittest.TestCase):
+
+    def test_limits_restored(self):
+        env_before = os.environ.get('OMP_NUM_THREADS')
+
+        with solvers.ThreadLimits(2) as limits:
+            self.assertEqual(os.environ['OMP_NUM_THREADS'], '2')
+            counts = limits.thread_counts
+            for key, val in counts.items():
+                if key != 'environment':
+                    self.assertTrue(val <= 2)
+
+        self.assertEqual(os.environ.get('OMP_NUM_THREADS'), env_before)
+
+    def test_no_limits(self):
+        env_before = dict(os.environ)
+        with solvers.ThreadLimits(None):
+            self.assertEqual(dict(os.environ), env_before)
+
+    def test_worker_threads(self):
+        # the cores are shared between the workers if num_threads is not set
+        cores = multiprocessing.cpu_count()
+        self.assertEqual(solvers.worker_threads(3, 4), 3)
+        self.assertEqual(
+            solvers.worker_threads(None, 2), max(1, cores // 2)
+        )
+        self.assertEqual(solvers.worker_threads(None, 2 * cores), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+
+from casingSimulations import sweep
+
+
+class TestSweepPlan(unittest.TestCase):
+
+    def setUp(self):
+        self.configurations = sweep.expand_grid({
+            'mur_casing': [1., 50., 50., 100.],
+            'casing_l': [500., 1000.],
+            'sigma_back': [0.1, 1.],
+        })
+
+    def test_expandGrid(self):
+        # duplicate values are run once
+        self.assertEqual(len(self.configurations), 12)
+        self.assertEqual(
+            len(set(self.configurations)), len(self.configurations)
+        )
+
+    def test_planJobs(self):
+        for num_workers in [1, 2, 4, 8]:
+            jobs = sweep.plan_jobs(self.configurations, num_workers)
+
+            # every configuration is run once
+            self.assertEqual(
+                sorted(sum(jobs, [])), sorted(self.configurations)
+            )
+
+            # the configurations of a job share a mesh
+            for job in jobs:
+                self.assertEqual(len(set(map(sweep.mesh_key, job))), 1)
+
+            # runs differing only by the casing properties follow each other
+            keys = [
+                sweep.casing_key(config) for config in sum(jobs, [])
+            ]
+            changes = sum(a != b for a, b in zip(keys[:-1], keys[1:]))
+            self.assertEqual(changes, len(set(keys)) - 1)
+
+            # one job per mesh, split until there is one per worker
+            self.assertEqual(
+                len(jobs), min(max(num_workers, 2), len(self.configurations))
+            )
+
+
+if __name__ == '__main__':
+    unittest.main()
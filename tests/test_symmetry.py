@@ -0,0 +1,85 @@
+import unittest
+import numpy as np
+import scipy.sparse as sp
+
+from casingSimulations import symmetry
+
+
+def gridLocations(ny=5):
+    """
+    two components of unknowns on a grid symmetric about y = 1
+    """
+    x, y, z = np.meshgrid(
+        np.arange(4), 1. + np.arange(ny) - (ny - 1)/2., np.arange(3)
+    )
+    locations = np.c_[x.ravel(), y.ravel(), z.ravel()]
+    return (
+        np.vstack([locations, locations]),
+        np.repeat([0, 1], len(locations))
+    )
+
+
+def mirrorSymmetricSystem(mirror, sign):
+    """
+    random system that commutes with the reflection
+    """
+    np.random.seed(4)
+    n = len(mirror)
+    R = sp.csr_matrix((sign, (np.arange(n), mirror)), shape=(n, n))
+    A0 = sp.random(n, n, density=0.05)
+    A0 = A0 + A0.T + sp.diags(2*np.abs(A0).sum(1).A1 + 1.)
+    return (A0 + R * A0 * R.T).tocsr()
+
+
+class TestMirrorSymmetricSolver(unittest.TestCase):
+
+    def setUp(self):
+        self.locations, self.components = gridLocations()
+        self.mirror, self.sign = symmetry.mirror_map(
+            self.locations, 1., self.components, odd_components=[1]
+        )
+
+    def test_mirrorMap(self):
+        mirrored = self.locations[self.mirror]
+        self.assertTrue(
+            np.allclose(mirrored[:, 1], 2. - self.locations[:, 1])
+        )
+        self.assertTrue(np.all(self.mirror[self.mirror] == np.arange(
+            len(self.mirror)
+        )))
+        self.assertTrue(np.all(self.sign[self.components == 1] == -1))
+
+        # the grid is not symmetric about y = 0
+        with self.assertRaises(Exception):
+            symmetry.mirror_map(self.locations, 0., self.components)
+
+    def test_cylindrical(self):
+        # unknowns at the centers of 8 azimuthal cells, mirrored about pi
+        theta = (np.arange(8) + 0.5) * np.pi / 4.
+        locations = np.c_[np.ones(8), theta, np.zeros(8)]
+        mirror, _ = symmetry.mirror_map(locations, np.pi, cylindrical=True)
+        self.assertTrue(np.all(mirror == np.arange(8)[::-1]))
+
+    def test_halfBasis(self):
+        P = symmetry.half_basis(self.mirror, self.sign)
+        # 4 x 3 unknowns per component on the plane, the odd ones are zero
+        n = len(self.mirror)
+        self.assertEqual(P.shape[1], (n - 2*12) // 2 + 12)
+
+    def test_solve(self):
+        A = mirrorSymmetricSystem(self.mirror, self.sign)
+        b = np.random.rand(A.shape[0], 2)
+        b = b + self.sign[:, None] * b[self.mirror]
+
+        Ainv = symmetry.MirrorSymmetricSolver(A, self.mirror, self.sign)
+        x = Ainv.solve(b)
+        self.assertEqual(x.shape, b.shape)
+        self.assertTrue(np.linalg.norm(A * x - b) < 1e-10 * np.linalg.norm(b))
+        self.assertEqual(Ainv.n_half, (A.shape[0] - 24) // 2 + 12)
+
+        with self.assertRaises(Exception):
+            Ainv.solve(np.random.rand(A.shape[0]))
+
+
+if __name__ == '__main__':
+    unittest.main()
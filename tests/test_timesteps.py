@@ -0,0 +1,59 @@
+import unittest
+import numpy as np
+
+from casingSimulations import timesteps
+
+
+class TestTimeStepPlanner(unittest.TestCase):
+
+    def setUp(self):
+        self.output_times = np.logspace(-5, -2, 31)
+        self.planner = timesteps.TimeStepPlanner(
+            output_times=self.output_times, accuracy=0.05
+        )
+
+    def test_plan(self):
+        steps = self.planner.plan(verbose=False)
+        timeSteps = self.planner.timeSteps
+        times = np.cumsum(timeSteps)
+
+        # the steps reach the last output time
+        self.assertTrue(times[-1] >= self.output_times.max())
+
+        # after the earliest output time, the steps meet the accuracy
+        after = times[:-1] >= self.output_times.min()
+        self.assertTrue(
+            np.all(timeSteps[1:][after] <= 0.05 * times[:-1][after] * 1.0001)
+        )
+
+        # one factorization per block
+        predicted = self.planner.predicted
+        self.assertEqual(predicted['n_factorizations'], len(steps))
+        self.assertEqual(predicted['n_solves'], len(timeSteps))
+
+    def test_fewer_factorizations(self):
+        # a step list growing at every step needs a factorization per step
+        timeSteps = 1e-6 * 1.05**np.arange(200)
+        self.assertEqual(
+            timesteps.predict_cost(timeSteps)['n_factorizations'], 200
+        )
+
+        planner = timesteps.TimeStepPlanner(
+            output_times=np.r_[1e-6, timeSteps.sum()], accuracy=0.05
+        )
+        self.assertTrue(planner.predicted['n_factorizations'] < 20)
+
+    def test_factorization_cost(self):
+        # expensive factorizations favour larger ratios between blocks
+        self.planner.factorization_cost = 1e4
+        self.planner.plan(verbose=False)
+        expensive = self.planner.predicted['n_factorizations']
+
+        self.planner.factorization_cost = 1.
+        self.planner.plan(verbose=False)
+        cheap = self.planner.predicted['n_factorizations']
+        self.assertTrue(expensive < cheap)
+
+
+if __name__ == '__main__':
+    unittest.main()
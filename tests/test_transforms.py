@@ -0,0 +1,71 @@
+import unittest
+import numpy as np
+
+from casingSimulations import transforms
+
+
+class TestLaplaceInversion(unittest.TestCase):
+
+    def setUp(self):
+        # response of a system with decay rates a: 1 / (s + a)
+        self.a = np.r_[1., 10., 100.]
+        self.times = np.logspace(-3, 0, 10)
+        self.response = lambda s: 1. / (s[:, None] + self.a[None, :])
+        at = np.outer(self.times, self.a)
+        self.expected = {
+            'impulse': np.exp(-at),
+            'step-on': (1. - np.exp(-at)) / self.a,
+            'step-off': np.exp(-at) / self.a,
+        }
+
+    def test_waveforms(self):
+        for method, tol in [('talbot', 1e-4), ('stehfest', 1e-3)]:
+            for waveform, expected in self.expected.items():
+                result = transforms.time_domain_response(
+                    self.response, self.times, method=method,
+                    waveform=waveform
+                )
+                self.assertTrue(
+                    np.abs(result - expected).max() <
+                    tol * np.abs(expected).max(),
+                    '{} {} is inaccurate'.format(method, waveform)
+                )
+
+    def test_diffusive(self):
+        # 1 / sqrt(s) is the transform of 1 / sqrt(pi t)
+        result = transforms.time_domain_response(
+            lambda s: 1. / np.sqrt(s), self.times, waveform='impulse'
+        )
+        self.assertTrue(
+            np.allclose(result[:, 0], 1. / np.sqrt(np.pi * self.times))
+        )
+
+    def test_lateTimes(self):
+        # slow decays at late times: the shifts are small, the DC response
+        # is approximated at a shift that is not smaller than MIN_DC_SHIFT
+        a = np.r_[1e-3, 1e-2]
+        times = np.logspace(1, 4, 7)
+        shifts = []
+
+        def response(s):
+            shifts.append(s)
+            return 1. / (s[:, None] + a[None, :])
+
+        result = transforms.time_domain_response(response, times)
+        self.assertTrue(
+            np.abs(np.hstack(shifts)).min() >= transforms.MIN_DC_SHIFT
+        )
+        expected = np.exp(-np.outer(times, a)) / a
+        self.assertTrue(
+            np.abs(result - expected).max() < 1e-4 * np.abs(expected).max()
+        )
+
+    def test_stehfest_weights(self):
+        # the weights sum to zero (the transform of a constant is 1 / s)
+        self.assertTrue(abs(transforms.stehfest_weights(12).sum()) < 1e-6)
+        with self.assertRaises(ValueError):
+            transforms.stehfest_weights(7)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import unittest
+import numpy as np
+
+from casingSimulations import waveforms
+
+TOL = 1e-4
+
+
+class TestConvolution(unittest.TestCase):
+
+    def setUp(self):
+        # exponential decays with time constants tau: the step-off response
+        # is exp(-t / tau) and the DC response is 1
+        self.tau = np.r_[1e-3, 1e-4]
+        self.response_times = np.logspace(-9, 0, 451)
+        self.step_off = np.exp(-self.response_times[:, None] / self.tau)
+        self.impulse = self.step_off / self.tau
+        self.dc = np.ones(len(self.tau))
+        self.times = np.logspace(-5, -2.5, 11)
+
+    def convolve(self, waveform, times=None, response_type='step-off'):
+        return waveforms.convolve(
+            self.times if times is None else times, self.response_times,
+            self.step_off if response_type == 'step-off' else self.impulse,
+            waveform, response_type=response_type, dc=self.dc
+        )
+
+    def test_stepOff(self):
+        for response_type in waveforms.RESPONSE_TYPES:
+            d = self.convolve(
+                waveforms.step_off(), response_type=response_type
+            )
+            true = np.exp(-self.times[:, None] / self.tau)
+            self.assertTrue(np.allclose(d, true, rtol=TOL, atol=1e-10))
+
+    def test_rampOff(self):
+        T = 5e-4
+        waveform = waveforms.ramp_off(T)
+        for response_type in waveforms.RESPONSE_TYPES:
+            # off-time
+            d = self.convolve(waveform, response_type=response_type)
+            true = (
+                self.tau / T * np.exp(-self.times[:, None] / self.tau) *
+                (1. - np.exp(-T / self.tau))
+            )
+            self.assertTrue(np.allclose(d, true, rtol=TOL, atol=1e-10))
+
+            # during the ramp
+            times = np.linspace(-0.9, -0.1, 5) * T
+            d = self.convolve(waveform, times, response_type=response_type)
+            true = waveform.eval(times)[:, None] + self.tau / T * (
+                1. - np.exp(-(times[:, None] + T) / self.tau)
+            )
+            self.assertTrue(np.allclose(d, true, rtol=TOL, atol=1e-10))
+
+    def test_bipolar(self):
+        waveform = waveforms.bipolar(on_time=2e-3, off_time=2e-3, n_cycles=2)
+        d = self.convolve(waveform)
+
+        # superposition of the step responses of the jumps
+        t0, _, dI = waveform.segments
+        u = self.times[:, None] - t0[None, :]
+        true = -np.einsum(
+            'ij,ijk->ik', dI[None, :] * (u >= 0),
+            np.exp(-np.clip(u, 0., None)[:, :, None] / self.tau)
+        )
+        self.assertTrue(np.allclose(d, true, rtol=TOL, atol=1e-10))
+
+    def test_halfSine(self):
+        # a sampled half sine converges to the half sine
+        duration = 1e-3
+        d = [
+            self.convolve(waveforms.half_sine(duration, n=n))
+            for n in [32, 256]
+        ]
+        w = np.pi / duration
+        a = 1. / self.tau
+        true = (
+            a * w / (a**2 + w**2) * (1 + np.exp(-a * duration)) *
+            np.exp(-a * self.times[:, None])
+        )
+        self.assertTrue(
+            np.abs(d[1] - true).max() < np.abs(d[0] - true).max()
+        )
+        self.assertTrue(np.allclose(d[1], true, rtol=1e-3, atol=1e-10))
+
+    def test_needsDC(self):
+        with self.assertRaises(ValueError):
+            waveforms.convolve(
+                np.r_[-1e-4], self.response_times, self.step_off,
+                waveforms.ramp_off(5e-4)
+            )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,14 @@
+import numpy as np
+import scipy.sparse as sp
+
+
+def frequencySystem(n=400, seed=0):
+    """
+    A system of the form K + i omega M with the same sparsity pattern for all
+    frequencies
+    """
+    np.random.seed(seed)
+    K = sp.random(n, n, density=0.01, random_state=seed)
+    K = K + K.T + 4.*sp.eye(n)
+    M = sp.diags(np.random.rand(n) + 0.1)
+    return K.tocsc(), M.tocsc()